@@ -1,25 +1,28 @@
 from datetime import datetime, timedelta
 from typing import Optional, List
 from jose import JWTError, jwt
-import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import DBSession, get_db, run_db
 from app.models import User, UserRole
+from app import metrics
 from app.config import settings
+from app.hashing import bcrypt_hash, bcrypt_verify
+from app.principal_cache import Principal, get_principal_cache
 
-SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    """Inline verification; request handlers use app.hashing.get_password_pool() instead."""
+    return bcrypt_verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Inline hashing; request handlers use app.hashing.get_password_pool() instead."""
+    return bcrypt_hash(password, settings.BCRYPT_ROUNDS)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -28,29 +31,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _load_principal(db: Session, email: str) -> Optional[Principal]:
+    user = db.query(User).filter(User.email == email).first()
+    return Principal.from_user(user) if user is not None else None
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_db)) -> Principal:
+    """
+    Resolve the bearer token to a Principal snapshot of the user.
+    Principals are cached by token subject, so most requests skip the user lookup.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    with metrics.phase("auth"):
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+        principal = get_principal_cache().get(email)
+    if principal is not None:
+        return principal
+
+    principal = await run_db(db, _load_principal, email)
+    if principal is None:
         raise credentials_exception
-    return user
+    get_principal_cache().set(email, principal)
+    return principal
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: User = Depends(get_current_user)):
     return current_user
 
 def require_role(allowed_roles: List[UserRole]):
@@ -58,7 +75,7 @@ def require_role(allowed_roles: List[UserRole]):
     Dependency to check if the current user has one of the allowed roles.
     Usage: current_user: User = Depends(require_role([UserRole.ADMIN]))
     """
-    def role_checker(current_user: User = Depends(get_current_user)):
+    async def role_checker(current_user: User = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -67,7 +84,7 @@ def require_role(allowed_roles: List[UserRole]):
         return current_user
     return role_checker
 
-def require_admin(current_user: User = Depends(get_current_user)):
+async def require_admin(current_user: User = Depends(get_current_user)):
     """Require Admin role"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -76,7 +93,7 @@ def require_admin(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
-def require_manager_or_admin(current_user: User = Depends(get_current_user)):
+async def require_manager_or_admin(current_user: User = Depends(get_current_user)):
     """Require Manager or Admin role"""
     if current_user.role not in [UserRole.ADMIN, UserRole.MANAGER]:
         raise HTTPException(
@@ -0,0 +1,99 @@
+"""
+Set-based deletes for projects and users.
+
+Deleting through the ORM loads every dependent row (a project's tasks, a
+user's assigned tasks) and writes them back one statement per row. These
+helpers use DELETE / UPDATE statements over batches of DELETE_BATCH_SIZE ids
+instead, keeping counters and tombstones in step with each batch.
+
+With commit_batches, every batch is its own transaction, so locks are held
+for one batch at a time; background jobs use that for very large projects.
+Either way a delete can be run again after a failure and picks up where the
+previous attempt stopped.
+"""
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from app import changes, counters
+from app.config import settings
+from app.models import Project, Task, User, project_members
+
+NO_SYNC = {"synchronize_session": False}
+
+def _delete_task_batch(db: Session, project_id: int, tombstones: bool = True) -> int:
+    rows = db.execute(
+        select(Task.id, Task.project_id, Task.assigned_to, Task.status, Task.is_overdue)
+        .where(Task.project_id == project_id)
+        .limit(settings.DELETE_BATCH_SIZE)
+    ).all()
+    if rows:
+        db.execute(delete(Task).where(Task.id.in_([row.id for row in rows])), execution_options=NO_SYNC)
+        counters.tasks_changed(db, [(row.project_id, row.status, None, row.is_overdue, False) for row in rows])
+        if tombstones:
+            changes.record_deleted_tasks(db, rows)
+    return len(rows)
+
+def delete_project(
+    db: Session,
+    project: Project,
+    commit_batches: bool = False,
+    progress: Optional[Callable[[int], None]] = None,
+    tombstones: bool = True,
+) -> int:
+    """
+    Delete the project, its tasks and its memberships; returns the number of tasks deleted.
+    Without tombstones the delete is not reported to the changes feeds, for removing the
+    copy a shard move left behind.
+    """
+    deleted = 0
+    while True:
+        batch = _delete_task_batch(db, project.id, tombstones)
+        if not batch:
+            break
+        deleted += batch
+        if commit_batches:
+            db.commit()
+        if progress is not None:
+            progress(deleted)
+
+    counters.project_deleted(db, project)
+    if tombstones:
+        changes.record_deleted_project(db, project.id)
+    db.execute(delete(project_members).where(project_members.c.project_id == project.id))
+    db.execute(delete(Project).where(Project.id == project.id), execution_options=NO_SYNC)
+    db.commit()
+    return deleted
+
+def delete_user(db: Session, user: User) -> list:
+    """
+    Unassign the user's tasks, drop their memberships and delete them, in one transaction;
+    returns the ids of the unassigned tasks.
+    """
+    released = release_user(db, user.id)
+    db.execute(delete(User).where(User.id == user.id), execution_options=NO_SYNC)
+    db.commit()
+    return released
+
+def release_user(db: Session, user_id: int) -> list:
+    """Unassign the user's tasks and drop their memberships, without committing; returns the task ids."""
+    now = datetime.utcnow()
+    released = []
+    while True:
+        rows = db.execute(
+            select(Task.id, Task.project_id).where(Task.assigned_to == user_id).limit(settings.DELETE_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        db.execute(
+            update(Task).where(Task.id.in_([row.id for row in rows])).values(assigned_to=None, updated_at=now),
+            execution_options=NO_SYNC,
+        )
+        changes.record_reassigned_tasks(db, [(row.id, row.project_id, user_id, None) for row in rows])
+        released.extend(row.id for row in rows)
+
+    # Leaving a team changes the project's representation; bump its validators
+    member_of = select(project_members.c.project_id).where(project_members.c.user_id == user_id)
+    db.execute(update(Project).where(Project.id.in_(member_of)).values(updated_at=now), execution_options=NO_SYNC)
+    db.execute(delete(project_members).where(project_members.c.user_id == user_id))
+    return released
@@ -0,0 +1,217 @@
+"""
+Delta-sync feeds: rows created, updated or deleted after a cursor.
+
+Live rows are read in (updated_at, id) order and deletes from the tombstones
+table in (deleted_at, id) order; the opaque cursor holds the position reached
+in both. Only changes older than CHANGES_SETTLE_SECONDS are returned, so a
+transaction that stamped updated_at but had not committed yet when a client
+synced is not skipped over by that client's cursor.
+
+Delete paths call the record_* helpers before committing. So do reassignments:
+a feed filtered by assignee stops matching a task that moves to someone else,
+so the previous assignee gets an exit entry (a TASK_EXIT tombstone) reported
+in their deleted list. Tombstones older than TOMBSTONE_RETENTION_DAYS can be
+pruned, on every shard when DATABASE_SHARD_URLS is set, with:
+
+    python -m app.changes prune
+"""
+import base64
+import binascii
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import Tombstone
+from app.pagination import DEFAULT_PAGE_SIZE
+from app.projection import is_projection
+
+TASK = "task"
+PROJECT = "project"
+# A task that left its assignee's view; only the assignee-filtered feed reads these
+TASK_EXIT = "task_exit"
+
+def encode_changes_cursor(changed: tuple, deleted: tuple) -> str:
+    payload = {
+        "changed": [changed[0].isoformat() if changed[0] else None, changed[1]],
+        "deleted": [deleted[0].isoformat(), deleted[1]],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_changes_cursor(cursor: str) -> tuple:
+    """((updated_at, id), (deleted_at, id)) positions from a cursor made by encode_changes_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        changed_at, changed_id = payload["changed"]
+        deleted_at, deleted_id = payload["deleted"]
+        if not isinstance(changed_id, int) or not isinstance(deleted_id, int):
+            raise ValueError
+        changed = (datetime.fromisoformat(changed_at) if changed_at else None, changed_id)
+        deleted = (datetime.fromisoformat(deleted_at), deleted_id)
+    except (ValueError, KeyError, TypeError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return changed, deleted
+
+def _after(column, id_column, position: tuple):
+    value, last_id = position
+    if value is None:
+        return id_column > last_id
+    return or_(column > value, and_(column == value, id_column > last_id))
+
+def settled_horizon() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+
+def _positions(since: Optional[str], horizon: datetime) -> tuple:
+    if not since:
+        return (None, 0), (horizon, 0)
+    changed_position, deleted_position = decode_changes_cursor(since)
+    if deleted_position[0] < horizon - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS):
+        raise HTTPException(status_code=410, detail="Cursor expired, sync again without since")
+    return changed_position, deleted_position
+
+def read_changes(
+    db: Session,
+    stmt,
+    model,
+    entity: str,
+    since: Optional[str] = None,
+    limit: Optional[int] = None,
+    tombstone_filter=None,
+) -> dict:
+    """
+    One page of the feed for stmt (a select of model with any visibility filters applied).
+    entity is the tombstone entity to report, or a tuple of them.
+    Without since, every live row is returned and deletes are tracked from now on.
+    """
+    horizon = settled_horizon()
+    page = read_changes_page(db, stmt, model, entity, since, limit, tombstone_filter, horizon)
+    return merge_changes([page], since, limit, horizon)
+
+def read_changes_page(
+    db: Session,
+    stmt,
+    model,
+    entity: str,
+    since: Optional[str],
+    limit: Optional[int],
+    tombstone_filter,
+    horizon: datetime,
+) -> tuple:
+    """
+    (rows, tombstones) after the since cursor, up to one more than a page of each.
+    rows are entities for select(model), Row tuples for a column projection.
+    """
+    page_size = limit or DEFAULT_PAGE_SIZE
+    changed_position, deleted_position = _positions(since, horizon)
+    entities = (entity,) if isinstance(entity, str) else tuple(entity)
+
+    rows_stmt = (
+        stmt.where(model.updated_at <= horizon, _after(model.updated_at, model.id, changed_position))
+        .order_by(model.updated_at, model.id)
+        .limit(page_size + 1)
+    )
+    rows = (db.execute(rows_stmt) if is_projection(rows_stmt) else db.scalars(rows_stmt)).all()
+
+    tombstones = []
+    if since:
+        tombstone_stmt = select(Tombstone).where(
+            Tombstone.entity.in_(entities),
+            Tombstone.deleted_at <= horizon,
+            _after(Tombstone.deleted_at, Tombstone.id, deleted_position),
+        )
+        if tombstone_filter is not None:
+            tombstone_stmt = tombstone_stmt.where(tombstone_filter)
+        tombstones = db.scalars(
+            tombstone_stmt.order_by(Tombstone.deleted_at, Tombstone.id).limit(page_size + 1)
+        ).all()
+    return rows, tombstones
+
+def merge_changes(pages: list, since: Optional[str], limit: Optional[int], horizon: datetime) -> dict:
+    """The feed response for the (rows, tombstones) pages read from one or more databases."""
+    page_size = limit or DEFAULT_PAGE_SIZE
+    changed_position, deleted_position = _positions(since, horizon)
+    if len(pages) == 1:
+        rows, tombstones = pages[0]
+    else:
+        rows = sorted((row for page_rows, _ in pages for row in page_rows), key=lambda row: (row.updated_at, row.id))
+        tombstones = sorted(
+            (tombstone for _, page_tombstones in pages for tombstone in page_tombstones),
+            key=lambda tombstone: (tombstone.deleted_at, tombstone.id),
+        )
+
+    has_more = len(rows) > page_size or len(tombstones) > page_size
+    rows, tombstones = rows[:page_size], tombstones[:page_size]
+    if rows:
+        changed_position = (rows[-1].updated_at, rows[-1].id)
+    if tombstones:
+        deleted_position = (tombstones[-1].deleted_at, tombstones[-1].id)
+    if len(tombstones) < page_size:
+        # Every delete up to the horizon has been seen; move up to it so a
+        # quiet period without deletes does not age the cursor into expiry.
+        deleted_position = max(deleted_position, (horizon, 0))
+
+    return {
+        "changed": rows,
+        "deleted": [tombstone.entity_id for tombstone in tombstones],
+        "cursor": encode_changes_cursor(changed_position, deleted_position),
+        "has_more": has_more,
+    }
+
+def record_deleted_tasks(db: Session, tasks):
+    """tasks: rows or objects with id, project_id and assigned_to."""
+    now = datetime.utcnow()
+    rows = [
+        {"entity": TASK, "entity_id": task.id, "project_id": task.project_id,
+         "assigned_to": task.assigned_to, "deleted_at": now}
+        for task in tasks
+    ]
+    if rows:
+        db.execute(insert(Tombstone), rows)
+
+def record_reassigned_tasks(db: Session, moves):
+    """
+    moves: (task id, project_id, previous assignee, new assignee) for tasks whose assignee changed.
+    The previous assignee gets an exit entry. Earlier exits of the new assignee are dropped: the
+    task is back in their view and reaches them through changed, which a later exit would undo.
+    """
+    now = datetime.utcnow()
+    exits, returns = [], []
+    for task_id, project_id, previous, new in moves:
+        if previous == new:
+            continue
+        if previous is not None:
+            exits.append({"entity": TASK_EXIT, "entity_id": task_id, "project_id": project_id,
+                          "assigned_to": previous, "deleted_at": now})
+        if new is not None:
+            returns.append(and_(Tombstone.entity_id == task_id, Tombstone.assigned_to == new))
+    if returns:
+        db.execute(delete(Tombstone).where(Tombstone.entity == TASK_EXIT, or_(*returns)))
+    if exits:
+        db.execute(insert(Tombstone), exits)
+
+def record_deleted_project(db: Session, project_id: int):
+    """Tombstone the project; its tasks are recorded with record_deleted_tasks as they are deleted."""
+    db.execute(insert(Tombstone), [{"entity": PROJECT, "entity_id": project_id, "deleted_at": datetime.utcnow()}])
+
+def prune(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+    deleted = db.execute(delete(Tombstone).where(Tombstone.deleted_at < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.sharding import sharded_databases
+
+    if sys.argv[1:] != ["prune"]:
+        print("Usage: python -m app.changes prune")
+        sys.exit(2)
+
+    for name, session_factory in sharded_databases(SessionLocal):
+        with session_factory() as session:
+            print(f"Pruned {prune(session)} tombstones on {name}")
@@ -0,0 +1,92 @@
+"""
+Conditional GET support: ETag / Last-Modified validators and 304 responses.
+
+Single resources are validated by (id, updated_at); collections by an
+aggregate over exactly the rows a page would return (count, max(updated_at)
+and sum(id)), so a revalidation is answered without loading or serializing rows.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+@dataclass(frozen=True)
+class Validator:
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    @property
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = http_date(self.last_modified)
+        return headers
+
+def http_date(value: datetime) -> str:
+    """updated_at columns hold naive UTC datetimes."""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def _digest(*parts) -> str:
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+def resource_validator(kind: str, resource_id: int, updated_at: Optional[datetime], weak: bool = False) -> Validator:
+    """
+    Strong ETags for rows whose representation is only their own columns; weak
+    ones where it embeds related rows (a project's team members).
+    """
+    tag = f'"{_digest(kind, resource_id, updated_at)}"'
+    return Validator(etag=f"W/{tag}" if weak else tag, last_modified=updated_at)
+
+def collection_validator(variant: str, count: int, max_updated_at: Optional[datetime], id_sum: Optional[int]) -> Validator:
+    return Validator(etag=f'W/"{_digest(variant, count, max_updated_at, id_sum)}"', last_modified=max_updated_at)
+
+def collection_state(db: Session, stmt, model) -> tuple:
+    """(count, max(updated_at), sum(id)) over the rows stmt selects, ordering and limit included."""
+    page = stmt.with_only_columns(model.id, model.updated_at).subquery()
+    return tuple(db.execute(select(func.count(), func.max(page.c.updated_at), func.sum(page.c.id))).one())
+
+def merge_states(states: list) -> tuple:
+    """Combine collection_state() results from several databases into one."""
+    if len(states) == 1:
+        return states[0]
+    updated = [state[1] for state in states if state[1] is not None]
+    id_sums = [state[2] for state in states if state[2] is not None]
+    return (sum(state[0] for state in states), max(updated, default=None), sum(id_sums) if id_sums else None)
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+def not_modified(request: Request, validator: Validator, use_modified_since: bool = True) -> bool:
+    """
+    If-None-Match wins when present. If-Modified-Since is only trusted when a
+    newer updated_at is the sole way the representation can change, which is
+    not true of collections (a deleted row does not move max(updated_at)).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validator.etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not use_modified_since or if_modified_since is None or validator.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return validator.last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+def not_modified_response(validator: Validator) -> Response:
+    return Response(status_code=304, headers=validator.headers)
@@ -0,0 +1,158 @@
+"""
+Incrementally maintained dashboard counters.
+
+Task and project write paths call the helpers below before committing, so the
+counter rows change in the same transaction as the rows they count. If the
+counters ever drift (manual SQL, restored backups), rebuild them with:
+
+    python -m app.counters reconcile
+
+With DATABASE_SHARD_URLS set, each shard's counters are rebuilt from its own rows.
+"""
+import sys
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import DashboardCounter, Project, Task, TaskStatus
+
+GLOBAL_SCOPE = 0
+
+STATUS_COLUMNS = {
+    TaskStatus.TODO: "todo_tasks",
+    TaskStatus.IN_PROGRESS: "in_progress_tasks",
+    TaskStatus.DONE: "done_tasks",
+}
+
+COUNTER_COLUMNS = ["total_projects", "total_tasks"] + list(STATUS_COLUMNS.values()) + ["overdue_tasks"]
+
+def _increment(db: Session, project_id: int, deltas: dict):
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    values = {column: getattr(DashboardCounter, column) + delta for column, delta in deltas.items()}
+    stmt = update(DashboardCounter).where(DashboardCounter.project_id == project_id).values(**values)
+    if db.execute(stmt).rowcount:
+        return
+
+    # First write for this scope: create the row, falling back to the update if
+    # a concurrent transaction created it first.
+    try:
+        with db.begin_nested():
+            db.add(DashboardCounter(project_id=project_id, **{c: deltas.get(c, 0) for c in COUNTER_COLUMNS}))
+    except IntegrityError:
+        db.execute(stmt)
+
+def _status_column(status) -> str:
+    return STATUS_COLUMNS[TaskStatus(status or TaskStatus.TODO)]
+
+def tasks_changed(db: Session, changes):
+    """
+    Apply many task changes at once as (project_id, old_status, new_status, was_overdue, is_overdue)
+    tuples, with None for the missing status of a create or delete. Deltas are summed per
+    scope first, so a bulk write costs one UPDATE per touched project plus one global.
+    """
+    scopes = {}
+    for project_id, old_status, new_status, was_overdue, is_overdue in changes:
+        deltas = {}
+        if old_status is None and new_status is not None:
+            deltas = {"total_tasks": 1, _status_column(new_status): 1}
+        elif old_status is not None and new_status is None:
+            deltas = {"total_tasks": -1, _status_column(old_status): -1}
+        elif old_status is not None and _status_column(old_status) != _status_column(new_status):
+            deltas = {_status_column(old_status): -1, _status_column(new_status): 1}
+        if bool(was_overdue) != bool(is_overdue):
+            deltas["overdue_tasks"] = 1 if is_overdue else -1
+        for scope in (GLOBAL_SCOPE, project_id):
+            totals = scopes.setdefault(scope, {})
+            for column, delta in deltas.items():
+                totals[column] = totals.get(column, 0) + delta
+
+    for scope, deltas in scopes.items():
+        _increment(db, scope, deltas)
+
+def task_created(db: Session, task: Task):
+    tasks_changed(db, [(task.project_id, None, task.status or TaskStatus.TODO, False, task.is_overdue)])
+
+def task_deleted(db: Session, task: Task):
+    tasks_changed(db, [(task.project_id, task.status or TaskStatus.TODO, None, task.is_overdue, False)])
+
+def task_updated(db: Session, task: Task, old_status: TaskStatus, was_overdue: bool):
+    tasks_changed(db, [(
+        task.project_id, old_status or TaskStatus.TODO, task.status or TaskStatus.TODO, was_overdue, task.is_overdue
+    )])
+
+def overdue_swept(db: Session, flipped: dict):
+    """flipped: number of tasks the overdue sweep flagged, by project id."""
+    for project_id, count in flipped.items():
+        _increment(db, project_id, {"overdue_tasks": count})
+    _increment(db, GLOBAL_SCOPE, {"overdue_tasks": sum(flipped.values())})
+
+def project_created(db: Session, project: Project):
+    """Call after the project has been flushed so it has an id."""
+    _increment(db, GLOBAL_SCOPE, {"total_projects": 1})
+    db.add(DashboardCounter(project_id=project.id, **{c: 0 for c in COUNTER_COLUMNS}))
+
+def project_copied(db: Session, project_id: int, values: dict):
+    """A project and its tasks were copied in from another database; values are its counter row's."""
+    _increment(db, GLOBAL_SCOPE, {**{c: values.get(c, 0) for c in COUNTER_COLUMNS[1:]}, "total_projects": 1})
+    db.add(DashboardCounter(project_id=project_id, **{c: values.get(c, 0) for c in COUNTER_COLUMNS}))
+
+def project_deleted(db: Session, project: Project):
+    """Call before deleting the project; its tasks are removed from the global totals too."""
+    counter = db.get(DashboardCounter, project.id)
+    deltas = {"total_projects": -1}
+    if counter is not None:
+        for column in COUNTER_COLUMNS[1:]:
+            deltas[column] = -getattr(counter, column)
+        db.delete(counter)
+    _increment(db, GLOBAL_SCOPE, deltas)
+
+def get_global_counters(db: Session) -> DashboardCounter:
+    counter = db.get(DashboardCounter, GLOBAL_SCOPE)
+    if counter is None:
+        counter = DashboardCounter(project_id=GLOBAL_SCOPE, **{c: 0 for c in COUNTER_COLUMNS})
+    return counter
+
+def reconcile(db: Session):
+    """Rebuild every counter row from the projects and tasks tables."""
+    rows = {GLOBAL_SCOPE: {c: 0 for c in COUNTER_COLUMNS}}
+    for (project_id,) in db.query(Project.id):
+        rows[project_id] = {c: 0 for c in COUNTER_COLUMNS}
+    rows[GLOBAL_SCOPE]["total_projects"] = len(rows) - 1
+
+    grouped = db.query(Task.project_id, Task.status, Task.is_overdue, func.count(Task.id)).group_by(
+        Task.project_id, Task.status, Task.is_overdue
+    )
+    for project_id, status, is_overdue, count in grouped:
+        status_column = _status_column(status)
+        for scope in (GLOBAL_SCOPE, project_id):
+            if scope not in rows:
+                continue
+            rows[scope]["total_tasks"] += count
+            rows[scope][status_column] += count
+            if is_overdue:
+                rows[scope]["overdue_tasks"] += count
+
+    db.query(DashboardCounter).delete(synchronize_session=False)
+    db.add_all(DashboardCounter(project_id=scope, **counts) for scope, counts in rows.items())
+    db.commit()
+
+def ensure_initialized(db: Session):
+    """Build the counters once for databases that predate the counters table."""
+    if db.get(DashboardCounter, GLOBAL_SCOPE) is None and db.query(Project.id).first() is not None:
+        reconcile(db)
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.sharding import sharded_databases
+
+    if sys.argv[1:] != ["reconcile"]:
+        print("Usage: python -m app.counters reconcile")
+        sys.exit(2)
+
+    for name, session_factory in sharded_databases(SessionLocal):
+        with session_factory() as session:
+            reconcile(session)
+            counter = get_global_counters(session)
+            print(f"Reconciled {name} counters: {counter.total_projects} projects, {counter.total_tasks} tasks")
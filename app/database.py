@@ -1,15 +1,148 @@
+import time
+from functools import lru_cache
+from typing import Optional, Union
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app import metrics
 from app.config import settings
+from app.pool_metrics import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool
+
+# Async drivers select the async request path; each maps to the sync driver
+# used by migrations and scripts such as create_first_admin.py.
+ASYNC_DRIVERS = {
+    "aiosqlite": "pysqlite",
+    "aiomysql": "pymysql",
+}
+
+def is_async_url(url: str) -> bool:
+    return make_url(url).get_driver_name() in ASYNC_DRIVERS
+
+def sync_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = parsed.get_driver_name()
+    if driver in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=f"{parsed.get_backend_name()}+{ASYNC_DRIVERS[driver]}")
+    return parsed.render_as_string(hide_password=False)
+
+def engine_options(url: str, asynchronous: bool = False) -> dict:
+    """
+    create_engine/create_async_engine keyword arguments for url.
+    Pool sizing from Settings applies wherever SQLAlchemy would use a queue pool;
+    in-memory SQLite keeps its default single-connection pool.
+    """
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        # SQLite connections are bound to their creating thread by default; sessions
+        # hop between threadpool threads, so allow cross-thread use.
+        options["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            return options
+
+    options.update({
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if asynchronous else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    })
+    return options
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+# Engines are created on first use, not at import, so importing the app (test
+# collection, CLI scripts, worker boot) never touches the database or its driver.
+# The module attributes engine, SessionLocal, async_engine, AsyncSessionLocal and
+# ASYNC_MODE remain available through __getattr__.
+
+def is_async_mode() -> bool:
+    return is_async_url(settings.DATABASE_URL)
+
+@lru_cache
+def get_engine() -> Engine:
+    return create_engine(sync_url(settings.DATABASE_URL), **engine_options(settings.DATABASE_URL))
+
+@lru_cache
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+@lru_cache
+def get_async_engine() -> Optional[AsyncEngine]:
+    if not is_async_mode():
+        return None
+    return create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, asynchronous=True))
+
+@lru_cache
+def get_async_sessionmaker() -> Optional[async_sessionmaker]:
+    if not is_async_mode():
+        return None
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "SessionLocal": get_sessionmaker,
+    "async_engine": get_async_engine,
+    "AsyncSessionLocal": get_async_sessionmaker,
+    "ASYNC_MODE": is_async_mode,
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+async def dispose_engines():
+    """Close pooled connections of the engines created so far; they reconnect on next use."""
+    if get_engine.cache_info().currsize:
+        await run_in_threadpool(get_engine().dispose)
+    if get_async_engine.cache_info().currsize and get_async_engine() is not None:
+        await get_async_engine().dispose()
+
+DBSession = Union[Session, AsyncSession]
+
+async def get_db():
+    """Yield an AsyncSession when DATABASE_URL uses an async driver, otherwise a sync Session."""
+    if is_async_mode():
+        async with get_async_sessionmaker()() as db:
+            yield db
+        return
+
+    db = get_sessionmaker()()
     try:
         yield db
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
+
+async def run_db(db: DBSession, fn, *args, **kwargs):
+    """
+    Run fn(session, *args, **kwargs) without blocking the event loop.
+    AsyncSessions run it through run_sync, so the database I/O is awaited;
+    sync Sessions (the sync mode and test overrides) run it in the threadpool.
+    """
+    started = time.perf_counter()
+    try:
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    finally:
+        metrics.add_phase("db", time.perf_counter() - started)
+
+async def close_db(db: DBSession):
+    """Return the session's connection to the pool early, e.g. before a long-lived stream."""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+def sync_session_factory(db: DBSession):
+    """
+    A factory for sync Sessions on db's database, for work that outlives the request.
+    AsyncSessions map to SessionLocal, whose engine uses the matching sync driver.
+    """
+    if isinstance(db, AsyncSession):
+        return get_sessionmaker()
+    return sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
@@ -0,0 +1,305 @@
+"""
+Server-push of task and project changes.
+
+Write paths call publish() after their commit. Events go through a Broker so
+every worker sees them (InProcessBroker for a single worker, RedisBroker when
+EVENT_BROKER_URL points at Redis), and the EventHub of each worker fans them
+out to its open SSE/WebSocket connections.
+
+Every connection has a bounded queue. A consumer that falls EVENT_QUEUE_SIZE
+events behind is not allowed to grow memory: its queue is dropped and it gets a
+single "resync" message, after which the client reloads through the changes
+feeds and reconnects.
+"""
+import asyncio
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+import anyio.from_thread
+from app.config import settings
+from app.models import UserRole
+
+logger = logging.getLogger(__name__)
+
+RESYNC = object()
+
+@dataclass(frozen=True)
+class Event:
+    type: str
+    id: int
+    data: Optional[dict] = None
+    project_id: Optional[int] = None
+    # Current and previous assignee of a task, so a developer also hears about tasks leaving them
+    assignees: tuple = ()
+
+    def message(self) -> dict:
+        return {"type": self.type, "id": self.id, "data": self.data}
+
+    def to_json(self) -> str:
+        return json.dumps({**self.message(), "project_id": self.project_id, "assignees": list(self.assignees)})
+
+    @classmethod
+    def from_json(cls, raw) -> "Event":
+        payload = json.loads(raw)
+        return cls(
+            type=payload["type"], id=payload["id"], data=payload["data"],
+            project_id=payload["project_id"], assignees=tuple(payload["assignees"]),
+        )
+
+def task_event(action: str, task_id: int, project_id: int, assignees, data: Optional[dict] = None) -> Event:
+    return Event(
+        type=f"task.{action}", id=task_id, data=data, project_id=project_id,
+        assignees=tuple(dict.fromkeys(a for a in assignees if a)),
+    )
+
+def project_event(action: str, project_id: int, data: Optional[dict] = None) -> Event:
+    return Event(type=f"project.{action}", id=project_id, data=data, project_id=project_id)
+
+class Subscription:
+    """One live connection: its visibility filter and bounded queue."""
+
+    def __init__(self, principal, project_id: Optional[int], queue_size: int):
+        self.principal = principal
+        self.project_id = project_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.loop = asyncio.get_running_loop()
+        self.overflowed = False
+
+    def wants(self, event: Event) -> bool:
+        """Projects are visible to everyone; tasks follow the list_tasks rules."""
+        if event.type.startswith("project."):
+            return True
+        if self.project_id is not None:
+            return event.project_id == self.project_id
+        if self.principal.role == UserRole.DEVELOPER:
+            return self.principal.id in event.assignees
+        return True
+
+    def offer(self, event: Event) -> bool:
+        """Queue the event without ever blocking the publisher; False if that cut the consumer off."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+    async def next(self, timeout: float):
+        """The next Event, RESYNC, or None when nothing arrived within timeout (time for a heartbeat)."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class Broker(ABC):
+    """
+    Carries events between workers. publish() must reach every worker,
+    including this one; start(deliver) begins calling deliver(event) for each,
+    and deliver(RESYNC) when events may have been lost on the way.
+    """
+
+    @abstractmethod
+    async def start(self, deliver):
+        """Begin delivering every published event to deliver."""
+
+    @abstractmethod
+    async def publish(self, event: Event):
+        """Send event to every worker's deliver callback."""
+
+    async def close(self):
+        pass
+
+class InProcessBroker(Broker):
+    """Single-worker broker: publishing is delivering."""
+
+    def __init__(self):
+        self._deliver = None
+
+    async def start(self, deliver):
+        self._deliver = deliver
+
+    async def publish(self, event: Event):
+        self._deliver(event)
+
+class RedisBroker(Broker):
+    """Shares events between workers (and hosts) over a Redis pub/sub channel."""
+
+    CHANNEL = "projecthub:events"
+    RECONNECT_MIN_SECONDS = 0.5
+    RECONNECT_MAX_SECONDS = 30.0
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        from redis.exceptions import ConnectionError, TimeoutError
+
+        self._redis = redis.from_url(url)
+        self._connection_errors = (ConnectionError, TimeoutError, OSError)
+        self._pubsub = None
+        self._listener = None
+
+    async def start(self, deliver):
+        await self._subscribe()
+        self._listener = asyncio.create_task(self._listen(deliver))
+
+    async def _subscribe(self):
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.CHANNEL)
+
+    async def _listen(self, deliver):
+        """
+        Deliver messages until closed. A lost connection is logged and the channel
+        resubscribed with exponential backoff; events published in between are gone,
+        so every connection is told to resync once the subscription is back.
+        """
+        delay = self.RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._subscribe()
+                    logger.info("Resubscribed to %s", self.CHANNEL)
+                    deliver(RESYNC)
+                async for message in self._pubsub.listen():
+                    delay = self.RECONNECT_MIN_SECONDS
+                    if message["type"] == "message":
+                        deliver(Event.from_json(message["data"]))
+            except self._connection_errors as exc:
+                logger.warning("Event broker connection lost (%s); resubscribing in %.1fs", exc, delay)
+            if self._pubsub is not None:
+                pubsub, self._pubsub = self._pubsub, None
+                try:
+                    await pubsub.close()
+                except self._connection_errors:
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+
+    async def publish(self, event: Event):
+        await self._redis.publish(self.CHANNEL, event.to_json())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.close()
+        await self._redis.close()
+
+def create_broker(url: str) -> Broker:
+    if not url:
+        return InProcessBroker()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported EVENT_BROKER_URL: {url}")
+
+class EventHub:
+    def __init__(self, broker: Broker, queue_size: int):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._started = False
+        self._tasks = set()
+        self.published = 0
+        self.delivered = 0
+        self.disconnected_slow = 0
+
+    async def _ensure_started(self):
+        if not self._started:
+            self._started = True
+            await self.broker.start(self._deliver)
+
+    async def publish(self, *events: Event):
+        await self._ensure_started()
+        for event in events:
+            await self.broker.publish(event)
+            self.published += 1
+
+    def _deliver(self, event):
+        """Fan an Event out to the connections that can see it; RESYNC goes to every connection."""
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if event is RESYNC or s.wants(event)]
+        for subscription in subscriptions:
+            if subscription.loop is _running_loop():
+                self._offer(subscription, event)
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(self._offer, subscription, event)
+            except RuntimeError:
+                # The connection's event loop is gone
+                self.unsubscribe(subscription)
+
+    def _offer(self, subscription: Subscription, event: Event):
+        if subscription.overflowed:
+            return
+        if subscription.offer(event):
+            self.delivered += 1
+        else:
+            self.disconnected_slow += 1
+            self.unsubscribe(subscription)
+
+    def schedule(self, *events: Event):
+        """Publish from synchronous code running on the event loop thread."""
+        task = asyncio.get_running_loop().create_task(self.publish(*events))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def subscribe(self, principal, project_id: Optional[int] = None) -> Subscription:
+        await self._ensure_started()
+        subscription = Subscription(principal, project_id, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "broker": type(self.broker).__name__,
+            "subscribers": len(self._subscriptions),
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "disconnected_slow": self.disconnected_slow,
+        }
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+# Built on first use, so importing the app neither reads settings nor connects a broker.
+# The module attribute hub remains available through __getattr__.
+
+@lru_cache
+def get_hub() -> EventHub:
+    return EventHub(create_broker(settings.EVENT_BROKER_URL), settings.EVENT_QUEUE_SIZE)
+
+def __getattr__(name: str):
+    if name == "hub":
+        return get_hub()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def publish(*events: Event):
+    """
+    Fire-and-forget publish for the sync write helpers; call after commit.
+    Works on the event loop thread (AsyncSession.run_sync) and from threadpool
+    workers (sync sessions); outside any event loop there is nobody to notify.
+    """
+    if not events:
+        return
+    if _running_loop() is not None:
+        get_hub().schedule(*events)
+        return
+    try:
+        anyio.from_thread.run_sync(get_hub().schedule, *events)
+    except RuntimeError:
+        pass
@@ -0,0 +1,148 @@
+"""
+Bounded process pool for bcrypt work.
+
+bcrypt is deliberately slow, so hashing and verification run in a dedicated
+process pool instead of the request threadpool. At most
+PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_DEPTH jobs may be in flight; beyond
+that callers get an immediate 503 instead of queueing behind a login storm.
+Set PASSWORD_HASH_WORKERS=0 to hash inline in the calling thread.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+import bcrypt
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app import metrics
+from app.config import settings
+
+def bcrypt_hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def bcrypt_verify(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def bcrypt_hash_many(passwords: list, rounds: int) -> list:
+    return [bcrypt_hash(password, rounds) for password in passwords]
+
+def hash_rounds(hashed_password: str) -> int:
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or 0 if it cannot be parsed."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+def needs_rehash(hashed_password: str) -> bool:
+    return hash_rounds(hashed_password) != settings.BCRYPT_ROUNDS
+
+class PasswordPool:
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.capacity = workers + queue_depth
+        self._slots = threading.BoundedSemaphore(max(self.capacity, 1))
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the server process has threads and open DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def submit(self, fn, *args) -> Future:
+        if self.workers <= 0:
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password hashing capacity exhausted, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self.submit(bcrypt_hash, password, settings.BCRYPT_ROUNDS).result()
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self.submit(bcrypt_verify, password, hashed_password).result()
+
+    async def _run_async(self, fn, *args):
+        with metrics.phase("password_hash"):
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(bcrypt_hash, password, settings.BCRYPT_ROUNDS)
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        return await self._run_async(bcrypt_verify, password, hashed_password)
+
+    async def hash_many_async(self, passwords: list) -> list:
+        """
+        Hash a batch in parallel, split into one job per worker so a bulk
+        import occupies at most `workers` slots instead of one per password.
+        """
+        if not passwords:
+            return []
+        with metrics.phase("password_hash"):
+            if self.workers <= 0:
+                return await run_in_threadpool(bcrypt_hash_many, passwords, settings.BCRYPT_ROUNDS)
+
+            size = -(-len(passwords) // self.workers)
+            futures = [
+                asyncio.wrap_future(self.submit(bcrypt_hash_many, passwords[start:start + size], settings.BCRYPT_ROUNDS))
+                for start in range(0, len(passwords), size)
+            ]
+            return [hashed for chunk in await asyncio.gather(*futures) for hashed in chunk]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Built on first use, so importing the routers reads no settings.
+# The module attribute password_pool remains available through __getattr__.
+
+@lru_cache
+def get_password_pool() -> PasswordPool:
+    return PasswordPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_DEPTH)
+
+def __getattr__(name: str):
+    if name == "password_pool":
+        return get_password_pool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
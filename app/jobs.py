@@ -0,0 +1,72 @@
+"""
+Background jobs for operations too large to finish within a request.
+
+A job is a row in the jobs table, created by the request that accepts the work
+(which answers 202 with the job id) and updated by the worker thread that
+runs it, so GET /jobs/{id} can report progress from any worker process.
+Jobs run in the threadpool of the process that accepted them; a job whose
+process dies stays "running" and can be retried with the original request,
+since the operations built on this are safe to repeat.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_running = set()
+
+def create(db: Session, kind: str, target_id: Optional[int] = None, total: Optional[int] = None,
+           created_by: Optional[int] = None) -> Job:
+    job = Job(id=str(uuid.uuid4()), kind=kind, target_id=target_id, total=total, status=PENDING,
+              processed=0, created_by=created_by)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def find_active(db: Session, kind: str, target_id: int) -> Optional[Job]:
+    """The pending or running job of kind for target_id, if there is one."""
+    return db.scalars(
+        select(Job).where(Job.kind == kind, Job.target_id == target_id, Job.status.in_((PENDING, RUNNING)))
+        .order_by(Job.created_at.desc()).limit(1)
+    ).first()
+
+def _run(session_factory, job_id: str, fn, args):
+    """fn(db, progress, *args) does the work with its own session; progress(n) records n items done."""
+    with session_factory() as db:
+        job = db.get(Job, job_id)
+        job.status = RUNNING
+        db.commit()
+
+        def progress(processed: int):
+            job.processed = processed
+            db.commit()
+
+        try:
+            fn(db, progress, *args)
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job_id, job.kind)
+            db.rollback()
+            job.status, job.error = FAILED, str(exc)[:500]
+        else:
+            job.status = SUCCEEDED
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+def start(session_factory, job: Job, fn, *args):
+    """Run fn in the threadpool without waiting for it; the task is kept referenced until done."""
+    task = asyncio.get_running_loop().create_task(run_in_threadpool(_run, session_factory, job.id, fn, args))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
@@ -1,34 +1,109 @@
+import importlib
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import users, projects, tasks, dashboard, auth
-
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title="Project Management Tool",
-    description="A simple project management tool for managing projects, tasks, and teams",
-    version="1.0.0"
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(projects.router)
-app.include_router(tasks.router)
-app.include_router(dashboard.router)
-
-@app.get("/")
-def root():
-    return {
-        "message": "Welcome to Project Management Tool API",
-        "docs": "/docs",
-        "redoc": "/redoc"
-    }
+from starlette.concurrency import run_in_threadpool
+from app import database
+from app.config import settings
+from app.metrics import MetricsMiddleware
+from app.query_stats import QUERY_COUNT_HEADER, QueryStatsMiddleware
+from app.replicas import ReadYourWritesMiddleware
+from app.pagination import NEXT_CURSOR_HEADER
+
+ROUTERS = ("auth", "users", "projects", "tasks", "dashboard", "admin", "events", "search", "jobs")
+
+def setup_database():
+    """Apply pending migrations, build the dashboard counters if they are missing and set up any shards."""
+    from app import counters, migrations, sharding
+
+    migrations.upgrade(database.get_engine())
+    with database.get_sessionmaker()() as db:
+        counters.ensure_initialized(db)
+    shard_set = sharding.get_shard_set()
+    if shard_set is not None:
+        sharding.setup_shards(database.get_sessionmaker(), shard_set)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app import hashing, overdue, replicas, sharding
+
+    # Runs per worker; with several workers, set DB_SETUP_ON_STARTUP=false and
+    # run `python -m app.migrations upgrade` once per deploy instead.
+    if settings.DB_SETUP_ON_STARTUP:
+        await run_in_threadpool(setup_database)
+    # Tasks live on the shards when there are any, so each shard gets its own sweeper
+    overdue_sweepers = [
+        overdue.Sweeper(factory, settings.OVERDUE_SWEEP_SECONDS)
+        for _, factory in sharding.sharded_databases(database.get_sessionmaker())
+    ]
+    app.state.overdue_sweepers = overdue_sweepers
+    for sweeper in overdue_sweepers:
+        sweeper.start()
+    replica_checker = replicas.HealthChecker(settings.REPLICA_HEALTH_CHECK_SECONDS)
+    replica_checker.start()
+    yield
+    await replica_checker.stop()
+    for sweeper in overdue_sweepers:
+        await sweeper.stop()
+    await replicas.dispose()
+    await sharding.dispose()
+    await database.dispose_engines()
+    # Stop the bcrypt worker processes; the pool starts new ones if the app is started again
+    if hashing.get_password_pool.cache_info().currsize:
+        hashing.get_password_pool().shutdown()
+
+def create_app() -> FastAPI:
+    """
+    Build the application and import its routers. Nothing here touches the database:
+    engines are created on first use and the schema is set up by the lifespan, once
+    the server starts. Run a worker per process with `uvicorn --factory app.main:create_app`.
+    """
+    application = FastAPI(
+        title="Project Management Tool",
+        description="A simple project management tool for managing projects, tasks, and teams",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, QUERY_COUNT_HEADER, "Server-Timing"],
+    )
+    application.add_middleware(QueryStatsMiddleware)
+    application.add_middleware(ReadYourWritesMiddleware)
+
+    routers = ROUTERS
+    if settings.METRICS_ENABLED:
+        # Added last, so it is the outermost middleware and times everything below it
+        application.add_middleware(MetricsMiddleware)
+        routers += ("metrics",)
+
+    for name in routers:
+        application.include_router(importlib.import_module(f"app.routers.{name}").router)
+
+    @application.get("/")
+    async def root():
+        return {
+            "message": "Welcome to Project Management Tool API",
+            "docs": "/docs",
+            "redoc": "/redoc"
+        }
+
+    return application
+
+@lru_cache
+def get_app() -> FastAPI:
+    return create_app()
+
+# `app` is built on first access rather than at import, so importing this module
+# (the --factory workers, scripts, test collection) imports no routers; the
+# routers are registered when `uvicorn app.main:app` or a test asks for the app.
+def __getattr__(name: str):
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,234 @@
+"""
+Request metrics in the Prometheus text exposition format.
+
+MetricsMiddleware times every HTTP request and records it by method, route
+template and status. Inside a request, add_phase() attributes time to a
+phase (auth, db, password_hash, serialization); run_db, the token check and
+the password pool call it. Serialization of response_model endpoints is the
+time between the endpoint returning and the response starting, which
+TimedRoute marks.
+
+Metrics are plain in-process counters behind a lock per metric, so each
+worker process exposes its own; scrape every worker, or aggregate them with
+the Prometheus server.
+"""
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from fastapi.routing import APIRoute
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help, self.label_names = name, help_text, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _labels(self.label_names, labels), value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names, self.buckets = name, help_text, labels, buckets
+        # labels -> [count per bucket (last one is +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        names = self.label_names + ("le",)
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", _labels(names, labels + (le,)), cumulative
+            yield f"{self.name}_sum", _labels(self.label_names, labels), total
+            yield f"{self.name}_count", _labels(self.label_names, labels), cumulative
+
+requests_in_flight = Gauge(
+    "projecthub_http_requests_in_flight", "HTTP requests being handled", ("method",))
+request_duration = Histogram(
+    "projecthub_http_request_duration_seconds", "HTTP request latency until the response started",
+    ("method", "route", "status"))
+request_exceptions = Counter(
+    "projecthub_http_request_exceptions_total", "Requests that ended in an unhandled exception",
+    ("method", "route", "exception"))
+phase_duration = Histogram(
+    "projecthub_http_request_phase_seconds", "Time spent in each phase of a request",
+    ("route", "phase"))
+
+REGISTRY = [requests_in_flight, request_duration, request_exceptions, phase_duration]
+
+class RequestTimer:
+    __slots__ = ("phases", "endpoint_done")
+
+    def __init__(self):
+        self.phases = {}
+        self.endpoint_done = None
+
+_current: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+
+def add_phase(phase: str, seconds: float):
+    """Attribute seconds to phase in the current request; a no-op outside requests."""
+    timer = _current.get()
+    if timer is not None:
+        timer.phases[phase] = timer.phases.get(phase, 0.0) + seconds
+
+@contextmanager
+def phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(name, time.perf_counter() - started)
+
+def _timed_endpoint(endpoint):
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        result = await endpoint(*args, **kwargs)
+        # Only returned results are serialized; raised errors go to the exception handlers
+        timer = _current.get()
+        if timer is not None:
+            timer.endpoint_done = time.perf_counter()
+        return result
+    return timed
+
+class TimedRoute(APIRoute):
+    """Marks when the endpoint returns, so the middleware can time FastAPI's response serialization."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: no request/response objects are built on the hot path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        timer = RequestTimer()
+        token = _current.set(timer)
+        started = time.perf_counter()
+        status_code, responded = 500, None
+
+        async def send_wrapper(message):
+            nonlocal status_code, responded
+            if message["type"] == "http.response.start":
+                status_code, responded = message["status"], time.perf_counter()
+            await send(message)
+
+        requests_in_flight.inc((method,))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            request_exceptions.inc((method, _route(scope), type(exc).__name__))
+            raise
+        finally:
+            requests_in_flight.dec((method,))
+            _current.reset(token)
+            route = _route(scope)
+            finished = responded or time.perf_counter()
+            request_duration.observe((method, route, str(status_code)), finished - started)
+            if timer.endpoint_done is not None and responded is not None:
+                serialized = max(responded - timer.endpoint_done, 0.0)
+                timer.phases["serialization"] = timer.phases.get("serialization", 0.0) + serialized
+            for name, seconds in timer.phases.items():
+                phase_duration.observe((route, name), seconds)
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+def _pool_samples():
+    """Connection and password pool state, read at scrape time."""
+    from app import database
+    from app.hashing import get_password_pool
+    from app.pool_metrics import pool_status
+    from app.sharding import get_shard_set
+
+    engines = [("primary", database.get_engine())]
+    if database.get_async_engine() is not None:
+        engines.append(("primary_async", database.get_async_engine()))
+    shard_set = get_shard_set()
+    for shard in shard_set.shards if shard_set is not None else []:
+        engines.append((f"shard{shard.index}", shard.engine))
+        if shard.async_engine is not None:
+            engines.append((f"shard{shard.index}_async", shard.async_engine))
+    for name, engine in engines:
+        status = pool_status(engine.pool)
+        labels = _labels(("pool",), (name,))
+        for key in ("checked_out", "idle", "overflow"):
+            if key in status:
+                yield "gauge", f"projecthub_db_pool_{key}", labels, status[key]
+        yield "counter", "projecthub_db_pool_checkout_timeouts_total", labels, status["timeouts"]
+        yield "counter", "projecthub_db_pool_checkout_wait_seconds_total", labels, status["wait_seconds_total"]
+
+    stats = get_password_pool().stats()
+    yield "gauge", "projecthub_password_pool_in_flight", "", stats["in_flight"]
+    yield "counter", "projecthub_password_pool_rejected_total", "", stats["rejected"]
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(f"{name}{labels} {value}" for name, labels, value in metric.samples())
+    # Samples of one metric must be contiguous; pools are listed engine by engine
+    families = {}
+    for kind, name, labels, value in _pool_samples():
+        families.setdefault((name, kind), []).append(f"{name}{labels} {value}")
+    for (name, kind), samples in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,194 @@
+"""
+Versioned schema migrations.
+
+Each migration is a function registered with @migration(version, description)
+that receives a Connection inside its own transaction. Applied versions are
+recorded in the schema_migrations table, so every migration runs once per
+database. Migrations must be idempotent with respect to the current models:
+on a fresh database the baseline already creates tables from app.models, and
+later steps only fill in what is missing on databases created before them.
+
+    python -m app.migrations upgrade    # apply pending migrations
+    python -m app.migrations current    # show applied versions
+"""
+import sys
+from datetime import datetime
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, and_, case, false, func, inspect, select, text, true, update
+)
+from sqlalchemy.schema import CreateColumn
+from app.database import Base
+from app import models, overdue, search
+
+_version_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _version_metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+def migration(version: int, description: str):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return fn
+    return register
+
+def _add_missing_column(connection, table: Table, name: str):
+    if name not in {column["name"] for column in inspect(connection).get_columns(table.name)}:
+        ddl = CreateColumn(table.c[name]).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+def _create_missing_indexes(connection, table: Table, names):
+    existing = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in names and index.name not in existing:
+            index.create(connection)
+
+@migration(1, "Baseline schema")
+def _baseline(connection):
+    tables = ["users", "projects", "tasks", "project_members", "dashboard_counters"]
+    Base.metadata.create_all(connection, tables=[Base.metadata.tables[name] for name in tables])
+
+@migration(2, "Composite indexes for task filters and project_members primary key")
+def _query_indexes(connection):
+    _create_missing_indexes(connection, models.Task.__table__, {
+        "ix_tasks_project_id_status",
+        "ix_tasks_assigned_to_status",
+        "ix_tasks_status_deadline",
+        "ix_tasks_updated_at",
+    })
+    _create_missing_indexes(connection, models.Project.__table__, {"ix_projects_updated_at"})
+
+    if inspect(connection).get_pk_constraint("project_members")["constrained_columns"]:
+        return
+
+    # Adding a primary key needs a table rebuild on SQLite; do the same on every
+    # backend and drop duplicate or half-empty association rows on the way.
+    scratch = MetaData()
+    models.User.__table__.to_metadata(scratch)
+    models.Project.__table__.to_metadata(scratch)
+    rebuilt = models.project_members.to_metadata(scratch, name="project_members_new")
+    rebuilt.create(connection)
+    connection.execute(text(
+        "INSERT INTO project_members_new (project_id, user_id) "
+        "SELECT DISTINCT project_id, user_id FROM project_members "
+        "WHERE project_id IS NOT NULL AND user_id IS NOT NULL"
+    ))
+    connection.execute(text("DROP TABLE project_members"))
+    connection.execute(text("ALTER TABLE project_members_new RENAME TO project_members"))
+
+@migration(3, "Tombstones for the changes feeds")
+def _tombstones(connection):
+    models.Tombstone.__table__.create(connection, checkfirst=True)
+
+@migration(4, "Full-text search indexes (MySQL FULLTEXT, SQLite FTS5)")
+def _search_indexes(connection):
+    search.install(connection)
+
+@migration(5, "Overdue flag, overdue counters and deadline indexes")
+def _overdue_tracking(connection):
+    tasks, counters = models.Task.__table__, models.DashboardCounter.__table__
+    _add_missing_column(connection, tasks, "is_overdue")
+    _add_missing_column(connection, counters, "overdue_tasks")
+    _create_missing_indexes(connection, tasks, {"ix_tasks_is_overdue_status_deadline", "ix_tasks_assigned_to_deadline"})
+
+    now = datetime.utcnow()
+    connection.execute(update(tasks).values(is_overdue=case(
+        (and_(tasks.c.deadline < now, tasks.c.status.in_(overdue.OPEN_STATUSES)), true()), else_=false()
+    )))
+    overdue_in = select(func.count()).where(tasks.c.is_overdue == true())
+    connection.execute(update(counters).where(counters.c.project_id == 0).values(
+        overdue_tasks=overdue_in.scalar_subquery()
+    ))
+    connection.execute(update(counters).where(counters.c.project_id != 0).values(
+        overdue_tasks=overdue_in.where(tasks.c.project_id == counters.c.project_id).scalar_subquery()
+    ))
+
+@migration(6, "Background jobs")
+def _jobs(connection):
+    models.Job.__table__.create(connection, checkfirst=True)
+
+@migration(7, "Shard directory and id sequences")
+def _shard_directory(connection):
+    models.ProjectShard.__table__.create(connection, checkfirst=True)
+    models.IdSequence.__table__.create(connection, checkfirst=True)
+
+def widen_timestamps(connection):
+    """Give updated_at its microseconds on MySQL tables created with a whole-second DATETIME."""
+    if connection.dialect.name != "mysql":
+        return
+    for table in (models.Project.__table__, models.Task.__table__):
+        columns = {column["name"]: column["type"] for column in inspect(connection).get_columns(table.name)}
+        if getattr(columns["updated_at"], "fsp", None) != 6:
+            ddl = table.c.updated_at.type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} MODIFY updated_at {ddl} NULL"))
+
+@migration(8, "Microsecond updated_at on MySQL, for ETags of writes within one second")
+def _timestamp_precision(connection):
+    widen_timestamps(connection)
+
+def replace_overdue_index(connection):
+    """
+    Swap (is_overdue, deadline) for (is_overdue, status, deadline): Done tasks are never
+    flagged, so without status the unflagged past-deadline range held every finished task.
+    """
+    existing = {index["name"] for index in inspect(connection).get_indexes("tasks")}
+    if "ix_tasks_is_overdue_deadline" in existing:
+        on_table = " ON tasks" if connection.dialect.name == "mysql" else ""
+        connection.execute(text(f"DROP INDEX ix_tasks_is_overdue_deadline{on_table}"))
+    _create_missing_indexes(connection, models.Task.__table__, {"ix_tasks_is_overdue_status_deadline"})
+
+@migration(9, "Overdue index on (is_overdue, status, deadline)")
+def _overdue_status_index(connection):
+    replace_overdue_index(connection)
+
+@migration(10, "Id blocks, for routing a task to its project's shard")
+def _id_blocks(connection):
+    models.IdBlock.__table__.create(connection, checkfirst=True)
+
+def add_project_deleting(connection):
+    _add_missing_column(connection, models.Project.__table__, "deleting")
+
+@migration(11, "Flag projects being deleted by a background job")
+def _project_deleting(connection):
+    add_project_deleting(connection)
+
+def applied_versions(connection) -> set:
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+def upgrade(engine):
+    """Apply every pending migration in version order, one transaction per migration."""
+    with engine.begin() as connection:
+        applied = applied_versions(connection)
+
+    for version, description, fn in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as connection:
+            fn(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "upgrade":
+        upgrade(engine)
+        print(f"Schema is at version {MIGRATIONS[-1][0]}")
+    elif command == "current":
+        with engine.begin() as connection:
+            applied = applied_versions(connection)
+        for version, description, _ in MIGRATIONS:
+            print(f"{version:>4}  {'applied' if version in applied else 'pending':<8} {description}")
+    else:
+        print("Usage: python -m app.migrations [upgrade|current]")
+        sys.exit(2)
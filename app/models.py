@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Table
+from sqlalchemy import Boolean, Column, Integer, String, Enum, ForeignKey, DateTime, Table, Index, false
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 import enum
 
+# MySQL's DATETIME keeps whole seconds unless given a precision. ETags and
+# changes cursors come from updated_at, so two writes in one second must differ.
+Timestamp = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
 class UserRole(str, enum.Enum):
     ADMIN = "Admin"
     MANAGER = "Manager"
@@ -17,8 +22,9 @@ class TaskStatus(str, enum.Enum):
 project_members = Table(
     'project_members',
     Base.metadata,
-    Column('project_id', Integer, ForeignKey('projects.id')),
-    Column('user_id', Integer, ForeignKey('users.id'))
+    Column('project_id', Integer, ForeignKey('projects.id'), primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Index('ix_project_members_user_id', 'user_id')
 )
 
 class User(Base):
@@ -41,7 +47,13 @@ class Project(Base):
     name = Column(String(200), nullable=False)
     description = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(Timestamp, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set while a background job deletes the project; new tasks are refused from then on
+    deleting = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (
+        Index("ix_projects_updated_at", "updated_at", "id"),
+    )
 
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
     team_members = relationship("User", secondary=project_members, back_populates="projects")
@@ -54,11 +66,110 @@ class Task(Base):
     description = Column(String(500))
     status = Column(Enum(TaskStatus), default=TaskStatus.TODO)
     deadline = Column(DateTime, nullable=True)
+    # Deadline passed and not Done; maintained by the write paths and app.overdue's sweeper
+    is_overdue = Column(Boolean, nullable=False, default=False, server_default=false())
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(Timestamp, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
 
+    __table_args__ = (
+        Index("ix_tasks_project_id_status", "project_id", "status"),
+        Index("ix_tasks_assigned_to_status", "assigned_to", "status"),
+        Index("ix_tasks_status_deadline", "status", "deadline"),
+        Index("ix_tasks_updated_at", "updated_at", "id"),
+        Index("ix_tasks_is_overdue_status_deadline", "is_overdue", "status", "deadline"),
+        Index("ix_tasks_assigned_to_deadline", "assigned_to", "deadline"),
+    )
+
     project = relationship("Project", back_populates="tasks")
     assignee = relationship("User", back_populates="assigned_tasks")
+
+class DashboardCounter(Base):
+    """
+    Denormalized task/project counts, maintained in the same transaction as task and project writes.
+    project_id 0 holds the global totals; every other row holds the counts for one project.
+    """
+    __tablename__ = "dashboard_counters"
+
+    project_id = Column(Integer, primary_key=True, autoincrement=False)
+    total_projects = Column(Integer, nullable=False, default=0)
+    total_tasks = Column(Integer, nullable=False, default=0)
+    todo_tasks = Column(Integer, nullable=False, default=0)
+    in_progress_tasks = Column(Integer, nullable=False, default=0)
+    done_tasks = Column(Integer, nullable=False, default=0)
+    overdue_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+
+class Tombstone(Base):
+    """
+    Record of a deleted task or project, so /tasks/changes and /projects/changes can report deletes.
+    project_id and assigned_to keep the deleted task's scope for the same visibility filters as live rows.
+    """
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=True)
+    assigned_to = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_tombstones_entity_deleted_at", "entity", "deleted_at", "id"),
+    )
+
+class Job(Base):
+    """
+    A long-running operation (e.g. deleting a very large project) run in the background.
+    Stored in the database so its progress can be polled from any worker.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)
+    kind = Column(String(50), nullable=False)
+    target_id = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False, default="pending")
+    processed = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    error = Column(String(500), nullable=True)
+    created_by = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class ProjectShard(Base):
+    """
+    Shard directory entry: which shard database holds a project, its tasks and memberships.
+    Inserting an entry allocates the project's id, so ids stay unique across shards.
+    move_shard is set while app.sharding moves the project: the target until the entry
+    flips to it, then the source until the source's copy is deleted.
+    """
+    __tablename__ = "project_shards"
+
+    project_id = Column(Integer, primary_key=True)
+    shard = Column(Integer, nullable=False)
+    move_shard = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ix_project_shards_shard", "shard"),
+        Index("ix_project_shards_move_shard", "move_shard"),
+    )
+
+class IdSequence(Base):
+    """Next free id of a sharded table whose rows are spread over several databases."""
+    __tablename__ = "id_sequences"
+
+    name = Column(String(50), primary_key=True)
+    next_id = Column(Integer, nullable=False)
+
+class IdBlock(Base):
+    """
+    A block of ids reserved from id_sequences for one project's rows, so an id
+    leads to its project's directory entry without asking every shard.
+    """
+    __tablename__ = "id_blocks"
+
+    name = Column(String(50), primary_key=True)
+    first_id = Column(Integer, primary_key=True, autoincrement=False)
+    size = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=False)
@@ -0,0 +1,142 @@
+"""
+Precomputed overdue tracking.
+
+A task is overdue when its deadline has passed and it is not Done. Tasks carry
+that as is_overdue and dashboard_counters.overdue_tasks counts it per project,
+so the dashboard reads a counter instead of scanning tasks.
+
+Write paths set the flag for the deadline and status they store. Deadlines that
+pass afterwards are picked up by the sweeper, a background task that sleeps
+until the next pending deadline (at most OVERDUE_SWEEP_SECONDS) and flags every
+task whose deadline has passed. Its queries walk the (is_overdue, status,
+deadline) index for the open statuses only: Done tasks are never flagged, so
+they would otherwise fill the unflagged, past-deadline range. The queries cost
+the number of open tasks they return, not the size of the table or the number
+of finished tasks.
+Between sweeps overdue_count() adds the tasks that are past due but not flagged.
+With DATABASE_SHARD_URLS set, the sweeper and the command cover every shard.
+
+    python -m app.overdue sweep
+"""
+import asyncio
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import false, func, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app import counters
+from app.models import Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = (TaskStatus.TODO, TaskStatus.IN_PROGRESS)
+SWEEP_BATCH_SIZE = 500
+
+def is_overdue(deadline: Optional[datetime], status, now: Optional[datetime] = None) -> bool:
+    if deadline is None or TaskStatus(status or TaskStatus.TODO) == TaskStatus.DONE:
+        return False
+    return deadline < (now or datetime.utcnow())
+
+def _past_due_unflagged(now: datetime) -> list:
+    return [Task.is_overdue == false(), Task.deadline < now, Task.status.in_(OPEN_STATUSES)]
+
+def overdue_count(db: Session, counted: int, now: Optional[datetime] = None, exclude_projects=()) -> int:
+    """
+    The exact overdue total: the counter plus tasks whose deadline passed since the last sweep.
+    Tasks of exclude_projects are not looked up; counted must leave them out too.
+    """
+    stmt = select(func.count()).select_from(Task).where(*_past_due_unflagged(now or datetime.utcnow()))
+    if exclude_projects:
+        stmt = stmt.where(Task.project_id.not_in(exclude_projects))
+    return counted + db.scalar(stmt)
+
+def next_deadline(db: Session, now: Optional[datetime] = None) -> Optional[datetime]:
+    """The earliest deadline the sweeper has yet to act on."""
+    return db.scalar(
+        select(func.min(Task.deadline)).where(
+            Task.is_overdue == false(), Task.deadline >= (now or datetime.utcnow()), Task.status.in_(OPEN_STATUSES)
+        )
+    )
+
+def sweep(db: Session, now: Optional[datetime] = None) -> int:
+    """Flag every open task whose deadline has passed; returns how many were flagged."""
+    now = now or datetime.utcnow()
+    pending = defaultdict(list)
+    for task_id, project_id in db.execute(select(Task.id, Task.project_id).where(*_past_due_unflagged(now))):
+        pending[project_id].append(task_id)
+
+    flipped = {}
+    for project_id, task_ids in pending.items():
+        for start in range(0, len(task_ids), SWEEP_BATCH_SIZE):
+            # The guard is repeated so a task changed since the SELECT, or flagged by
+            # another worker's sweep, is neither flagged nor counted twice.
+            # updated_at is kept: the flag is not part of any representation.
+            stmt = (
+                update(Task)
+                .where(Task.id.in_(task_ids[start:start + SWEEP_BATCH_SIZE]), *_past_due_unflagged(now))
+                .values(is_overdue=True, updated_at=Task.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            count = db.execute(stmt).rowcount
+            if count:
+                flipped[project_id] = flipped.get(project_id, 0) + count
+    if flipped:
+        counters.overdue_swept(db, flipped)
+    db.commit()
+    return sum(flipped.values())
+
+class Sweeper:
+    """Runs sweep() whenever a deadline passes, waking at least every interval seconds."""
+
+    def __init__(self, session_factory, interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task = None
+
+    def _run_once(self) -> float:
+        """Sweep, then return how long to sleep until the next deadline."""
+        with self.session_factory() as db:
+            flagged = sweep(db)
+            if flagged:
+                logger.info("Flagged %d overdue tasks", flagged)
+            upcoming = next_deadline(db)
+        if upcoming is None:
+            return self.interval
+        return min(self.interval, max((upcoming - datetime.utcnow()).total_seconds(), 0) + 0.01)
+
+    async def _loop(self):
+        while True:
+            try:
+                delay = await run_in_threadpool(self._run_once)
+            except Exception:
+                logger.exception("Overdue sweep failed")
+                delay = self.interval
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.sharding import sharded_databases
+
+    if sys.argv[1:] != ["sweep"]:
+        print("Usage: python -m app.overdue sweep")
+        sys.exit(2)
+
+    for name, session_factory in sharded_databases(SessionLocal):
+        with session_factory() as session:
+            print(f"Flagged {sweep(session)} overdue tasks on {name}")
@@ -0,0 +1,176 @@
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.projection import is_projection
+from app.serialization import dumps_one
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def encode_cursor(sort: str, row) -> str:
+    """Encode the keyset position of the last row of a page as an opaque cursor."""
+    value = getattr(row, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"sort": sort, "value": value, "id": row.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> dict:
+    """Decode a cursor produced by encode_cursor, rejecting tampered or mismatched ones."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["sort"] != sort or not isinstance(payload["id"], int):
+            raise ValueError
+        if sort == "updated_at":
+            payload["value"] = datetime.fromisoformat(payload["value"])
+    except (ValueError, KeyError, TypeError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+def apply_keyset(stmt, model, cursor: Optional[str] = None, sort: str = "id"):
+    """
+    Order the select by (sort, id) and skip everything up to and including the cursor.
+    Uses an OR-expanded comparison rather than a row-value tuple so the
+    leading index column is usable on both MySQL and SQLite.
+    """
+    key_column = getattr(model, sort)
+    if sort == "id":
+        stmt = stmt.order_by(model.id)
+    else:
+        stmt = stmt.order_by(key_column, model.id)
+
+    if cursor:
+        position = decode_cursor(cursor, sort)
+        if sort == "id":
+            stmt = stmt.where(model.id > position["id"])
+        else:
+            stmt = stmt.where(or_(
+                key_column > position["value"],
+                and_(key_column == position["value"], model.id > position["id"])
+            ))
+    return stmt
+
+def page_statement(stmt, model, limit: Optional[int] = None, cursor: Optional[str] = None, sort: str = "id"):
+    """The exact select paginate() runs for a page, including its look-ahead row."""
+    stmt = apply_keyset(stmt, model, cursor, sort)
+    if limit is None and cursor is None:
+        return stmt
+    return stmt.limit((limit or DEFAULT_PAGE_SIZE) + 1)
+
+def _fetch(db: Session, stmt):
+    return db.execute(stmt) if is_projection(stmt) else db.scalars(stmt)
+
+def paginate(db: Session, stmt, model, limit: Optional[int] = None, cursor: Optional[str] = None, sort: str = "id"):
+    """
+    Return (rows, next_cursor) for one keyset page: entities for select(model),
+    Row tuples for a column projection (which must include id and the sort column).
+    Without limit and cursor the full, ordered result is returned for backwards compatibility.
+    """
+    stmt = page_statement(stmt, model, limit, cursor, sort)
+    if limit is None and cursor is None:
+        return _fetch(db, stmt).all(), None
+
+    page_size = limit or DEFAULT_PAGE_SIZE
+    rows = _fetch(db, stmt).all()
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(sort, rows[-1])
+    return rows, None
+
+def merge_pages(pages: list, limit: Optional[int] = None, cursor: Optional[str] = None, sort: str = "id"):
+    """
+    Merge the (rows, next_cursor) pages several databases returned for the same
+    paginate() call into the page a single database holding all rows would return.
+    """
+    if len(pages) == 1:
+        return pages[0]
+    if sort == "id":
+        key = lambda row: row.id
+    else:
+        key = lambda row: (getattr(row, sort), row.id)
+    rows = list(heapq.merge(*(page_rows for page_rows, _ in pages), key=key))
+    if limit is None and cursor is None:
+        return rows, None
+
+    page_size = limit or DEFAULT_PAGE_SIZE
+    more = len(rows) > page_size or any(next_cursor for _, next_cursor in pages)
+    rows = rows[:page_size]
+    return rows, encode_cursor(sort, rows[-1]) if more and rows else None
+
+def _encoder(schema, include: Optional[set] = None):
+    def encode(row):
+        if settings.FAST_JSON_RESPONSES:
+            return dumps_one(row, schema, include) + b"\n"
+        return schema.model_validate(row).model_dump_json(include=include) + "\n"
+    return encode
+
+def stream_ndjson(
+    db,
+    stmt,
+    model,
+    schema,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    include: Optional[set] = None
+):
+    """
+    Stream select results as newline-delimited JSON, one schema-serialized row per line
+    (restricted to the include fields when given).
+    Rows are fetched in batches with a server-side cursor so memory stays flat
+    regardless of the size of the result.
+    """
+    stmt = apply_keyset(stmt, model, cursor, sort)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    stmt = stmt.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+    encode = _encoder(schema, include)
+
+    if isinstance(db, AsyncSession):
+        async def generate():
+            result = await (db.stream(stmt) if is_projection(stmt) else db.stream_scalars(stmt))
+            async for row in result:
+                yield encode(row)
+    else:
+        def generate():
+            for row in _fetch(db, stmt):
+                yield encode(row)
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+def stream_pages_ndjson(fetch_page, schema, limit: Optional[int] = None, cursor: Optional[str] = None,
+                        include: Optional[set] = None):
+    """
+    Stream newline-delimited JSON from await fetch_page(cursor, size) -> (rows, next_cursor),
+    STREAM_BATCH_SIZE rows at a time; for results merged from several databases, which
+    cannot share one server-side cursor.
+    """
+    encode = _encoder(schema, include)
+
+    async def generate():
+        remaining, position = limit, cursor
+        while remaining is None or remaining > 0:
+            size = STREAM_BATCH_SIZE if remaining is None else min(remaining, STREAM_BATCH_SIZE)
+            rows, position = await fetch_page(position, size)
+            for row in rows:
+                yield encode(row)
+            if remaining is not None:
+                remaining -= len(rows)
+            if position is None:
+                break
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,80 @@
+"""
+Connection pool classes that record checkout wait times.
+
+QueuePool._do_get is where a checkout blocks waiting for a free connection
+(or opens a new one), so timing it gives the wait a request paid before it
+could talk to the database.
+"""
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+class CheckoutStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.total_wait, 6),
+                "wait_seconds_avg": round(self.total_wait / attempts, 6) if attempts else 0.0,
+                "wait_seconds_max": round(self.max_wait, 6),
+            }
+
+class _InstrumentedMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.checkout_stats.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_status(pool) -> dict:
+    """Live occupancy of a pool plus checkout wait statistics when it is instrumented."""
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    stats = getattr(pool, "checkout_stats", None)
+    status.update(stats.snapshot() if stats else CheckoutStats().snapshot())
+    return status
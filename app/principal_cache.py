@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import event
+from app.config import settings
+from app.models import User, UserRole
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of the authenticated user, safe to share across requests and sessions."""
+    id: int
+    name: str
+    email: str
+    role: UserRole
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, name=user.name, email=user.email, role=user.role, created_at=user.created_at)
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of principals keyed by token subject, with a per-entry TTL.
+    Entries are dropped explicitly when the user is deleted or changes role; the TTL
+    bounds how long other worker processes can serve a stale principal.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[subject]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, subject: str, principal: Principal):
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+# Built on first use, like the database engines, so importing app.auth reads no settings.
+# The module attribute principal_cache remains available through __getattr__.
+
+@lru_cache
+def get_principal_cache() -> PrincipalCache:
+    return PrincipalCache(settings.PRINCIPAL_CACHE_MAX_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+def __getattr__(name: str):
+    if name == "principal_cache":
+        return get_principal_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@event.listens_for(User.role, "set")
+def _invalidate_on_role_change(user, value, oldvalue, initiator):
+    if user.email is not None and value != oldvalue:
+        get_principal_cache().invalidate(user.email)
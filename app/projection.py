@@ -0,0 +1,38 @@
+"""
+Column projections for the read-only list endpoints.
+
+A list response only shows the fields of its schema, so list endpoints select
+exactly those columns and work with plain Row tuples instead of ORM entities:
+no identity map, no attribute instrumentation, and no columns the response
+never returns (users' password_hash). Both the response_model path and the
+FAST_JSON_RESPONSES path read rows by attribute, so they serialize them like
+entities. Write endpoints keep loading entities.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from sqlalchemy import inspect, select
+
+@lru_cache(maxsize=None)
+def response_columns(model, schema) -> tuple:
+    """The model columns behind schema's fields, in schema order; relationships are left out."""
+    mapped = inspect(model).columns
+    return tuple(getattr(model, name) for name in schema.model_fields if name in mapped)
+
+def projection(model, schema):
+    """select() of just the columns schema needs, for use in place of select(model)."""
+    return select(*response_columns(model, schema))
+
+def is_projection(stmt) -> bool:
+    """Entity selects come back through scalars(), column projections as Row tuples."""
+    return len(stmt.column_descriptions) > 1
+
+@lru_cache(maxsize=None)
+def _row_type(fields: tuple):
+    return namedtuple("ProjectedRow", fields)
+
+def with_field(rows, name: str, values: dict, default=None) -> list:
+    """Copies of rows with one more field, name, looked up in values by row id."""
+    if not rows:
+        return []
+    row_type = _row_type(tuple(rows[0]._fields) + (name,))
+    return [row_type(*row, values.get(row.id, default)) for row in rows]
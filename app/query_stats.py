@@ -0,0 +1,126 @@
+"""
+Per-request SQL accounting.
+
+Engine events count every statement and its execution time into the tracker
+of the current request (a context variable, which run_db's threadpool and
+run_sync calls inherit). With SQL_DEBUG_HEADER enabled, responses carry the
+totals as `X-Query-Count: 3` and `Server-Timing: db;dur=1.84;desc="3 queries"`.
+Statements slower than SLOW_QUERY_MS are logged with the request path.
+
+query_budget() is the test-side counterpart: it collects statements from
+every thread while open and fails when more than the budget were issued.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+SLOWEST_KEPT = 5
+LOGGED_STATEMENT_LENGTH = 500
+
+class QueryStats:
+    def __init__(self, path: Optional[str] = None, keep_statements: bool = False):
+        self.path = path
+        self.count = 0
+        self.seconds = 0.0
+        # (seconds, statement) of the slowest statements, slowest first
+        self.slowest = []
+        self.statements = [] if keep_statements else None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if self.statements is not None:
+            self.statements.append(statement)
+        if len(self.slowest) < SLOWEST_KEPT or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_budgets = []
+_budgets_lock = threading.Lock()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # A connection runs one statement at a time, so one slot per connection is enough
+    conn.info["query_started"] = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _budgets:
+        with _budgets_lock:
+            for budget in _budgets:
+                budget.record(statement, elapsed)
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms)%s: %s", elapsed * 1000,
+            f" in {stats.path}" if stats is not None and stats.path else "",
+            " ".join(statement.split())[:LOGGED_STATEMENT_LENGTH],
+        )
+
+def _describe(count: int) -> str:
+    return f"{count} query" if count == 1 else f"{count} queries"
+
+class QueryStatsMiddleware:
+    """Tracks each HTTP request's statements and, when enabled, reports them in response headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope.get("path"))
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            # Streaming responses start before their body is read, so only earlier queries are counted
+            if message["type"] == "http.response.start" and settings.SQL_DEBUG_HEADER:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()),
+                    (b"server-timing", f'db;dur={stats.seconds * 1000:.3f};desc="{_describe(stats.count)}"'.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            if settings.SQL_DEBUG_HEADER and stats.slowest:
+                logger.debug("%s: %d queries in %.1f ms; slowest: %s", stats.path, stats.count, stats.seconds * 1000,
+                             "; ".join(f"{seconds * 1000:.1f} ms {' '.join(statement.split())[:120]}"
+                                       for seconds, statement in stats.slowest[:3]))
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Fail with the offending statements if more than max_queries are issued inside the block,
+    on any thread (TestClient runs the app on its own event loop thread).
+    """
+    stats = QueryStats(keep_statements=True)
+    with _budgets_lock:
+        _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        with _budgets_lock:
+            _budgets.remove(stats)
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {index + 1}. {' '.join(statement.split())[:200]}"
+                            for index, statement in enumerate(stats.statements))
+        raise AssertionError(f"{stats.count} queries issued, budget is {max_queries}:\n{listing}")
@@ -0,0 +1,269 @@
+"""
+Read replicas for GET handlers.
+
+With DATABASE_REPLICA_URLS set, handlers that depend on get_read_db read
+from the replicas in round-robin order; everything else, and every read when
+no replica is configured or healthy, uses the primary session from get_db.
+
+A replica leaves the rotation when its health check (SELECT 1 every
+REPLICA_HEALTH_CHECK_SECONDS) fails or when a statement on it hits a
+disconnect, and rejoins once a check succeeds again.
+
+Replicas lag behind the primary, so a client that just wrote reads from the
+primary for READ_YOUR_WRITES_SECONDS. ReadYourWritesMiddleware records a
+successful unsafe-method request against the client's bearer token in this
+worker, and in a cookie that any worker honours.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from http.cookies import SimpleCookie
+from typing import List, Optional
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.database import DBSession, engine_options, get_db, is_async_url, sync_url
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "read_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RECENT_WRITERS_MAX_SIZE = 10000
+
+class ReadOnlySession(Session):
+    """Session for replicas: flushing (any ORM write) raises instead of reaching the database."""
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _reject_flush(session, flush_context, instances):
+    raise RuntimeError("Replica sessions are read-only; use get_db for writes")
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.asynchronous = is_async_url(url)
+        if self.asynchronous:
+            self.engine = create_async_engine(url, **engine_options(url, asynchronous=True))
+            self.sessionmaker = async_sessionmaker(
+                self.engine, sync_session_class=ReadOnlySession, autoflush=False, expire_on_commit=False
+            )
+            sync_engine = self.engine.sync_engine
+        else:
+            self.engine = create_engine(sync_url(url), **engine_options(url))
+            self.sessionmaker = sessionmaker(class_=ReadOnlySession, autocommit=False, autoflush=False, bind=self.engine)
+            sync_engine = self.engine
+        self.healthy = True
+        self.last_error = None
+        event.listen(sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect:
+            self.mark_down(context.original_exception)
+
+    def mark_down(self, error):
+        if self.healthy:
+            logger.warning("Read replica %s is unavailable: %s", self.url_for_logs, error)
+        self.healthy, self.last_error = False, str(error)[:200]
+
+    @property
+    def url_for_logs(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+    async def check(self) -> bool:
+        """Ping the replica and update its health."""
+        try:
+            if self.asynchronous:
+                async with self.engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            else:
+                await run_in_threadpool(self._ping)
+        except Exception as exc:
+            self.mark_down(exc)
+            return False
+        if not self.healthy:
+            logger.info("Read replica %s is back", self.url_for_logs)
+        self.healthy, self.last_error = True, None
+        return True
+
+    def _ping(self):
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    async def dispose(self):
+        if self.asynchronous:
+            await self.engine.dispose()
+        else:
+            await run_in_threadpool(self.engine.dispose)
+
+class ReplicaSet:
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._turn = itertools.count()
+
+    def choose(self) -> Optional[Replica]:
+        """The next healthy replica in round-robin order, or None to use the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self):
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    def stats(self) -> list:
+        return [
+            {"url": replica.url_for_logs, "healthy": replica.healthy, "last_error": replica.last_error}
+            for replica in self.replicas
+        ]
+
+    async def dispose(self):
+        await asyncio.gather(*(replica.dispose() for replica in self.replicas))
+
+def replica_urls() -> List[str]:
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+@lru_cache
+def _replica_set(urls: tuple) -> Optional[ReplicaSet]:
+    return ReplicaSet(list(urls)) if urls else None
+
+def get_replica_set() -> Optional[ReplicaSet]:
+    return _replica_set(tuple(replica_urls()))
+
+class RecentWriters:
+    """Bounded map of client key -> monotonic time until which its reads go to the primary."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def wrote(self, key: str, window: float):
+        with self._lock:
+            self._entries[key] = time.monotonic() + window
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def is_sticky(self, key: str) -> bool:
+        with self._lock:
+            until = self._entries.get(key)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._entries[key]
+                return False
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+recent_writers = RecentWriters(RECENT_WRITERS_MAX_SIZE)
+
+def _client_key(headers) -> Optional[str]:
+    return headers.get("authorization") or None
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether this client wrote within the read-your-writes window."""
+    key = _client_key(request.headers)
+    if key is not None and recent_writers.is_sticky(key):
+        return True
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+async def get_read_db(request: Request, primary: DBSession = Depends(get_db)):
+    """
+    A read-only session on a replica, or the primary session when no replica is
+    configured or healthy, or the client wrote recently. Use for GET handlers only.
+    """
+    replica_set = get_replica_set()
+    replica = replica_set.choose() if replica_set is not None and not reads_from_primary(request) else None
+    if replica is None:
+        yield primary
+        return
+
+    if replica.asynchronous:
+        async with replica.sessionmaker() as db:
+            yield db
+        return
+
+    db = replica.sessionmaker()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+class ReadYourWritesMiddleware:
+    """Marks clients whose unsafe-method requests succeeded so their next reads use the primary."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or get_replica_set() is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.READ_YOUR_WRITES_SECONDS
+                key = _client_key({
+                    name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]
+                })
+                if key is not None:
+                    recent_writers.wrote(key, window)
+                cookie = SimpleCookie()
+                cookie[STICKY_COOKIE] = f"{time.time() + window:.3f}"
+                cookie[STICKY_COOKIE].update({"max-age": str(max(int(window), 1)), "path": "/", "httponly": True,
+                                              "samesite": "Lax"})
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie[STICKY_COOKIE].OutputString().encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+class HealthChecker:
+    """Checks every replica each interval seconds while the application runs."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            replica_set = get_replica_set()
+            if replica_set is not None:
+                try:
+                    await replica_set.check()
+                except Exception:
+                    logger.exception("Replica health check failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None and get_replica_set() is not None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+async def dispose():
+    if _replica_set.cache_info().currsize:
+        replica_set = get_replica_set()
+        if replica_set is not None:
+            await replica_set.dispose()
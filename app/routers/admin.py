@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends
+from app.auth import require_admin
+from app import database
+from app.events import get_hub
+from app.hashing import get_password_pool
+from app.pool_metrics import pool_status
+from app.principal_cache import get_principal_cache
+from app.replicas import get_replica_set
+from app.sharding import get_shard_set
+from app.metrics import TimedRoute
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)], route_class=TimedRoute)
+
+@router.get("/cache/principals")
+async def principal_cache_stats():
+    """Hit/miss counters and size of the authenticated-principal cache"""
+    return get_principal_cache().stats()
+
+@router.get("/password-pool")
+async def password_pool_stats():
+    """Size, in-flight jobs and rejections of the bcrypt worker pool"""
+    return get_password_pool().stats()
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """Checked-out, idle and overflow connections and checkout wait times per engine"""
+    pools = {"primary": pool_status(database.engine.pool)}
+    if database.async_engine is not None:
+        pools["primary_async"] = pool_status(database.async_engine.pool)
+    shard_set = get_shard_set()
+    for shard in shard_set.shards if shard_set is not None else []:
+        pools[f"shard{shard.index}"] = pool_status(shard.engine.pool)
+        if shard.async_engine is not None:
+            pools[f"shard{shard.index}_async"] = pool_status(shard.async_engine.pool)
+    return pools
+
+@router.get("/replicas")
+async def replica_stats():
+    """Health of each configured read replica; empty when reads go to the primary"""
+    replica_set = get_replica_set()
+    return replica_set.stats() if replica_set is not None else []
+
+@router.get("/events")
+async def event_hub_stats():
+    """Broker, live subscribers and delivery counters of the change-event hub"""
+    return get_hub().stats()
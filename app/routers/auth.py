@@ -2,31 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
-from app.database import get_db
+from app.database import DBSession, get_db, run_db
 from app.models import User, UserRole
 from app.schemas import UserCreate, UserResponse
-from app.auth import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.auth import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.hashing import get_password_pool, needs_rehash
+from app.metrics import TimedRoute
 from pydantic import BaseModel
 
-router = APIRouter(tags=["Authentication"])
+router = APIRouter(tags=["Authentication"], route_class=TimedRoute)
 
 class Token(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
 
-@router.post("/register", response_model=UserResponse, status_code=201)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    """
-    Public registration endpoint - Always creates Developer role users.
-    Only Admins can create Manager or Admin users via /users/ endpoint.
-    """
-    existing_user = db.query(User).filter(User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+def _email_registered(db: Session, email: str) -> bool:
+    return db.query(User.id).filter(User.email == email).first() is not None
 
-    # Force Developer role for public registration, ignore user.role
-    hashed_password = get_password_hash(user.password)
+def _create_developer(db: Session, user: UserCreate, hashed_password: str) -> User:
     db_user = User(
         name=user.name,
         email=user.email,
@@ -38,16 +32,43 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     db.refresh(db_user)
     return db_user
 
+@router.post("/register", response_model=UserResponse, status_code=201)
+async def register(user: UserCreate, db: DBSession = Depends(get_db)):
+    """
+    Public registration endpoint - Always creates Developer role users.
+    Only Admins can create Manager or Admin users via /users/ endpoint.
+    """
+    if await run_db(db, _email_registered, user.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    # Force Developer role for public registration, ignore user.role
+    hashed_password = await get_password_pool().hash_async(user.password)
+    return await run_db(db, _create_developer, user, hashed_password)
+
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _update_password_hash(db: Session, user: User, hashed_password: str) -> User:
+    user.password_hash = hashed_password
+    db.commit()
+    db.refresh(user)
+    return user
+
 @router.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: DBSession = Depends(get_db)):
+    user = await run_db(db, _find_user, form_data.username)
+    if not user or not await get_password_pool().verify_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Upgrade hashes made with a different cost factor while we have the plaintext
+    if needs_rehash(user.password_hash):
+        hashed_password = await get_password_pool().hash_async(form_data.password)
+        user = await run_db(db, _update_password_hash, user, hashed_password)
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -1,31 +1,57 @@
+import asyncio
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime
-from app.database import get_db
-from app.models import Project, Task, TaskStatus
+from app import counters, overdue
+from app.database import run_db
+from app.models import DashboardCounter
+from app.sharding import Shards, get_read_shards, moving_projects
 from app.schemas import DashboardResponse
+from app.metrics import TimedRoute
 
-router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"], route_class=TimedRoute)
 
-@router.get("/", response_model=DashboardResponse)
-def get_dashboard(db: Session = Depends(get_db)):
-    total_projects = db.query(Project).count()
-    total_tasks = db.query(Task).count()
-
-    tasks_by_status = {}
-    for status in TaskStatus:
-        count = db.query(Task).filter(Task.status == status).count()
-        tasks_by_status[status.value] = count
+def _dashboard(db: Session, copies: tuple = ()) -> dict:
+    """The dashboard of one database; copies are projects whose rows here are the copy a move lists elsewhere."""
+    global_counter = counters.get_global_counters(db)
+    counted = {column: getattr(global_counter, column) for column in counters.COUNTER_COLUMNS}
+    if copies:
+        for counter in db.scalars(select(DashboardCounter).where(DashboardCounter.project_id.in_(copies))):
+            counted["total_projects"] -= 1
+            for column in counters.COUNTER_COLUMNS[1:]:
+                counted[column] -= getattr(counter, column)
+    tasks_by_status = {status.value: counted[column] for status, column in counters.STATUS_COLUMNS.items()}
 
-    overdue_tasks = db.query(Task).filter(
-        Task.deadline < datetime.utcnow(),
-        Task.status != TaskStatus.DONE
-    ).count()
+    # Flagged tasks are counted; only those past due since the last sweep are looked up
+    overdue_tasks = overdue.overdue_count(db, counted["overdue_tasks"], exclude_projects=copies)
 
     return {
-        "total_projects": total_projects,
-        "total_tasks": total_tasks,
+        "total_projects": counted["total_projects"],
+        "total_tasks": counted["total_tasks"],
         "tasks_by_status": tasks_by_status,
         "overdue_tasks": overdue_tasks
     }
+
+def _sum_dashboards(dashboards: list) -> dict:
+    if len(dashboards) == 1:
+        return dashboards[0]
+    total = {"total_projects": 0, "total_tasks": 0, "tasks_by_status": {}, "overdue_tasks": 0}
+    for dashboard in dashboards:
+        for key in ("total_projects", "total_tasks", "overdue_tasks"):
+            total[key] += dashboard[key]
+        for status, count in dashboard["tasks_by_status"].items():
+            total["tasks_by_status"][status] = total["tasks_by_status"].get(status, 0) + count
+    return total
+
+@router.get("/", response_model=DashboardResponse)
+async def get_dashboard(shards: Shards = Depends(get_read_shards)):
+    """
+    Counters of every shard, summed. A project being moved has rows on two shards
+    until the move finishes; like the lists, only the shard the directory points at counts it.
+    """
+    moving = await run_db(shards.primary, moving_projects) if shards.sharded else {}
+    dashboards = await asyncio.gather(*(
+        shards.run(index, _dashboard, tuple(pid for pid, shard in moving.items() if shard != index))
+        for index in shards.indexes
+    ))
+    return _sum_dashboards(list(dashboards))
@@ -0,0 +1,97 @@
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from app.auth import get_current_user
+from app.config import settings
+from app.database import DBSession, close_db, get_db
+from app.events import RESYNC, get_hub
+from app.metrics import TimedRoute
+
+router = APIRouter(prefix="/events", tags=["Events"], route_class=TimedRoute)
+
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+async def _authenticate(token: Optional[str], db: DBSession):
+    """Resolve the token, then hand the connection back to the pool: streams stay open for hours."""
+    try:
+        return await get_current_user(token or "", db)
+    finally:
+        await close_db(db)
+
+def _sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    project_id: Optional[int] = None,
+    token: Optional[str] = Query(None, description="Bearer token, for EventSource clients that cannot send headers"),
+    header_token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: DBSession = Depends(get_db)
+):
+    """
+    Server-sent events for task and project changes.
+    Developers receive events for tasks assigned to them (or for project_id when given),
+    like GET /tasks/. A "resync" event means the client fell behind and must reload.
+    """
+    current_user = await _authenticate(header_token or token, db)
+    subscription = await get_hub().subscribe(current_user, project_id)
+
+    async def generate():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                item = await subscription.next(settings.EVENT_HEARTBEAT_SECONDS)
+                if item is None:
+                    yield ": keepalive\n\n"
+                elif item is RESYNC:
+                    yield _sse("resync", {})
+                    return
+                else:
+                    yield _sse(item.type, item.message())
+        finally:
+            get_hub().unsubscribe(subscription)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def events_websocket(
+    websocket: WebSocket,
+    project_id: Optional[int] = None,
+    token: Optional[str] = None,
+    db: DBSession = Depends(get_db)
+):
+    """WebSocket variant of /events/stream; messages are {"type", "id", "data"} JSON objects."""
+    try:
+        current_user = await _authenticate(token, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = await get_hub().subscribe(current_user, project_id)
+    try:
+        while True:
+            item = await subscription.next(settings.EVENT_HEARTBEAT_SECONDS)
+            if item is None:
+                await websocket.send_json({"type": "ping"})
+            elif item is RESYNC:
+                await websocket.send_json({"type": "resync"})
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            else:
+                await websocket.send_json(item.message())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        get_hub().unsubscribe(subscription)
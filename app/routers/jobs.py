@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.auth import get_current_user
+from app.database import DBSession, get_db, run_db
+from app.models import Job, User, UserRole
+from app.schemas import JobResponse
+from app.metrics import TimedRoute
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], route_class=TimedRoute)
+
+def _get_job(db: Session, job_id: str) -> Job:
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Status and progress of a background job; visible to whoever started it and to Admins."""
+    job = await run_db(db, _get_job, job_id)
+    if current_user.role != UserRole.ADMIN and job.created_by != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
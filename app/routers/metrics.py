@@ -0,0 +1,17 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from app import metrics
+from app.config import settings
+from app.metrics import TimedRoute
+
+router = APIRouter(tags=["Metrics"], route_class=TimedRoute)
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint; requires `Bearer METRICS_TOKEN` when that setting is set"""
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        authorization or "", f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,87 +1,446 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.models import Project, User
-from app.schemas import ProjectCreate, ProjectResponse, ProjectUpdate
+from collections import defaultdict
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, noload, selectinload
+from typing import List, Optional
+from app import cascades, changes, counters, events, jobs, sharding
+from app.database import run_db, sync_session_factory
+from app.sharding import Shards, get_read_shards, get_shards
+from app.models import Project, Task, User, project_members
+from app.schemas import (
+    JobResponse, ProjectChanges, ProjectCreate, ProjectMembers, ProjectResponse, ProjectUpdate, UserResponse
+)
 from app.auth import require_manager_or_admin, get_current_user
+from app.config import settings
+from app.conditional import (
+    collection_state, collection_validator, is_conditional, merge_states, not_modified, not_modified_response,
+    resource_validator
+)
+from app.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, page_statement, stream_ndjson, stream_pages_ndjson
+from app.projection import projection, response_columns, with_field
+from app.serialization import fast_json_response
+from app.metrics import TimedRoute
 
-router = APIRouter(prefix="/projects", tags=["Projects"])
+router = APIRouter(prefix="/projects", tags=["Projects"], route_class=TimedRoute)
+
+def _publish_project(action: str, project: Project):
+    events.publish(events.project_event(
+        action, project.id, ProjectResponse.model_validate(project).model_dump(mode="json")
+    ))
+
+MEMBER_BATCH_SIZE = 500
+
+def _parse_fields(fields: Optional[str]) -> Optional[set]:
+    if fields is None:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - set(ProjectResponse.model_fields)
+    if not selected or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown project fields: {sorted(unknown)}")
+    return selected
+
+def _project_select(fields: Optional[set] = None):
+    """
+    Select projects with team_members loaded for the whole result in one extra SELECT,
+    or not loaded at all when the caller did not ask for them.
+    """
+    if fields is not None and "team_members" not in fields:
+        return select(Project).options(noload(Project.team_members))
+    return select(Project).options(selectinload(Project.team_members))
+
+def _wants_team_members(fields: Optional[set]) -> bool:
+    return fields is None or "team_members" in fields
+
+def _team_members(db: Session, project_ids: list) -> dict:
+    """Member rows by project id, as UserResponse column projections."""
+    members = defaultdict(list)
+    stmt = select(project_members.c.project_id, *response_columns(User, UserResponse)).join(
+        User, User.id == project_members.c.user_id
+    )
+    for start in range(0, len(project_ids), MEMBER_BATCH_SIZE):
+        batch = project_ids[start:start + MEMBER_BATCH_SIZE]
+        for row in db.execute(stmt.where(project_members.c.project_id.in_(batch))):
+            members[row.project_id].append(row)
+    return members
+
+def _member_pairs(db: Session, project_ids: list) -> list:
+    """(project_id, user_id) membership rows, for shards, which hold no users to join."""
+    pairs = []
+    stmt = select(project_members.c.project_id, project_members.c.user_id)
+    for start in range(0, len(project_ids), MEMBER_BATCH_SIZE):
+        batch = project_ids[start:start + MEMBER_BATCH_SIZE]
+        pairs.extend(db.execute(stmt.where(project_members.c.project_id.in_(batch))).all())
+    return pairs
+
+def _users_by_id(db: Session, user_ids: set) -> dict:
+    stmt = select(*response_columns(User, UserResponse)).where(User.id.in_(user_ids))
+    return {row.id: row for row in db.execute(stmt)} if user_ids else {}
+
+async def _with_team_members(shards: Shards, rows: list) -> list:
+    """Copies of project rows with team_members; members of sharded projects are joined to users on the primary."""
+    project_ids = [row.id for row in rows]
+    if not shards.sharded:
+        return with_field(rows, "team_members", await run_db(shards.primary, _team_members, project_ids), default=[])
+    # A project being moved has members on two shards
+    pairs = sorted({tuple(pair) for pairs in await shards.scatter(_member_pairs, project_ids) for pair in pairs})
+    users = await run_db(shards.primary, _users_by_id, {user_id for _, user_id in pairs})
+    members = defaultdict(list)
+    for project_id, user_id in pairs:
+        if user_id in users:
+            members[project_id].append(users[user_id])
+    return with_field(rows, "team_members", members, default=[])
+
+async def _list_projects(shards: Shards, fields: Optional[set], limit, cursor, sort):
+    """One page of project rows, with team members attached when wanted."""
+    rows, next_cursor = await sharding.paginate(
+        shards, projection(Project, ProjectResponse), Project, limit, cursor, sort, project_of=lambda row: row.id
+    )
+    if _wants_team_members(fields):
+        rows = await _with_team_members(shards, rows)
+    return rows, next_cursor
+
+def _get_project(db: Session, project_id: int) -> Project:
+    stmt = _project_select().where(Project.id == project_id).execution_options(populate_existing=True)
+    project = db.scalars(stmt).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+def _project_rows(db: Session, project_id: int) -> list:
+    return db.execute(projection(Project, ProjectResponse).where(Project.id == project_id)).all()
+
+async def _project_response(shards: Shards, project_id: int):
+    """The project for a response, from a view of its shard; shards hold no users, so members are joined apart."""
+    if not shards.sharded:
+        return await run_db(shards.db, _get_project, project_id)
+    rows = await run_db(shards.db, _project_rows, project_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return (await _with_team_members(shards, rows))[0]
+
+def _check_users_exist(db: Session, user_ids: set):
+    """Validate member ids with an id-only query instead of loading User rows."""
+    if not user_ids:
+        return
+    found = set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+    if found != user_ids:
+        raise HTTPException(status_code=404, detail=f"Team member not found: {sorted(user_ids - found)}")
+
+def _member_ids(db: Session, project_id: int) -> set:
+    return set(db.scalars(select(project_members.c.user_id).where(project_members.c.project_id == project_id)))
+
+def _insert_members(db: Session, project_id: int, user_ids: set):
+    rows = [{"project_id": project_id, "user_id": user_id} for user_id in sorted(user_ids)]
+    try:
+        with db.begin_nested():
+            db.execute(insert(project_members), rows)
+    except IntegrityError:
+        # A concurrent request added some of them first; keep the rest
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(project_members), [row])
+            except IntegrityError:
+                pass
+
+def _change_members(db: Session, project_id: int, add: set = frozenset(), remove: set = frozenset()) -> bool:
+    """
+    Write only the project_members rows that change; returns whether any did.
+    The project's team_members relationship is left untouched, so the ORM never
+    rewrites the whole collection.
+    """
+    current = _member_ids(db, project_id)
+    added, removed = set(add) - current, set(remove) & current
+    if removed:
+        db.execute(delete(project_members).where(
+            project_members.c.project_id == project_id, project_members.c.user_id.in_(removed)
+        ))
+    if added:
+        _insert_members(db, project_id, added)
+    return bool(added or removed)
+
+def _set_members(db: Session, project_id: int, user_ids: set) -> bool:
+    current = _member_ids(db, project_id)
+    return _change_members(db, project_id, add=user_ids - current, remove=current - user_ids)
+
+def _create_project(db: Session, project: ProjectCreate, project_id: Optional[int] = None) -> int:
+    """Insert the project and its members; project_id is the id the shard directory allocated, if any."""
+    team_member_ids = set(project.team_member_ids or [])
+    db_project = Project(id=project_id, name=project.name, description=project.description)
+
+    db.add(db_project)
+    db.flush()
+    if team_member_ids:
+        _insert_members(db, db_project.id, team_member_ids)
+    counters.project_created(db, db_project)
+    db.commit()
+    return db_project.id
 
 @router.post("/", response_model=ProjectResponse, status_code=201)
-def create_project(
+async def create_project(
     project: ProjectCreate,
-    db: Session = Depends(get_db),
+    shards: Shards = Depends(get_shards),
     current_user: User = Depends(require_manager_or_admin)
 ):
     """Only Managers and Admins can create projects"""
-    db_project = Project(name=project.name, description=project.description)
-
-    if project.team_member_ids:
-        team_members = db.query(User).filter(User.id.in_(project.team_member_ids)).all()
-        db_project.team_members = team_members
-
-    db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-    return db_project
+    await run_db(shards.primary, _check_users_exist, set(project.team_member_ids or []))
+    project_id, view = await shards.place()
+    try:
+        project_id = await run_db(view.db, _create_project, project, project_id)
+    except Exception:
+        if project_id is not None:
+            await shards.forget(project_id)
+        raise
+    project = await _project_response(view, project_id)
+    _publish_project("created", project)
+    return project
 
 @router.get("/", response_model=List[ProjectResponse])
-def list_projects(
-    db: Session = Depends(get_db),
+async def list_projects(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("id", pattern="^(id|updated_at)$"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name"),
+    shards: Shards = Depends(get_read_shards),
     current_user: User = Depends(get_current_user)
 ):
-    """All authenticated users can view projects"""
-    projects = db.query(Project).all()
+    """
+    All authenticated users can view projects.
+    Pass limit/cursor for keyset pagination (next cursor in the X-Next-Cursor header)
+    or format=ndjson to stream the result one project per line.
+    Pass fields to return only those fields; team members are not loaded unless requested.
+    JSON responses carry an ETag; a matching If-None-Match gets 304 from an aggregate query.
+    """
+    selected = _parse_fields(fields)
+    if format == "ndjson":
+        if shards.sharded:
+            async def fetch_page(position, size):
+                return await _list_projects(shards, selected, size, position, sort)
+
+            return stream_pages_ndjson(fetch_page, ProjectResponse, limit=limit, cursor=cursor, include=selected)
+        # Streams keep entities when members are wanted: selectinload batches them per yield_per chunk
+        stmt = _project_select(selected) if _wants_team_members(selected) else projection(Project, ProjectResponse)
+        return stream_ndjson(
+            shards.db, stmt, Project, ProjectResponse, limit=limit, cursor=cursor, sort=sort, include=selected
+        )
+
+    states = await shards.scatter(collection_state, page_statement(select(Project), Project, limit, cursor, sort), Project)
+    validator = collection_validator(f"projects:{request.url.query}", *merge_states(states))
+    if not_modified(request, validator, use_modified_since=False):
+        return not_modified_response(validator)
+
+    projects, next_cursor = await _list_projects(shards, selected, limit, cursor, sort)
+    headers = dict(validator.headers)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if settings.FAST_JSON_RESPONSES:
+        return await fast_json_response(projects, ProjectResponse, headers, include=selected)
+    if selected is not None:
+        content = [ProjectResponse.model_validate(p).model_dump(mode="json", include=selected) for p in projects]
+        return JSONResponse(content=content, headers=headers)
+    response.headers.update(headers)
     return projects
 
-@router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(
-    project_id: int,
-    db: Session = Depends(get_db),
+@router.get("/changes", response_model=ProjectChanges)
+async def project_changes(
+    since: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    shards: Shards = Depends(get_shards),
     current_user: User = Depends(get_current_user)
 ):
-    """All authenticated users can view project details"""
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+    """
+    Projects created, updated or deleted after the since cursor, plus the cursor for the next call.
+    Omit since for a full initial sync; call again while has_more is true.
+    """
+    if not shards.sharded:
+        return await run_db(shards.db, changes.read_changes, _project_select(), Project, changes.PROJECT, since, limit)
+    feed = await sharding.read_changes(
+        shards, projection(Project, ProjectResponse), Project, changes.PROJECT, since, limit, project_of=lambda row: row.id
+    )
+    feed["changed"] = await _with_team_members(shards, feed["changed"])
+    return feed
+
+def _project_version(db: Session, project_id: int) -> datetime:
+    row = db.execute(select(Project.updated_at).where(Project.id == project_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    return row.updated_at
 
-@router.put("/{project_id}", response_model=ProjectResponse)
-def update_project(
+@router.get("/{project_id}", response_model=ProjectResponse)
+async def get_project(
     project_id: int,
-    project_update: ProjectUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager_or_admin)
+    request: Request,
+    response: Response,
+    shards: Shards = Depends(get_read_shards),
+    current_user: User = Depends(get_current_user)
 ):
-    """Only Managers and Admins can edit projects"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    """
+    All authenticated users can view project details.
+    Supports If-None-Match / If-Modified-Since against the project's ETag and Last-Modified.
+    """
+    view = await shards.project(project_id)
+    if is_conditional(request):
+        version = await run_db(view.db, _project_version, project_id)
+        validator = resource_validator("project", project_id, version, weak=True)
+        if not_modified(request, validator):
+            return not_modified_response(validator)
+
+    project = await _project_response(view, project_id)
+    response.headers.update(resource_validator("project", project.id, project.updated_at, weak=True).headers)
+    return project
+
+def _get_project_row(db: Session, project_id: int) -> Project:
+    project = db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+def _update_project(db: Session, project_id: int, project_update: ProjectUpdate):
+    """Apply the update; member ids must have been checked against users already."""
+    project = _get_project_row(db, project_id)
 
     if project_update.name is not None:
         project.name = project_update.name
     if project_update.description is not None:
         project.description = project_update.description
     if project_update.team_member_ids is not None:
-        team_members = db.query(User).filter(User.id.in_(project_update.team_member_ids)).all()
-        project.team_members = team_members
+        if _set_members(db, project_id, set(project_update.team_member_ids)):
+            # Membership lives in project_members, so bump the project's validators explicitly
+            project.updated_at = datetime.utcnow()
 
     db.commit()
-    db.refresh(project)
+
+@router.put("/{project_id}", response_model=ProjectResponse)
+async def update_project(
+    project_id: int,
+    project_update: ProjectUpdate,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """Only Managers and Admins can edit projects"""
+    view = await shards.project(project_id, write=True)
+    if project_update.team_member_ids is not None:
+        await run_db(shards.primary, _check_users_exist, set(project_update.team_member_ids))
+    await run_db(view.db, _update_project, project_id, project_update)
+    project = await _project_response(view, project_id)
+    _publish_project("updated", project)
+    return project
+
+def _update_members(db: Session, project_id: int, add: set = frozenset(), remove: set = frozenset()) -> bool:
+    """Change the members; returns whether any changed. Added ids must have been checked against users."""
+    project = _get_project_row(db, project_id)
+    if _change_members(db, project_id, add=add, remove=remove):
+        project.updated_at = datetime.utcnow()
+        db.commit()
+        return True
+    db.rollback()
+    return False
+
+async def _change_team(shards: Shards, project_id: int, add: set = frozenset(), remove: set = frozenset()):
+    view = await shards.project(project_id, write=True)
+    await run_db(shards.primary, _check_users_exist, set(add))
+    changed = await run_db(view.db, _update_members, project_id, add, remove)
+    project = await _project_response(view, project_id)
+    if changed:
+        _publish_project("updated", project)
     return project
 
-@router.delete("/{project_id}", status_code=204)
-def delete_project(
+@router.post("/{project_id}/members", response_model=ProjectResponse)
+async def add_project_members(
+    project_id: int,
+    members: ProjectMembers,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """Add users to the team; users who are already members are left as they are."""
+    return await _change_team(shards, project_id, set(members.user_ids), frozenset())
+
+@router.delete("/{project_id}/members", response_model=ProjectResponse)
+async def remove_project_members(
     project_id: int,
-    db: Session = Depends(get_db),
+    members: ProjectMembers,
+    shards: Shards = Depends(get_shards),
     current_user: User = Depends(require_manager_or_admin)
 ):
-    """Only Managers and Admins can delete projects"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    """Remove users from the team; ids that are not members are ignored."""
+    return await _change_team(shards, project_id, frozenset(), set(members.user_ids))
+
+PROJECT_DELETE_JOB = "project.delete"
+
+def _delete_state(db: Session, project_id: int) -> tuple:
+    """(whether a background delete has started, number of tasks) of the project."""
+    project = db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    return project.deleting, db.scalar(select(func.count()).select_from(Task).where(Task.project_id == project_id))
 
-    db.delete(project)
+def _mark_deleting(db: Session, project_id: int):
+    """
+    Flag the project before its delete job starts. The UPDATE waits for task creates
+    holding the project row, and creates after it see the flag and are refused.
+    """
+    db.execute(
+        update(Project).where(Project.id == project_id)
+        .values(deleting=True, updated_at=Project.updated_at)
+        .execution_options(synchronize_session=False)
+    )
     db.commit()
-    return None
+
+def _delete_project(db: Session, project_id: int):
+    # Locked first, so a task create cannot commit between the task batches and the project row
+    project = db.get(Project, project_id, with_for_update=True)
+    if project is not None:
+        cascades.delete_project(db, project)
+
+def _run_project_delete(db: Session, progress, project_id: int, shard_factory=None):
+    """Job body; with shard_factory the project lives on that shard and db only holds its directory entry."""
+    if shard_factory is None:
+        project = db.get(Project, project_id)
+        if project is not None:
+            cascades.delete_project(db, project, commit_batches=True, progress=progress)
+    else:
+        with shard_factory() as shard_db:
+            project = shard_db.get(Project, project_id)
+            if project is not None:
+                cascades.delete_project(shard_db, project, commit_batches=True, progress=progress)
+        sharding.forget_project(db, project_id)
+    events.publish(events.project_event("deleted", project_id))
+
+@router.delete("/{project_id}", status_code=204, responses={202: {"model": JobResponse}})
+async def delete_project(
+    project_id: int,
+    background: bool = False,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """
+    Only Managers and Admins can delete projects.
+    Projects with more than PROJECT_DELETE_SYNC_LIMIT tasks (or any, with background=true)
+    are deleted by a background job: the response is 202 with the job to poll at GET /jobs/{id}.
+    From then on the project takes no new tasks, and repeating the DELETE returns the same job.
+    """
+    view = await shards.project(project_id, write=True)
+    deleting, task_count = await run_db(view.db, _delete_state, project_id)
+    if not deleting and not background and task_count <= settings.PROJECT_DELETE_SYNC_LIMIT:
+        await run_db(view.db, _delete_project, project_id)
+        await shards.forget(project_id)
+        events.publish(events.project_event("deleted", project_id))
+        return Response(status_code=204)
+
+    job = await run_db(shards.primary, jobs.find_active, PROJECT_DELETE_JOB, project_id) if deleting else None
+    if job is None:
+        # Also restarts a delete whose job failed or never got created
+        await run_db(view.db, _mark_deleting, project_id)
+        job = await run_db(shards.primary, jobs.create, PROJECT_DELETE_JOB, project_id, task_count, current_user.id)
+        jobs.start(sync_session_factory(shards.primary), job, _run_project_delete, project_id, view.sync_sessionmaker())
+    return JSONResponse(
+        status_code=202,
+        content=JobResponse.model_validate(job).model_dump(mode="json"),
+        headers={"Location": f"/jobs/{job.id}"},
+    )
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from app import search as search_index
+from app.auth import get_current_user
+from app.database import run_db
+from app.sharding import Shards, get_read_shards
+from app.models import User
+from app.schemas import SearchResults
+from app.metrics import TimedRoute
+
+router = APIRouter(tags=["Search"], route_class=TimedRoute)
+
+@router.get("/search", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: str = Query("all", pattern="^(all|task|project)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=search_index.MAX_OFFSET),
+    shards: Shards = Depends(get_read_shards),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search task titles/descriptions and project names/descriptions, best match first.
+    Every word must match as a prefix. Developers only find tasks assigned to them.
+    """
+    kinds = (search_index.TASK, search_index.PROJECT) if type == "all" else (type,)
+    if not shards.sharded:
+        return await run_db(shards.db, search_index.search, current_user, q, kinds, limit, offset)
+    results = await shards.scatter(search_index.search, current_user, q, kinds, offset + limit, 0)
+    hits = await shards.authoritative(
+        [result["results"] for result in results],
+        lambda hit: hit["id"] if hit["type"] == search_index.PROJECT else hit["project_id"],
+    )
+    results = [{**result, "results": shard_hits} for result, shard_hits in zip(results, hits)]
+    return search_index.merge_results(results, limit, offset)
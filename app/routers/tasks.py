@@ -1,97 +1,433 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.models import Task, Project, User, UserRole
-from app.schemas import TaskCreate, TaskResponse, TaskUpdate
+from typing import List, Optional
+from datetime import datetime, timedelta
+from app import changes, counters, events, overdue, sharding
+from app.database import run_db
+from app.sharding import Shards, get_read_shards, get_shards
+from app.models import Task, Project, Tombstone, User, UserRole
+from app.schemas import (
+    TaskCreate, TaskResponse, TaskUpdate, TaskBulkCreate, TaskBulkUpdate, TaskBulkDelete, TaskBulkResponse,
+    TaskChanges
+)
 from app.auth import require_manager_or_admin, get_current_user
+from app.config import settings
+from app.conditional import (
+    collection_state, collection_validator, is_conditional, merge_states, not_modified, not_modified_response,
+    resource_validator
+)
+from app.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, page_statement, stream_ndjson, stream_pages_ndjson
+)
+from app.projection import projection
+from app.serialization import fast_json_response
+from app.metrics import TimedRoute
 
-router = APIRouter(prefix="/tasks", tags=["Tasks"])
+router = APIRouter(prefix="/tasks", tags=["Tasks"], route_class=TimedRoute)
 
-@router.post("/", response_model=TaskResponse, status_code=201)
-def create_task(
-    task: TaskCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager_or_admin)
-):
-    """Only Managers and Admins can create tasks"""
-    project = db.query(Project).filter(Project.id == task.project_id).first()
+def _task_event(action: str, task: TaskResponse, previous_assignee: Optional[int] = None) -> events.Event:
+    return events.task_event(
+        action, task.id, task.project_id, [task.assigned_to, previous_assignee], task.model_dump(mode="json")
+    )
+
+def _check_assignee(db: Session, user_id: Optional[int]):
+    if user_id and not _existing_ids(db, User.id, [user_id]):
+        raise HTTPException(status_code=404, detail="Assigned user not found")
+
+def _create_task(db: Session, task: TaskCreate, task_id: Optional[int] = None) -> Task:
+    """Insert the task; the assignee must have been checked already. task_id comes from the sharded id sequence."""
+    # Share-locked, so a project delete waits for this insert rather than orphaning it
+    project = db.query(Project).filter(Project.id == task.project_id).with_for_update(read=True).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    if project.deleting:
+        raise HTTPException(status_code=409, detail="Project is being deleted")
 
-    if task.assigned_to:
-        user = db.query(User).filter(User.id == task.assigned_to).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="Assigned user not found")
-
-    db_task = Task(**task.model_dump())
+    db_task = Task(id=task_id, **task.model_dump())
+    db_task.is_overdue = overdue.is_overdue(db_task.deadline, db_task.status)
     db.add(db_task)
+    counters.task_created(db, db_task)
     db.commit()
     db.refresh(db_task)
+    events.publish(_task_event("created", TaskResponse.model_validate(db_task)))
     return db_task
 
+@router.post("/", response_model=TaskResponse, status_code=201)
+async def create_task(
+    task: TaskCreate,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """Only Managers and Admins can create tasks"""
+    view = await shards.project(task.project_id, write=True)
+    await run_db(shards.primary, _check_assignee, task.assigned_to)
+    task_ids = await shards.task_ids([task.project_id])
+    return await run_db(view.db, _create_task, task, task_ids[0] if task_ids else None)
+
+async def _task_view(shards: Shards, project_id: Optional[int]) -> Shards:
+    """The shard of project_id when the listing is limited to one project, otherwise every shard."""
+    return await shards.narrow(project_id) if project_id else shards
+
+def _visible_tasks(stmt, current_user: User, project_id: Optional[int], assigned_to: Optional[int]):
+    """
+    Filter a task select to what the listing shows current_user.
+    Developers can only see tasks assigned to them (unless project_id is specified).
+    """
+    if current_user.role == UserRole.DEVELOPER and not project_id:
+        return stmt.where(Task.assigned_to == current_user.id)
+    if project_id:
+        return stmt.where(Task.project_id == project_id)
+    if assigned_to:
+        return stmt.where(Task.assigned_to == assigned_to)
+    return stmt
+
 @router.get("/", response_model=List[TaskResponse])
-def list_tasks(
+async def list_tasks(
+    request: Request,
+    response: Response,
     project_id: int = None,
     assigned_to: int = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("id", pattern="^(id|updated_at)$"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    shards: Shards = Depends(get_read_shards),
     current_user: User = Depends(get_current_user)
 ):
     """
     All authenticated users can view tasks.
     Developers see only their assigned tasks unless filtering by project_id.
     Managers and Admins see all tasks.
+    Pass limit/cursor for keyset pagination (next cursor in the X-Next-Cursor header)
+    or format=ndjson to stream the result one task per line.
+    JSON responses carry an ETag; a matching If-None-Match gets 304 from an aggregate query.
     """
-    query = db.query(Task)
+    stmt = _visible_tasks(projection(Task, TaskResponse), current_user, project_id, assigned_to)
+    view = await _task_view(shards, project_id)
+    if format == "ndjson":
+        if view.sharded:
+            async def fetch_page(position, size):
+                return await sharding.paginate(view, stmt, Task, size, position, sort)
+
+            return stream_pages_ndjson(fetch_page, TaskResponse, limit=limit, cursor=cursor)
+        return stream_ndjson(view.db, stmt, Task, TaskResponse, limit=limit, cursor=cursor, sort=sort)
 
-    # Developers can only see tasks assigned to them (unless project_id is specified)
+    states = await view.scatter(collection_state, page_statement(stmt, Task, limit, cursor, sort), Task)
+    validator = collection_validator(f"tasks:{current_user.id}:{request.url.query}", *merge_states(states))
+    if not_modified(request, validator, use_modified_since=False):
+        return not_modified_response(validator)
+
+    tasks, next_cursor = await sharding.paginate(view, stmt, Task, limit, cursor, sort)
+    headers = dict(validator.headers)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if settings.FAST_JSON_RESPONSES:
+        return await fast_json_response(tasks, TaskResponse, headers)
+    response.headers.update(headers)
+    return tasks
+
+@router.get("/changes", response_model=TaskChanges)
+async def task_changes(
+    since: Optional[str] = None,
+    project_id: int = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Tasks created, updated or deleted after the since cursor, plus the cursor for the next call.
+    Omit since for a full initial sync; call again while has_more is true.
+    Same visibility as GET /tasks/.
+    """
+    stmt = select(Task)
+    entity, tombstone_filter = changes.TASK, None
     if current_user.role == UserRole.DEVELOPER and not project_id:
-        query = query.filter(Task.assigned_to == current_user.id)
+        stmt = stmt.where(Task.assigned_to == current_user.id)
+        # Tasks reassigned away from the developer leave this feed too
+        entity, tombstone_filter = (changes.TASK, changes.TASK_EXIT), Tombstone.assigned_to == current_user.id
     elif project_id:
-        query = query.filter(Task.project_id == project_id)
-    elif assigned_to:
-        query = query.filter(Task.assigned_to == assigned_to)
+        stmt = stmt.where(Task.project_id == project_id)
+        tombstone_filter = Tombstone.project_id == project_id
 
-    tasks = query.all()
-    return tasks
+    view = await _task_view(shards, project_id)
+    return await sharding.read_changes(view, stmt, Task, entity, since, limit, tombstone_filter)
 
-@router.get("/{task_id}", response_model=TaskResponse)
-def get_task(
-    task_id: int,
-    db: Session = Depends(get_db),
+DUE_WINDOW_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+MAX_DUE_WINDOW = timedelta(days=366)
+
+def _due_window(within: str) -> timedelta:
+    amount, unit = (within[:-1], within[-1]) if within[-1] in DUE_WINDOW_UNITS else (within, "h")
+    window = timedelta(**{DUE_WINDOW_UNITS[unit]: int(amount)})
+    if window > MAX_DUE_WINDOW:
+        raise HTTPException(status_code=400, detail="within may not exceed 366 days")
+    return window
+
+def _due_tasks(db: Session, stmt, window: timedelta, include_overdue: bool, limit: int) -> list:
+    now = datetime.utcnow()
+    stmt = stmt.where(Task.status.in_(overdue.OPEN_STATUSES), Task.deadline <= now + window)
+    if not include_overdue:
+        stmt = stmt.where(Task.deadline >= now)
+    return db.execute(stmt.order_by(Task.deadline, Task.id).limit(limit)).all()
+
+@router.get("/due", response_model=List[TaskResponse])
+async def due_tasks(
+    within: str = Query("24h", pattern=r"^\d{1,6}[mhd]?$", description="Window ahead of now, e.g. 90m, 24h (default unit) or 7d"),
+    project_id: int = None,
+    assigned_to: int = None,
+    include_overdue: bool = False,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    shards: Shards = Depends(get_read_shards),
     current_user: User = Depends(get_current_user)
 ):
     """
-    All authenticated users can view task details.
-    Developers can only view tasks assigned to them.
+    Open tasks whose deadline falls within the window, soonest first; include_overdue
+    adds open tasks already past their deadline. Same visibility as GET /tasks/.
+    """
+    stmt = _visible_tasks(projection(Task, TaskResponse), current_user, project_id, assigned_to)
+    view = await _task_view(shards, project_id)
+    pages = await view.scatter(_due_tasks, stmt, _due_window(within), include_overdue, limit)
+    if len(pages) == 1:
+        return pages[0]
+    pages = await view.authoritative(pages, lambda row: row.project_id)
+    return sorted((row for rows in pages for row in rows), key=lambda row: (row.deadline, row.id))[:limit]
+
+def _bulk_response(results: list) -> dict:
+    failed = sum(1 for result in results if result["status_code"] >= 400)
+    return {"succeeded": len(results) - failed, "failed": failed, "results": results}
+
+def _bulk_create_tasks(db: Session, items: list, user_ids: set, task_ids: Optional[dict] = None) -> list:
     """
+    Create the (index, TaskCreate) items in one transaction; returns their per-item results.
+    user_ids are the existing assignees; task_ids, when sharded, the new task id by index.
+    """
+    # Share-locked like in _create_task; {project id: deleting} of the projects that exist
+    projects = dict(db.execute(
+        select(Project.id, Project.deleting)
+        .where(Project.id.in_({item.project_id for _, item in items}))
+        .with_for_update(read=True)
+    ).all())
+
+    results, created = [], []
+    for index, item in items:
+        if item.project_id not in projects:
+            results.append({"index": index, "status_code": 404, "detail": "Project not found"})
+        elif projects[item.project_id]:
+            results.append({"index": index, "status_code": 409, "detail": "Project is being deleted"})
+        elif item.assigned_to and item.assigned_to not in user_ids:
+            results.append({"index": index, "status_code": 404, "detail": "Assigned user not found"})
+        else:
+            task = Task(id=task_ids[index] if task_ids else None, **item.model_dump())
+            task.is_overdue = overdue.is_overdue(task.deadline, task.status)
+            created.append(task)
+            results.append({"index": index, "status_code": 201, "task": task})
+
+    if created:
+        # One flush lets the unit of work batch the INSERTs (executemany / multi-row VALUES)
+        db.add_all(created)
+        db.flush()
+        counters.tasks_changed(db, [(task.project_id, None, task.status, False, task.is_overdue) for task in created])
+        for result in results:
+            if "task" in result:
+                result["id"] = result["task"].id
+                result["task"] = TaskResponse.model_validate(result["task"])
+    db.commit()
+    events.publish(*(_task_event("created", result["task"]) for result in results if result.get("task")))
+    return results
+
+async def _gather_results(shards: Shards, fn, groups: dict, *args) -> list:
+    """fn(db, items, *args) on each shard for its items in parallel; the results in request order."""
+    results = await asyncio.gather(*(shards.run(index, fn, items, *args) for index, items in groups.items()))
+    return sorted((result for shard_results in results for result in shard_results), key=lambda result: result["index"])
+
+@router.post("/bulk", response_model=TaskBulkResponse)
+async def bulk_create_tasks(
+    payload: TaskBulkCreate,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """
+    Only Managers and Admins can create tasks.
+    Each item is validated on its own; all valid items are written in one transaction
+    per shard and the response reports a status per item.
+    """
+    items = payload.tasks
+    user_ids = await run_db(shards.primary, _existing_ids, User.id, [item.assigned_to for item in items])
+    groups, missing = await shards.partition([item.project_id for item in items], write=True)
+    groups = {index: [(position, items[position]) for position in group] for index, group in groups.items()}
+    positions = [position for group in groups.values() for position, _ in group]
+    task_ids = await shards.task_ids([items[position].project_id for position in positions])
+    if task_ids:
+        task_ids = dict(zip(positions, task_ids))
+    results = await _gather_results(shards, _bulk_create_tasks, groups, user_ids, task_ids)
+    results.extend({"index": index, "status_code": 404, "detail": "Project not found"} for index in missing)
+    return _bulk_response(sorted(results, key=lambda result: result["index"]))
+
+async def _task_groups(shards: Shards, ids: list) -> dict:
+    """Positions in ids by shard index; tasks no shard holds go with the first group, which reports them missing."""
+    located = await shards.locate_tasks(ids, write=True)
+    groups = {}
+    for position, task_id in enumerate(ids):
+        index = located.get(task_id)
+        groups.setdefault(index, []).append(position)
+    unlocated = groups.pop(None, [])
+    if unlocated:
+        first = next(iter(groups), shards.indexes[0])
+        groups[first] = sorted(groups.get(first, []) + unlocated)
+    return groups
+
+def _bulk_update_tasks(db: Session, items: list, current_user: User, user_ids: set) -> list:
+    """Update the (index, TaskBulkUpdateItem) items in one transaction; user_ids are the existing assignees."""
+    tasks = {task.id: task for task in db.scalars(select(Task).where(Task.id.in_({item.id for _, item in items})))}
+
+    now = datetime.utcnow()
+    results, rows, counted_changes, moves, seen = [], [], [], [], set()
+    previous_assignees = {task_id: task.assigned_to for task_id, task in tasks.items()}
+    for index, item in items:
+        update_data = item.model_dump(exclude_unset=True, exclude={"id"})
+        task = tasks.get(item.id)
+        try:
+            if item.id in seen:
+                raise HTTPException(status_code=400, detail="Task appears more than once in this request")
+            seen.add(item.id)
+            if task is None:
+                raise HTTPException(status_code=404, detail="Task not found")
+            _check_task_update(task, update_data, current_user, user_ids)
+        except HTTPException as exc:
+            results.append({"index": index, "id": item.id, "status_code": exc.status_code, "detail": exc.detail})
+            continue
+
+        row = {"id": item.id, "updated_at": now, **update_data}
+        new_status = update_data.get("status", task.status)
+        if "status" in update_data or "deadline" in update_data:
+            row["is_overdue"] = overdue.is_overdue(update_data.get("deadline", task.deadline), new_status, now)
+            counted_changes.append((task.project_id, task.status, new_status, task.is_overdue, row["is_overdue"]))
+        if "assigned_to" in update_data:
+            moves.append((task.id, task.project_id, task.assigned_to, update_data["assigned_to"]))
+        rows.append(row)
+        results.append({"index": index, "id": item.id, "status_code": 200})
+
+    if rows:
+        # ORM bulk UPDATE by primary key: executemany, grouped by the set of changed columns
+        db.execute(update(Task), rows)
+        counters.tasks_changed(db, counted_changes)
+        changes.record_reassigned_tasks(db, moves)
+        stmt = select(Task).where(Task.id.in_([row["id"] for row in rows])).execution_options(populate_existing=True)
+        updated = {task.id: TaskResponse.model_validate(task) for task in db.scalars(stmt)}
+        for result in results:
+            if result["status_code"] == 200:
+                result["task"] = updated[result["id"]]
+    db.commit()
+    events.publish(*(
+        _task_event("updated", result["task"], previous_assignees[result["id"]])
+        for result in results if result.get("task")
+    ))
+    return results
+
+@router.patch("/bulk", response_model=TaskBulkResponse)
+async def bulk_update_tasks(
+    payload: TaskBulkUpdate,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Same rules as PUT /tasks/{id}: Managers and Admins can update any task,
+    Developers only the status of tasks assigned to them.
+    Valid items are written in one transaction per shard; the response reports a status per item.
+    """
+    items = payload.tasks
+    user_ids = await run_db(shards.primary, _existing_ids, User.id, [item.assigned_to for item in items])
+    groups = await _task_groups(shards, [item.id for item in items])
+    groups = {index: [(position, items[position]) for position in group] for index, group in groups.items()}
+    return _bulk_response(await _gather_results(shards, _bulk_update_tasks, groups, current_user, user_ids))
+
+def _bulk_delete_tasks(db: Session, items: list) -> list:
+    """Delete the (index, task id) items in one statement; returns their per-item results."""
+    found = {row.id: row for row in db.execute(
+        select(Task.id, Task.project_id, Task.assigned_to, Task.status, Task.is_overdue)
+        .where(Task.id.in_({task_id for _, task_id in items}))
+    )}
+
+    results, seen = [], set()
+    for index, task_id in items:
+        if task_id in seen:
+            results.append({"index": index, "id": task_id, "status_code": 400,
+                            "detail": "Task appears more than once in this request"})
+        elif task_id not in found:
+            results.append({"index": index, "id": task_id, "status_code": 404, "detail": "Task not found"})
+        else:
+            results.append({"index": index, "id": task_id, "status_code": 204})
+        seen.add(task_id)
+
+    if found:
+        db.execute(delete(Task).where(Task.id.in_(list(found))), execution_options={"synchronize_session": False})
+        counters.tasks_changed(db, [(row.project_id, row.status, None, row.is_overdue, False) for row in found.values()])
+        changes.record_deleted_tasks(db, found.values())
+    db.commit()
+    events.publish(*(
+        events.task_event("deleted", row.id, row.project_id, [row.assigned_to]) for row in found.values()
+    ))
+    return results
+
+@router.delete("/bulk", response_model=TaskBulkResponse)
+async def bulk_delete_tasks(
+    payload: TaskBulkDelete,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """Only Managers and Admins can delete tasks. All found tasks are deleted in one statement per shard."""
+    ids = payload.ids
+    groups = await _task_groups(shards, ids)
+    groups = {index: [(position, ids[position]) for position in group] for index, group in groups.items()}
+    return _bulk_response(await _gather_results(shards, _bulk_delete_tasks, groups))
+
+def _get_task(db: Session, task_id: int) -> Task:
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+def _task_version(db: Session, task_id: int):
+    """(assigned_to, updated_at) of a task: enough to authorize and revalidate without loading it."""
+    row = db.execute(select(Task.assigned_to, Task.updated_at).where(Task.id == task_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return row
 
+def _check_task_visible(task, current_user: User):
     # Developers can only view their own tasks
     if current_user.role == UserRole.DEVELOPER and task.assigned_to != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied. You can only view tasks assigned to you.")
 
-    return task
-
-@router.put("/{task_id}", response_model=TaskResponse)
-def update_task(
+@router.get("/{task_id}", response_model=TaskResponse)
+async def get_task(
     task_id: int,
-    task_update: TaskUpdate,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    shards: Shards = Depends(get_read_shards),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Managers and Admins can update any task.
-    Developers can only update status and add comments for their assigned tasks.
+    All authenticated users can view task details.
+    Developers can only view tasks assigned to them.
+    Supports If-None-Match / If-Modified-Since against the task's ETag and Last-Modified.
     """
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    db = (await shards.task(task_id)).db
+    if is_conditional(request):
+        version = await run_db(db, _task_version, task_id)
+        _check_task_visible(version, current_user)
+        validator = resource_validator("task", task_id, version.updated_at)
+        if not_modified(request, validator):
+            return not_modified_response(validator)
 
-    update_data = task_update.model_dump(exclude_unset=True)
+    task = await run_db(db, _get_task, task_id)
+    _check_task_visible(task, current_user)
+    response.headers.update(resource_validator("task", task.id, task.updated_at).headers)
+    return task
 
+def _check_task_update(task: Task, update_data: dict, current_user: User, valid_assignees: set):
+    """Role rules shared by update_task and bulk_update_tasks; raises HTTPException on violation."""
     # Developers can only update their own tasks and only status field
     if current_user.role == UserRole.DEVELOPER:
         if task.assigned_to != current_user.id:
@@ -103,28 +439,66 @@ def update_task(
             raise HTTPException(status_code=403, detail="Developers can only update task status.")
 
     if "assigned_to" in update_data and update_data["assigned_to"]:
-        user = db.query(User).filter(User.id == update_data["assigned_to"]).first()
-        if not user:
+        if update_data["assigned_to"] not in valid_assignees:
             raise HTTPException(status_code=404, detail="Assigned user not found")
 
+def _existing_ids(db: Session, column, ids) -> set:
+    """Which of ids exist, checked with a single IN query."""
+    ids = {value for value in ids if value}
+    if not ids:
+        return set()
+    return set(db.scalars(select(column).where(column.in_(ids))))
+
+def _update_task(db: Session, task_id: int, task_update: TaskUpdate, current_user: User, user_ids: set) -> Task:
+    """Apply the update; user_ids are the existing assignees among the update's."""
+    task = _get_task(db, task_id)
+
+    update_data = task_update.model_dump(exclude_unset=True)
+    _check_task_update(task, update_data, current_user, user_ids)
+
+    old_status, was_overdue, previous_assignee = task.status, task.is_overdue, task.assigned_to
     for field, value in update_data.items():
         setattr(task, field, value)
+    task.is_overdue = overdue.is_overdue(task.deadline, task.status)
+    counters.task_updated(db, task, old_status, was_overdue)
+    changes.record_reassigned_tasks(db, [(task.id, task.project_id, previous_assignee, task.assigned_to)])
 
     db.commit()
     db.refresh(task)
+    events.publish(_task_event("updated", TaskResponse.model_validate(task), previous_assignee))
     return task
 
-@router.delete("/{task_id}", status_code=204)
-def delete_task(
+@router.put("/{task_id}", response_model=TaskResponse)
+async def update_task(
     task_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager_or_admin)
+    task_update: TaskUpdate,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(get_current_user)
 ):
-    """Only Managers and Admins can delete tasks"""
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    """
+    Managers and Admins can update any task.
+    Developers can only update status and add comments for their assigned tasks.
+    """
+    view = await shards.task(task_id, write=True)
+    user_ids = await run_db(shards.primary, _existing_ids, User.id, [task_update.assigned_to])
+    return await run_db(view.db, _update_task, task_id, task_update, current_user, user_ids)
 
+def _delete_task(db: Session, task_id: int):
+    task = _get_task(db, task_id)
+    counters.task_deleted(db, task)
+    changes.record_deleted_tasks(db, [task])
+    event = events.task_event("deleted", task.id, task.project_id, [task.assigned_to])
     db.delete(task)
     db.commit()
+    events.publish(event)
+
+@router.delete("/{task_id}", status_code=204)
+async def delete_task(
+    task_id: int,
+    shards: Shards = Depends(get_shards),
+    current_user: User = Depends(require_manager_or_admin)
+):
+    """Only Managers and Admins can delete tasks"""
+    view = await shards.task(task_id, write=True)
+    await run_db(view.db, _delete_task, task_id)
     return None
@@ -1,26 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.models import User
-from app.schemas import UserCreate, UserResponse
-from app.auth import require_admin, get_current_user, get_password_hash
+from typing import List, Optional
+from app import cascades, events
+from app.database import DBSession, get_db, run_db
+from app.replicas import get_read_db
+from app.sharding import Shards, get_shards
+from app.models import Task, User
+from app.schemas import MAX_BULK_USERS, TaskResponse, UserBulkResponse, UserCreate, UserResponse
+from app.auth import require_admin, get_current_user
+from app.config import settings
+from app.hashing import get_password_pool
+from app.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate, stream_ndjson
+from app.principal_cache import get_principal_cache
+from app.projection import projection
+from app.serialization import fast_json_response
+from app.metrics import TimedRoute
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=TimedRoute)
 
-@router.post("/", response_model=UserResponse, status_code=201)
-def create_user(
-    user: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
-):
-    """Only Admins can create new users with any role (Admin, Manager, or Developer)"""
-    existing_user = db.query(User).filter(User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+BULK_INSERT_BATCH_SIZE = 500
+CSV_MEDIA_TYPES = ("text/csv", "application/csv")
 
-    # Hash the password before storing
-    hashed_password = get_password_hash(user.password)
+def _email_registered(db: Session, email: str) -> bool:
+    return db.query(User.id).filter(User.email == email).first() is not None
+
+def _create_user(db: Session, user: UserCreate, hashed_password: str) -> User:
     db_user = User(
         name=user.name,
         email=user.email,
@@ -32,38 +42,216 @@ def create_user(
     db.refresh(db_user)
     return db_user
 
+@router.post("/", response_model=UserResponse, status_code=201)
+async def create_user(
+    user: UserCreate,
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Only Admins can create new users with any role (Admin, Manager, or Developer)"""
+    if await run_db(db, _email_registered, user.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    # Hash the password before storing
+    hashed_password = await get_password_pool().hash_async(user.password)
+    return await run_db(db, _create_user, user, hashed_password)
+
+async def _read_bulk_rows(request: Request) -> list:
+    """Raw user rows from a CSV body (header: name,email,role,password) or JSON {"users": [...]}."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        if content_type in CSV_MEDIA_TYPES:
+            rows = list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+        else:
+            payload = json.loads(body)
+            rows = payload.get("users") if isinstance(payload, dict) else payload
+    except (UnicodeDecodeError, ValueError, csv.Error):
+        raise HTTPException(status_code=400, detail="Body must be a CSV file or a JSON list of users")
+
+    if not isinstance(rows, list) or not rows:
+        raise HTTPException(status_code=400, detail="Expected a non-empty list of users")
+    if len(rows) > MAX_BULK_USERS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_USERS} users per request")
+    return rows
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+def _registered_emails(db: Session, emails: List[str]) -> set:
+    if not emails:
+        return set()
+    return set(db.scalars(select(User.email).where(User.email.in_(emails))))
+
+def _insert_users(db: Session, rows: list) -> dict:
+    """
+    INSERT (index, values) rows in executemany batches. A batch that hits the
+    unique email index (a concurrent signup) is retried row by row; returns
+    {index: detail} for the rows that still failed.
+    """
+    failed = {}
+    for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+        batch = rows[start:start + BULK_INSERT_BATCH_SIZE]
+        try:
+            with db.begin_nested():
+                db.execute(insert(User), [values for _, values in batch])
+        except IntegrityError:
+            for index, values in batch:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(User), [values])
+                except IntegrityError:
+                    failed[index] = "Email already registered"
+    return failed
+
+def _bulk_create_users(db: Session, users: list, hashed_passwords: List[str]) -> list:
+    rows = [
+        (index, {"name": user.name, "email": user.email, "password_hash": hashed, "role": user.role})
+        for (index, user), hashed in zip(users, hashed_passwords)
+    ]
+    failed = _insert_users(db, rows)
+
+    emails = [values["email"] for index, values in rows if index not in failed]
+    created = {}
+    if emails:
+        created = {
+            user.email: UserResponse.model_validate(user)
+            for user in db.scalars(select(User).where(User.email.in_(emails)))
+        }
+    db.commit()
+
+    results = []
+    for index, values in rows:
+        if index in failed:
+            results.append({"index": index, "status_code": 400, "detail": failed[index]})
+        else:
+            user = created[values["email"]]
+            results.append({"index": index, "id": user.id, "status_code": 201, "user": user})
+    return results
+
+@router.post(
+    "/bulk",
+    response_model=UserBulkResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "object", "properties": {"users": {
+            "type": "array", "items": {"$ref": "#/components/schemas/UserCreate"}
+        }}}},
+        "text/csv": {"schema": {"type": "string"}},
+    }}},
+)
+async def bulk_create_users(
+    request: Request,
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Only Admins can provision users in bulk, from JSON {"users": [...]} or a CSV
+    body with a name,email,role,password header. Invalid rows and already
+    registered emails are reported per row without aborting the rest.
+    """
+    results, valid, seen = [], [], set()
+    for index, row in enumerate(await _read_bulk_rows(request)):
+        try:
+            user = UserCreate.model_validate(row)
+        except ValidationError as exc:
+            results.append({"index": index, "status_code": 422, "detail": _validation_detail(exc)})
+            continue
+        if user.email in seen:
+            results.append({"index": index, "status_code": 400, "detail": "Email appears more than once in this request"})
+            continue
+        seen.add(user.email)
+        valid.append((index, user))
+
+    # One query for every email, before spending any bcrypt time on them
+    registered = await run_db(db, _registered_emails, [user.email for _, user in valid])
+    for index, user in valid:
+        if user.email in registered:
+            results.append({"index": index, "status_code": 400, "detail": "Email already registered"})
+    valid = [(index, user) for index, user in valid if user.email not in registered]
+
+    hashed_passwords = await get_password_pool().hash_many_async([user.password for _, user in valid])
+    results += await run_db(db, _bulk_create_users, valid, hashed_passwords)
+
+    results.sort(key=lambda result: result["index"])
+    failed = sum(1 for result in results if result["status_code"] >= 400)
+    return {"succeeded": len(results) - failed, "failed": failed, "results": results}
+
 @router.get("/", response_model=List[UserResponse])
-def list_users(
-    db: Session = Depends(get_db),
+async def list_users(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: DBSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """All authenticated users can view the user list"""
-    users = db.query(User).all()
+    """
+    All authenticated users can view the user list.
+    Pass limit/cursor for keyset pagination (next cursor in the X-Next-Cursor header)
+    or format=ndjson to stream the result one user per line.
+    """
+    stmt = projection(User, UserResponse)
+    if format == "ndjson":
+        return stream_ndjson(db, stmt, User, UserResponse, limit=limit, cursor=cursor)
+
+    users, next_cursor = await run_db(db, paginate, stmt, User, limit=limit, cursor=cursor)
+    if settings.FAST_JSON_RESPONSES:
+        return await fast_json_response(users, UserResponse, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return users
 
+def _get_user(db: Session, user_id: int) -> User:
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """All authenticated users can view user details"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return await run_db(db, _get_user, user_id)
+
+def _publish_released(db: Session, user_id: int, task_ids: list):
+    """Task-updated events for the tasks unassigned from the user; call after commit."""
+    for start in range(0, len(task_ids), settings.DELETE_BATCH_SIZE):
+        tasks = db.scalars(select(Task).where(Task.id.in_(task_ids[start:start + settings.DELETE_BATCH_SIZE])))
+        events.publish(*(
+            events.task_event("updated", task.id, task.project_id, [user_id],
+                              TaskResponse.model_validate(task).model_dump(mode="json"))
+            for task in tasks
+        ))
+
+def _release_user(db: Session, user_id: int):
+    released = cascades.release_user(db, user_id)
+    db.commit()
+    _publish_released(db, user_id, released)
+
+def _delete_user(db: Session, user_id: int) -> str:
+    user = _get_user(db, user_id)
+    email = user.email
+    released = cascades.delete_user(db, user)
+    _publish_released(db, user_id, released)
+    return email
 
 @router.delete("/{user_id}", status_code=204)
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
+    shards: Shards = Depends(get_shards),
     current_user: User = Depends(require_admin)
 ):
-    """Only Admins can delete users"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    db.delete(user)
-    db.commit()
+    """
+    Only Admins can delete users.
+    With sharding their tasks and memberships are released shard by shard before the user is deleted.
+    """
+    if shards.sharded:
+        await run_db(db, _get_user, user_id)
+        await shards.scatter(_release_user, user_id)
+    email = await run_db(db, _delete_user, user_id)
+    get_principal_cache().invalidate(email)
     return None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional, List
 from app.models import UserRole, TaskStatus
@@ -66,8 +66,87 @@ class TaskResponse(TaskBase):
     class Config:
         from_attributes = True
 
+MAX_BULK_ITEMS = 1000
+
+class TaskBulkCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+class TaskBulkUpdate(BaseModel):
+    tasks: List[TaskBulkUpdateItem] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class TaskBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class ProjectMembers(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status_code: int
+    detail: Optional[str] = None
+
+class TaskBulkItemResult(BulkItemResult):
+    task: Optional[TaskResponse] = None
+
+class TaskBulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[TaskBulkItemResult]
+
+MAX_BULK_USERS = 2000
+
+class UserBulkItemResult(BulkItemResult):
+    user: Optional[UserResponse] = None
+
+class UserBulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[UserBulkItemResult]
+
+class TaskChanges(BaseModel):
+    changed: List[TaskResponse]
+    deleted: List[int]
+    cursor: str
+    has_more: bool
+
+class ProjectChanges(BaseModel):
+    changed: List[ProjectResponse]
+    deleted: List[int]
+    cursor: str
+    has_more: bool
+
 class DashboardResponse(BaseModel):
     total_projects: int
     total_tasks: int
     tasks_by_status: dict
     overdue_tasks: int
+
+class SearchHit(BaseModel):
+    type: str
+    id: int
+    title: str
+    description: Optional[str] = None
+    project_id: Optional[int] = None
+    score: float
+
+class SearchResults(BaseModel):
+    results: List[SearchHit]
+    has_more: bool
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    target_id: Optional[int] = None
+    status: str
+    processed: int
+    total: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,200 @@
+"""
+Full-text search over task titles/descriptions and project names/descriptions.
+
+Three backends, picked per database:
+
+- MySQL: FULLTEXT indexes, queried with MATCH ... AGAINST in boolean mode.
+- SQLite: FTS5 external-content tables (tasks_fts, projects_fts) kept in sync
+  with their tables by triggers, ranked with bm25().
+- Anything else, or a database whose indexes were never installed: LIKE
+  filters with a title-weighted score. Correct, but a full scan.
+
+The indexes are installed by migration 4 (install()). Every term of the
+query must match, as a word prefix, so "dash widg" finds "Dashboard widget".
+"""
+import re
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, case, column, func, inspect, literal, literal_column, or_, select, table, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+from app.models import Project, Task, User, UserRole
+
+FULLTEXT = "fulltext"
+FTS5 = "fts5"
+LIKE = "like"
+
+TASK = "task"
+PROJECT = "project"
+
+MAX_TERMS = 10
+MAX_OFFSET = 1000
+# How much more a hit in the title (or project name) counts than one in the description
+TITLE_WEIGHT = 10.0
+
+_SEARCHED = {
+    TASK: (Task, Task.title),
+    PROJECT: (Project, Project.name),
+}
+
+_FTS_TABLES = {
+    TASK: ("tasks", "tasks_fts", "title"),
+    PROJECT: ("projects", "projects_fts", "name"),
+}
+
+_FULLTEXT_INDEXES = {
+    TASK: ("tasks", "ft_tasks_search", "title"),
+    PROJECT: ("projects", "ft_projects_search", "name"),
+}
+
+_backends = {}
+
+def terms(q: str) -> list:
+    """The words of a query; punctuation and search-syntax characters are dropped."""
+    words = re.findall(r"\w+", q.lower())
+    if not words:
+        raise HTTPException(status_code=400, detail="Search query has no searchable terms")
+    return list(dict.fromkeys(words))[:MAX_TERMS]
+
+def _install_fts5(connection):
+    for source, fts, title in _FTS_TABLES.values():
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+        ).first()
+        if not exists:
+            connection.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({title}, description, "
+                f"content='{source}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+        new_row = f"INSERT INTO {fts}(rowid, {title}, description) VALUES (new.id, new.{title}, new.description);"
+        old_row = (f"INSERT INTO {fts}({fts}, rowid, {title}, description) "
+                   f"VALUES ('delete', old.id, old.{title}, old.description);")
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN {new_row} END"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN {old_row} END"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {title}, description ON {source} "
+            f"BEGIN {old_row} {new_row} END"
+        )
+
+def _install_fulltext(connection):
+    for source, name, title in _FULLTEXT_INDEXES.values():
+        if name not in {index["name"] for index in inspect(connection).get_indexes(source)}:
+            connection.exec_driver_sql(f"CREATE FULLTEXT INDEX {name} ON {source} ({title}, description)")
+
+def install(connection):
+    """Create the search indexes this database supports; safe to run again."""
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        _install_fulltext(connection)
+    elif dialect == "sqlite" and connection.exec_driver_sql(
+        "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+    ).scalar():
+        _install_fts5(connection)
+    _backends.pop(str(connection.engine.url), None)
+
+def _detect(connection) -> str:
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        installed = {index["name"] for index in inspect(connection).get_indexes("tasks")}
+        return FULLTEXT if _FULLTEXT_INDEXES[TASK][1] in installed else LIKE
+    if dialect == "sqlite":
+        installed = connection.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name IN ('tasks_fts', 'projects_fts')"
+        )).scalar()
+        return FTS5 if installed == 2 else LIKE
+    return LIKE
+
+def backend(db: Session) -> str:
+    """The backend for db's database, detected once per engine."""
+    connection = db.connection()
+    key = str(connection.engine.url)
+    if key not in _backends:
+        _backends[key] = _detect(connection)
+    return _backends[key]
+
+def _fts5_select(kind: str, words: list):
+    model, title = _SEARCHED[kind]
+    _, fts, _ = _FTS_TABLES[kind]
+    index = table(fts, column("rowid"))
+    expression = " ".join(f'"{word}"*' for word in words)
+    score = -func.bm25(literal_column(fts), TITLE_WEIGHT, 1.0)
+    return (
+        select(model.id, title.label("title"), model.description, score.label("score"))
+        .select_from(index)
+        .join(model, model.id == index.c.rowid)
+        .where(literal_column(fts).op("MATCH")(expression))
+    )
+
+def _fulltext_select(kind: str, words: list):
+    model, title = _SEARCHED[kind]
+    score = match(title, model.description, against=" ".join(f"+{word}*" for word in words)).in_boolean_mode()
+    return select(model.id, title.label("title"), model.description, score.label("score")).where(score > 0)
+
+def _like_select(kind: str, words: list):
+    model, title = _SEARCHED[kind]
+    conditions, weights = [], []
+    for word in words:
+        pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        in_title = title.ilike(pattern, escape="\\")
+        in_description = model.description.ilike(pattern, escape="\\")
+        conditions.append(or_(in_title, in_description))
+        weights.append(case((in_title, TITLE_WEIGHT), else_=0.0) + case((in_description, 1.0), else_=0.0))
+    score = sum(weights[1:], weights[0])
+    return select(model.id, title.label("title"), model.description, score.label("score")).where(and_(*conditions))
+
+_SELECTS = {FULLTEXT: _fulltext_select, FTS5: _fts5_select, LIKE: _like_select}
+
+def search(
+    db: Session,
+    current_user: User,
+    q: str,
+    kinds=(TASK, PROJECT),
+    limit: int = 20,
+    offset: int = 0,
+    using: Optional[str] = None,
+) -> dict:
+    """
+    Ranked hits for q, best first. Developers only see tasks assigned to them,
+    as with GET /tasks/{id}; projects are visible to everyone.
+    """
+    words = terms(q)
+    build = _SELECTS[using or backend(db)]
+    wanted = offset + limit + 1
+
+    hits = []
+    for kind in kinds:
+        model, _ = _SEARCHED[kind]
+        stmt = build(kind, words)
+        if kind == TASK:
+            stmt = stmt.add_columns(Task.project_id)
+            if current_user.role == UserRole.DEVELOPER:
+                stmt = stmt.where(Task.assigned_to == current_user.id)
+        else:
+            stmt = stmt.add_columns(literal(None).label("project_id"))
+        stmt = stmt.order_by(literal_column("score").desc(), model.id).limit(wanted)
+        hits.extend({"type": kind, **row._asdict()} for row in db.execute(stmt))
+
+    # Each kind is ranked by its own index; merge them on score, then type and id
+    hits.sort(key=lambda hit: (-hit["score"], hit["type"], hit["id"]))
+    page = hits[offset:offset + limit]
+    return {"results": page, "has_more": len(hits) > offset + limit}
+
+def merge_results(results: list, limit: int, offset: int = 0) -> dict:
+    """
+    Combine search() results from several databases, each run with offset 0 and
+    limit offset + limit, into the requested page.
+    """
+    hits = sorted(
+        (hit for result in results for hit in result["results"]),
+        key=lambda hit: (-hit["score"], hit["type"], hit["id"]),
+    )
+    return {
+        "results": hits[offset:offset + limit],
+        "has_more": len(hits) > offset + limit or any(result["has_more"] for result in results),
+    }
@@ -0,0 +1,80 @@
+"""
+Fast JSON path for large list responses, enabled with FAST_JSON_RESPONSES.
+
+With a response_model FastAPI validates every returned ORM object against the
+schema (from_attributes) before dumping it. Rows loaded by our own queries
+already match the schemas, so the fast path reads the schema's fields straight
+off each object and encodes them with orjson. The bytes are identical to the
+response_model output: same field order, compact separators, ISO datetimes
+and "Z" for UTC.
+"""
+from functools import lru_cache
+from operator import attrgetter
+from typing import List, Optional, Union, get_args, get_origin
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from app import metrics
+
+JSON_MEDIA_TYPE = "application/json"
+
+def _nested_model(annotation):
+    """(model, is_list) when a field holds a schema or a list of schemas, else None."""
+    origin = get_origin(annotation)
+    if origin is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _nested_model(args[0]) if len(args) == 1 else None
+    if origin in (list, List):
+        inner = get_args(annotation)[0]
+        if isinstance(inner, type) and issubclass(inner, BaseModel):
+            return inner, True
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None
+
+class _Plan:
+    def __init__(self, schema, include: Optional[frozenset] = None):
+        # Only the included fields are read, so rows need not carry the others
+        self.fields = [name for name in schema.model_fields if include is None or name in include]
+        self.getter = attrgetter(*self.fields)
+        self.nested = {}
+        for name in self.fields:
+            nested = _nested_model(schema.model_fields[name].annotation)
+            if nested is not None:
+                self.nested[name] = (_plan(nested[0]), nested[1])
+
+    def convert(self, obj) -> dict:
+        values = self.getter(obj)
+        if len(self.fields) == 1:
+            values = (values,)
+        row = dict(zip(self.fields, values))
+        for name, (plan, is_list) in self.nested.items():
+            value = row[name]
+            if value is not None:
+                row[name] = [plan.convert(item) for item in value] if is_list else plan.convert(value)
+        return row
+
+@lru_cache(maxsize=None)
+def _plan(schema, include: Optional[frozenset] = None) -> _Plan:
+    return _Plan(schema, include)
+
+def _plan_for(schema, include: Optional[set]) -> _Plan:
+    return _plan(schema, frozenset(include) if include is not None else None)
+
+def to_builtins(rows, schema, include: Optional[set] = None) -> list:
+    plan = _plan_for(schema, include)
+    return [plan.convert(row) for row in rows]
+
+def dumps(rows, schema, include: Optional[set] = None) -> bytes:
+    return orjson.dumps(to_builtins(rows, schema, include), option=orjson.OPT_UTC_Z)
+
+def dumps_one(row, schema, include: Optional[set] = None) -> bytes:
+    return orjson.dumps(_plan_for(schema, include).convert(row), option=orjson.OPT_UTC_Z)
+
+async def fast_json_response(rows, schema, headers: Optional[dict] = None, include: Optional[set] = None) -> Response:
+    """Encode off the event loop: a 100k-row list takes a noticeable fraction of a second."""
+    with metrics.phase("serialization"):
+        content = await run_in_threadpool(dumps, rows, schema, include)
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=headers)
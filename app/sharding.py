@@ -0,0 +1,628 @@
+"""
+Horizontal sharding of projects and their tasks by project id.
+
+With DATABASE_SHARD_URLS set to a comma-separated list of databases, projects,
+tasks, project_members, dashboard_counters and tombstones live on those shards;
+users, jobs and the shard directory stay on the primary (DATABASE_URL). The
+directory (project_shards) maps every project id to its shard, and inserting a
+directory entry is what allocates a new project's id. Task ids are reserved
+from id_sequences ID_BLOCK_SIZE at a time for one project, so ids stay unique
+across shards and a project moves without renumbering its tasks. id_blocks
+records which project each block went to: a task id leads to its project's
+directory entry, and requests for one task use only that shard.
+
+Handlers work through Shards (get_shards / get_read_shards): project() is the
+one shard a project lives on, scatter() runs a function on every shard in
+parallel and the handler merges the results. Without shards configured, the
+request's primary session stands in as the only shard and none of this adds
+a query. New projects go to the shard with the fewest projects.
+
+    python -m app.sharding setup                       # shard schemas, directory backfill
+    python -m app.sharding status                      # projects per shard, moves in progress
+    python -m app.sharding move <project_id> <shard>   # rebalance one project
+
+A move blocks writes to the project (503), copies it to the target, checks the
+copy against the source, flips the directory entry, then deletes the source
+copy; run it again to resume an interrupted move. A write that passed the check
+just before the block commits during the copy; the check notices and the
+project is copied again. Until the flip reads use the source, afterwards the target,
+and lists skip the copy the directory does not point at.
+"""
+import asyncio
+import logging
+import sys
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+from fastapi import Depends, HTTPException
+from sqlalchemy import MetaData, case, create_engine, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app import cascades, changes, counters, metrics, migrations, search
+from app.config import settings
+from app.database import (
+    Base, DBSession, close_db, engine_options, get_db, is_async_url, run_db, sync_session_factory, sync_url
+)
+from app.models import (
+    DashboardCounter, IdBlock, IdSequence, Project, ProjectShard, Task, Tombstone, project_members
+)
+from app.pagination import merge_pages, paginate as paginate_rows
+from app.replicas import get_read_db
+
+logger = logging.getLogger(__name__)
+
+SHARDED_TABLES = ("projects", "tasks", "project_members", "dashboard_counters", "tombstones")
+TASK_IDS = "tasks"
+ID_BLOCK_SIZE = 100
+COPY_BATCH_SIZE = 1000
+# How often a move copies a project that keeps changing before it gives up
+MOVE_COPY_ATTEMPTS = 3
+
+class Shard:
+    def __init__(self, index: int, url: str):
+        self.index, self.url = index, url
+        self.engine = create_engine(sync_url(url), **engine_options(url))
+        self.sync_sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        if is_async_url(url):
+            self.async_engine = create_async_engine(url, **engine_options(url, asynchronous=True))
+            self.sessionmaker = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        else:
+            self.async_engine = None
+            self.sessionmaker = self.sync_sessionmaker
+
+    async def dispose(self):
+        await run_in_threadpool(self.engine.dispose)
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+
+class ShardSet:
+    def __init__(self, urls: List[str]):
+        self.shards = [Shard(index, url) for index, url in enumerate(urls)]
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    async def dispose(self):
+        await asyncio.gather(*(shard.dispose() for shard in self.shards))
+
+def shard_urls() -> List[str]:
+    return [url.strip() for url in settings.DATABASE_SHARD_URLS.split(",") if url.strip()]
+
+@lru_cache
+def _shard_set(urls: tuple) -> Optional[ShardSet]:
+    return ShardSet(list(urls)) if urls else None
+
+def get_shard_set() -> Optional[ShardSet]:
+    return _shard_set(tuple(shard_urls()))
+
+def sharded_databases(primary_factory) -> list:
+    """(name, sync session factory) of every database holding the sharded tables: the shards, or the primary."""
+    shard_set = get_shard_set()
+    if shard_set is None:
+        return [("primary", primary_factory)]
+    return [(f"shard {shard.index}", shard.sync_sessionmaker) for shard in shard_set.shards]
+
+async def dispose():
+    if _shard_set.cache_info().currsize:
+        shard_set = get_shard_set()
+        if shard_set is not None:
+            await shard_set.dispose()
+
+# Directory and id allocation; these run on the primary
+
+def directory_entries(db: Session, project_ids) -> Dict[int, tuple]:
+    project_ids = set(project_ids)
+    if not project_ids:
+        return {}
+    rows = db.execute(
+        select(ProjectShard.project_id, ProjectShard.shard, ProjectShard.move_shard)
+        .where(ProjectShard.project_id.in_(project_ids))
+    )
+    return {row.project_id: row for row in rows}
+
+def moving_projects(db: Session) -> Dict[int, int]:
+    """Shard the directory points at, for every project in the middle of a move."""
+    rows = db.execute(select(ProjectShard.project_id, ProjectShard.shard).where(ProjectShard.move_shard.is_not(None)))
+    return {row.project_id: row.shard for row in rows}
+
+def place_project(db: Session, shard_count: int) -> tuple:
+    """Allocate a project id on the shard with the fewest projects; returns (project_id, shard)."""
+    counts = dict(db.execute(select(ProjectShard.shard, func.count()).group_by(ProjectShard.shard)).all())
+    shard = min(range(shard_count), key=lambda index: (counts.get(index, 0), index))
+    entry = ProjectShard(shard=shard)
+    db.add(entry)
+    db.flush()
+    project_id = entry.project_id
+    db.commit()
+    return project_id, shard
+
+def forget_project(db: Session, project_id: int):
+    db.execute(delete(ProjectShard).where(ProjectShard.project_id == project_id))
+    db.commit()
+
+def id_block_entry(db: Session, name: str, row_id: int):
+    """
+    Directory entry of the project the id's block was reserved for, or None for
+    ids without a block (rows from before sharding) and projects that are gone.
+    Blocks outlive their project: other workers may still hold ids from them.
+    """
+    return db.execute(
+        select(ProjectShard.project_id, ProjectShard.shard, ProjectShard.move_shard)
+        .join(IdBlock, IdBlock.project_id == ProjectShard.project_id)
+        .where(IdBlock.name == name, IdBlock.first_id <= row_id, IdBlock.first_id + IdBlock.size > row_id)
+    ).first()
+
+def reserve_ids(db: Session, name: str, size: int, project_id: Optional[int] = None) -> int:
+    """Reserve size consecutive ids of the named sequence, recorded as project_id's when given; returns the first."""
+    stmt = update(IdSequence).where(IdSequence.name == name).values(next_id=IdSequence.next_id + size)
+    if not db.execute(stmt).rowcount:
+        try:
+            with db.begin_nested():
+                db.add(IdSequence(name=name, next_id=1))
+        except IntegrityError:
+            pass
+        db.execute(stmt)
+    start = db.scalar(select(IdSequence.next_id).where(IdSequence.name == name)) - size
+    if project_id is not None:
+        db.add(IdBlock(name=name, first_id=start, size=size, project_id=project_id))
+    db.commit()
+    return start
+
+def seed_ids(db: Session, name: str, next_id: int):
+    """Move the named sequence past next_id - 1, e.g. past rows that predate it."""
+    if db.get(IdSequence, name) is None:
+        db.add(IdSequence(name=name, next_id=next_id))
+    else:
+        db.execute(update(IdSequence).where(IdSequence.name == name, IdSequence.next_id < next_id)
+                   .values(next_id=next_id))
+
+class IdBlocks:
+    """Hands out ids reserved a block per project at a time, so most inserts do not touch the primary."""
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        # (database, sequence name, project id) -> reserved ranges not handed out yet
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def _take(self, key: tuple, count: int) -> list:
+        ids = []
+        with self._lock:
+            ranges = self._free.get(key, [])
+            while ranges and len(ids) < count:
+                taken = ranges[0][:count - len(ids)]
+                ids.extend(taken)
+                rest = ranges[0][len(taken):]
+                if rest:
+                    ranges[0] = rest
+                else:
+                    ranges.pop(0)
+        return ids
+
+    def allocate(self, db: Session, name: str, project_ids: list) -> list:
+        """A new id for each entry of project_ids, from blocks reserved for that project."""
+        allocated = {}
+        for project_id in set(project_ids):
+            key, count = (str(db.get_bind().url), name, project_id), project_ids.count(project_id)
+            ids = self._take(key, count)
+            while len(ids) < count:
+                # Reserved without holding the lock: under an AsyncSession this runs on the event loop
+                size = max(self.block_size, count - len(ids))
+                start = reserve_ids(db, name, size, project_id)
+                with self._lock:
+                    self._free.setdefault(key, []).append(range(start, start + size))
+                ids.extend(self._take(key, count - len(ids)))
+            allocated[project_id] = iter(ids)
+        return [next(allocated[project_id]) for project_id in project_ids]
+
+id_blocks = IdBlocks(ID_BLOCK_SIZE)
+
+def _in_own_session(primary: DBSession, fn, *args):
+    """fn(session, *args) in a primary session of its own, so its commit leaves the request's transaction alone."""
+    with sync_session_factory(primary)() as db:
+        return fn(db, *args)
+
+def _task_projects(db: Session, task_ids: list) -> Dict[int, int]:
+    return dict(db.execute(select(Task.id, Task.project_id).where(Task.id.in_(task_ids))).all())
+
+def _moving_error() -> HTTPException:
+    return HTTPException(
+        status_code=503, detail="Project is being moved between shards, retry shortly", headers={"Retry-After": "5"}
+    )
+
+class Shards:
+    """
+    The shards one request works with, or a view of some of them. Shard sessions
+    are opened on first use and closed with the request. Without sharding the
+    primary session is the only shard.
+    """
+
+    def __init__(self, primary: DBSession, shard_set: Optional[ShardSet] = None, indexes: Optional[tuple] = None,
+                 sessions: Optional[dict] = None):
+        self.primary = primary
+        self.shard_set = shard_set
+        if indexes is None:
+            indexes = tuple(range(len(shard_set))) if shard_set is not None else (0,)
+        self.indexes = indexes
+        self._sessions = {} if sessions is None else sessions
+
+    @property
+    def sharded(self) -> bool:
+        return self.shard_set is not None
+
+    def session(self, index: int) -> DBSession:
+        if not self.sharded:
+            return self.primary
+        db = self._sessions.get(index)
+        if db is None:
+            db = self._sessions[index] = self.shard_set.shards[index].sessionmaker()
+        return db
+
+    @property
+    def db(self) -> DBSession:
+        """The session of a view of a single shard, as returned by project() and task()."""
+        (index,) = self.indexes
+        return self.session(index)
+
+    def sync_sessionmaker(self) -> Optional[sessionmaker]:
+        """Sync sessions on a single-shard view's shard, for background work; None without sharding."""
+        if not self.sharded:
+            return None
+        (index,) = self.indexes
+        return self.shard_set.shards[index].sync_sessionmaker
+
+    def _view(self, indexes: tuple) -> "Shards":
+        return Shards(self.primary, self.shard_set, indexes, self._sessions)
+
+    async def run(self, index: int, fn, *args, **kwargs):
+        return await run_db(self.session(index), fn, *args, **kwargs)
+
+    async def scatter(self, fn, *args, **kwargs) -> list:
+        """fn(session, *args, **kwargs) on every shard of this view in parallel; results in shard order."""
+        if len(self.indexes) == 1:
+            return [await self.run(self.indexes[0], fn, *args, **kwargs)]
+        return list(await asyncio.gather(*(self.run(index, fn, *args, **kwargs) for index in self.indexes)))
+
+    async def locate(self, project_id: int, write: bool = False) -> Optional[int]:
+        """Index of the shard holding project_id, or None; writes to a moving project get 503."""
+        if not self.sharded:
+            return 0
+        entry = (await run_db(self.primary, directory_entries, [project_id])).get(project_id)
+        if entry is None:
+            return None
+        if write and entry.move_shard is not None:
+            raise _moving_error()
+        return entry.shard
+
+    async def project(self, project_id: int, write: bool = False) -> "Shards":
+        """A view of the shard holding project_id; 404 when there is none."""
+        index = await self.locate(project_id, write)
+        if index is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return self._view((index,))
+
+    async def narrow(self, project_id: int) -> "Shards":
+        """A view of the shard holding project_id, or of no shard when the project does not exist."""
+        if not self.sharded:
+            return self
+        index = await self.locate(project_id)
+        return self._view(() if index is None else (index,))
+
+    async def partition(self, project_ids: list, write: bool = False) -> tuple:
+        """({shard index: positions in project_ids}, positions of unknown projects)."""
+        if not self.sharded:
+            return {0: list(range(len(project_ids)))}, []
+        entries = await run_db(self.primary, directory_entries, project_ids)
+        groups, missing = {}, []
+        for position, project_id in enumerate(project_ids):
+            entry = entries.get(project_id)
+            if entry is None:
+                missing.append(position)
+                continue
+            if write and entry.move_shard is not None:
+                raise _moving_error()
+            groups.setdefault(entry.shard, []).append(position)
+        return groups, missing
+
+    async def locate_tasks(self, task_ids, write: bool = False) -> Dict[int, int]:
+        """Shard index by task id; ids no shard holds are left out (all are kept without sharding)."""
+        task_ids = list(set(task_ids))
+        if not self.sharded:
+            return {task_id: 0 for task_id in task_ids}
+        found = await self.scatter(_task_projects, task_ids)
+        entries = await run_db(self.primary, directory_entries, {pid for tasks in found for pid in tasks.values()})
+        located = {}
+        for index, tasks in zip(self.indexes, found):
+            for task_id, project_id in tasks.items():
+                entry = entries.get(project_id)
+                if entry is None or entry.shard != index:
+                    # Left over from an unfinished move, or a copy still being made
+                    continue
+                if write and entry.move_shard is not None:
+                    raise _moving_error()
+                located[task_id] = index
+        return located
+
+    async def task(self, task_id: int, write: bool = False) -> "Shards":
+        """
+        A view of the shard holding task_id, found through its id block and the
+        directory; only ids without a block ask every shard. 404 when there is none.
+        """
+        entry = await run_db(self.primary, id_block_entry, TASK_IDS, task_id) if self.sharded else None
+        if entry is not None:
+            if write and entry.move_shard is not None:
+                raise _moving_error()
+            return self._view((entry.shard,))
+        index = (await self.locate_tasks([task_id], write)).get(task_id)
+        if index is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return self._view((index,))
+
+    async def _write_directory(self, fn, *args):
+        """
+        Directory entries and id reservations commit on their own, not with the
+        request's primary session, which may still have work of the handler pending.
+        """
+        with metrics.phase("db"):
+            return await run_in_threadpool(_in_own_session, self.primary, fn, *args)
+
+    async def place(self) -> tuple:
+        """(project_id, view of its shard) for a new project; the id is None without sharding."""
+        if not self.sharded:
+            return None, self
+        project_id, index = await self._write_directory(place_project, len(self.shard_set))
+        return project_id, self._view((index,))
+
+    async def forget(self, project_id: int):
+        if self.sharded:
+            await self._write_directory(forget_project, project_id)
+
+    async def task_ids(self, project_ids: list) -> Optional[list]:
+        """A new task id for each entry of project_ids, or None to let the database assign them."""
+        if not self.sharded or not project_ids:
+            return None
+        return await self._write_directory(id_blocks.allocate, TASK_IDS, project_ids)
+
+    async def authoritative(self, results: list, project_of) -> list:
+        """
+        Per-shard row lists without the rows of moving projects that come from the
+        shard the directory does not point at, so no row is listed twice.
+        """
+        if not self.sharded or len(self.indexes) <= 1:
+            return results
+        moving = await run_db(self.primary, moving_projects)
+        if not moving:
+            return results
+        return [
+            [row for row in rows if moving.get(project_of(row), index) == index]
+            for index, rows in zip(self.indexes, results)
+        ]
+
+    async def close(self):
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for db in sessions:
+            await close_db(db)
+
+async def paginate(shards: Shards, stmt, model, limit: Optional[int] = None, cursor: Optional[str] = None,
+                   sort: str = "id", project_of=lambda row: row.project_id):
+    """pagination.paginate() across the shards of the view, merged into one page."""
+    pages = await shards.scatter(paginate_rows, stmt, model, limit=limit, cursor=cursor, sort=sort)
+    if shards.sharded:
+        kept = await shards.authoritative([rows for rows, _ in pages], project_of)
+        pages = [(rows, next_cursor) for rows, (_, next_cursor) in zip(kept, pages)]
+    return merge_pages(pages, limit, cursor, sort)
+
+async def read_changes(shards: Shards, stmt, model, entity: str, since: Optional[str] = None,
+                       limit: Optional[int] = None, tombstone_filter=None, project_of=lambda row: row.project_id):
+    """changes.read_changes() across the shards of the view."""
+    horizon = changes.settled_horizon()
+    pages = await shards.scatter(changes.read_changes_page, stmt, model, entity, since, limit, tombstone_filter, horizon)
+    if shards.sharded:
+        rows = await shards.authoritative([page_rows for page_rows, _ in pages], project_of)
+        tombstones = await shards.authoritative([page_tombstones for _, page_tombstones in pages],
+                                                lambda tombstone: tombstone.project_id)
+        pages = list(zip(rows, tombstones))
+    return changes.merge_changes(pages, since, limit, horizon)
+
+async def get_shards(db: DBSession = Depends(get_db)):
+    shards = Shards(db, get_shard_set())
+    try:
+        yield shards
+    finally:
+        await shards.close()
+
+async def get_read_shards(db: DBSession = Depends(get_read_db)):
+    """Shards whose primary session may be a read replica's; for GET handlers only."""
+    shards = Shards(db, get_shard_set())
+    try:
+        yield shards
+    finally:
+        await shards.close()
+
+# Schema setup and rebalancing
+
+def shard_metadata() -> MetaData:
+    """The sharded tables, without their foreign keys to users, which live on the primary."""
+    metadata = MetaData()
+    for name in SHARDED_TABLES:
+        table = Base.metadata.tables[name].to_metadata(metadata)
+        for foreign_key in list(table.foreign_keys):
+            if foreign_key.target_fullname.startswith("users."):
+                table.constraints.discard(foreign_key.constraint)
+                table.foreign_keys.discard(foreign_key)
+                foreign_key.parent.foreign_keys.discard(foreign_key)
+    return metadata
+
+def setup_shards(primary_factory, shard_set: ShardSet):
+    """
+    Create missing shard tables, search indexes and counters, add projects the
+    directory does not know yet, and move the task id sequence past every shard's tasks.
+    """
+    metadata = shard_metadata()
+    with primary_factory() as primary:
+        known = set(primary.scalars(select(ProjectShard.project_id)))
+        next_task_id = 1
+        for shard in shard_set.shards:
+            with shard.engine.begin() as connection:
+                metadata.create_all(connection)
+                migrations.widen_timestamps(connection)
+                migrations.replace_overdue_index(connection)
+                migrations.add_project_deleting(connection)
+                search.install(connection)
+            with shard.sync_sessionmaker() as db:
+                counters.ensure_initialized(db)
+                project_ids = db.scalars(select(Project.id)).all()
+                next_task_id = max(next_task_id, (db.scalar(select(func.max(Task.id))) or 0) + 1)
+            new = [project_id for project_id in project_ids if project_id not in known]
+            if new:
+                primary.execute(insert(ProjectShard), [{"project_id": pid, "shard": shard.index} for pid in new])
+                known.update(new)
+        seed_ids(primary, TASK_IDS, next_task_id)
+        primary.commit()
+
+def _drop_copy(shard: Shard, project_id: int):
+    """Delete a project's rows from shard without reporting them deleted, including its task tombstones."""
+    with shard.sync_sessionmaker() as db:
+        project = db.get(Project, project_id)
+        if project is not None:
+            cascades.delete_project(db, project, commit_batches=True, tombstones=False)
+        db.execute(delete(Tombstone).where(Tombstone.project_id == project_id))
+        db.commit()
+
+def _copy_project(source: Shard, target: Shard, project_id: int) -> int:
+    """Copy a project with its members, counters, tasks and task tombstones in one target transaction."""
+    _drop_copy(target, project_id)
+    with source.sync_sessionmaker() as src, target.sync_sessionmaker() as dst:
+        project = src.execute(select(Project.__table__).where(Project.id == project_id)).mappings().first()
+        if project is None:
+            raise ValueError(f"Project {project_id} is not on shard {source.index}")
+        dst.execute(insert(Project.__table__), [dict(project)])
+
+        members = src.execute(select(project_members).where(project_members.c.project_id == project_id)).mappings()
+        members = [dict(member) for member in members]
+        if members:
+            dst.execute(insert(project_members), members)
+
+        counter = src.execute(
+            select(DashboardCounter.__table__).where(DashboardCounter.project_id == project_id)
+        ).mappings().first()
+        counters.project_copied(dst, project_id, dict(counter) if counter else {})
+
+        copied, last_id = 0, 0
+        while True:
+            rows = src.execute(
+                select(Task.__table__).where(Task.project_id == project_id, Task.id > last_id)
+                .order_by(Task.id).limit(COPY_BATCH_SIZE)
+            ).mappings().all()
+            if not rows:
+                break
+            dst.execute(insert(Task.__table__), [dict(row) for row in rows])
+            copied, last_id = copied + len(rows), rows[-1]["id"]
+
+        # Tombstone ids are per shard; the copies get new ones
+        tombstones = src.execute(select(Tombstone.__table__).where(Tombstone.project_id == project_id)).mappings()
+        tombstones = [{key: value for key, value in row.items() if key != "id"} for row in tombstones]
+        if tombstones:
+            dst.execute(insert(Tombstone.__table__), tombstones)
+        dst.commit()
+    return copied
+
+def _fingerprint(shard: Shard, project_id: int) -> tuple:
+    """
+    What any write to the project changes: its row counts, the latest updated_at
+    and deleted_at, and the overdue flags, which the sweeper sets without updated_at.
+    """
+    with shard.sync_sessionmaker() as db:
+        project = db.scalar(select(Project.updated_at).where(Project.id == project_id))
+        members = db.scalar(
+            select(func.count()).select_from(project_members).where(project_members.c.project_id == project_id)
+        )
+        tasks = db.execute(
+            select(func.count(), func.max(Task.updated_at), func.count(case((Task.is_overdue, 1))))
+            .where(Task.project_id == project_id)
+        ).one()
+        tombstones = db.execute(
+            select(func.count(), func.max(Tombstone.deleted_at)).where(Tombstone.project_id == project_id)
+        ).one()
+    return project, members, *tasks, *tombstones
+
+def _copy_verified(source: Shard, target: Shard, project_id: int) -> int:
+    """_copy_project() until the copy matches the source, so no write that slipped past the block is lost."""
+    for _ in range(MOVE_COPY_ATTEMPTS):
+        copied = _copy_project(source, target, project_id)
+        if _fingerprint(source, project_id) == _fingerprint(target, project_id):
+            return copied
+        logger.info("Project %d changed while it was copied, copying it again", project_id)
+    raise RuntimeError(f"Project {project_id} kept changing while it was copied; run the move again")
+
+def move_project(primary_factory, shard_set: ShardSet, project_id: int, target: int) -> int:
+    """Move a project and its tasks to the target shard; returns the number of tasks copied."""
+    if not 0 <= target < len(shard_set):
+        raise ValueError(f"No shard {target}; shards are 0-{len(shard_set) - 1}")
+    copied = 0
+    with primary_factory() as primary:
+        entry = primary.get(ProjectShard, project_id)
+        if entry is None:
+            raise ValueError(f"Project {project_id} is not in the shard directory")
+        if entry.shard == target and entry.move_shard is None:
+            return 0
+
+        if entry.shard != target:
+            if entry.move_shard is not None and entry.move_shard != target:
+                # An interrupted move to another shard left a partial copy there
+                _drop_copy(shard_set.shards[entry.move_shard], project_id)
+            entry.move_shard = target
+            primary.commit()
+            source = entry.shard
+            copied = _copy_verified(shard_set.shards[source], shard_set.shards[target], project_id)
+            entry.shard, entry.move_shard = target, source
+            primary.commit()
+
+        _drop_copy(shard_set.shards[entry.move_shard], project_id)
+        entry.move_shard = None
+        primary.commit()
+    logger.info("Moved project %d to shard %d (%d tasks)", project_id, target, copied)
+    return copied
+
+def status(primary_factory, shard_set: ShardSet) -> list:
+    with primary_factory() as primary:
+        projects = dict(primary.execute(select(ProjectShard.shard, func.count()).group_by(ProjectShard.shard)).all())
+        moving = primary.execute(
+            select(ProjectShard.project_id, ProjectShard.shard, ProjectShard.move_shard)
+            .where(ProjectShard.move_shard.is_not(None))
+        ).all()
+    return [
+        {
+            "shard": shard.index,
+            "url": shard.engine.url.render_as_string(hide_password=True),
+            "projects": projects.get(shard.index, 0),
+            "moving": [row.project_id for row in moving if shard.index in (row.shard, row.move_shard)],
+        }
+        for shard in shard_set.shards
+    ]
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    shards_configured = get_shard_set()
+    command, arguments = sys.argv[1] if len(sys.argv) > 1 else "", sys.argv[2:]
+    if shards_configured is None:
+        print("DATABASE_SHARD_URLS is not set")
+        sys.exit(2)
+    if command == "setup" and not arguments:
+        setup_shards(SessionLocal, shards_configured)
+        print(f"Set up {len(shards_configured)} shards")
+    elif command == "status" and not arguments:
+        for row in status(SessionLocal, shards_configured):
+            moving = f"  moving: {row['moving']}" if row["moving"] else ""
+            print(f"{row['shard']:>4}  {row['projects']:>8} projects  {row['url']}{moving}")
+    elif command == "move" and len(arguments) == 2 and all(argument.isdigit() for argument in arguments):
+        project_id, target = map(int, arguments)
+        tasks = move_project(SessionLocal, shards_configured, project_id, target)
+        print(f"Project {project_id} is on shard {target} ({tasks} tasks copied)")
+    else:
+        print("Usage: python -m app.sharding [setup|status|move <project_id> <shard>]")
+        sys.exit(2)
@@ -0,0 +1,375 @@
+"""
+Load benchmark for the API: seed a SQLite database with a configurable
+dataset, drive each endpoint in-process under concurrent load and report
+throughput and p50/p95/p99 latency per endpoint. Results are written as
+JSON so two runs can be compared.
+
+    python -m benchmarks.load                           # small dataset, every endpoint
+    python -m benchmarks.load --size large --concurrency 32 --output after.json
+    python -m benchmarks.load --endpoints tasks.list,dashboard --compare before.json
+
+Datasets (--users/--projects/--tasks override a size):
+
+    small    500 users    100 projects      10k tasks
+    medium   5k users     1k projects      100k tasks
+    large    50k users    10k projects       1M tasks
+
+Team membership and task counts follow a Zipf distribution, so a few users
+sit on many teams and a few projects hold most of the tasks. The seeded
+database is kept (--db, default ./benchmark.db) and reused while its
+dataset parameters match. Write endpoints run after the creates that supply
+their ids, so deletes only remove rows the benchmark created.
+The event stream and websocket are long-lived and are not driven.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+SIZES = {
+    "small": {"users": 500, "projects": 100, "tasks": 10_000},
+    "medium": {"users": 5_000, "projects": 1_000, "tasks": 100_000},
+    "large": {"users": 50_000, "projects": 10_000, "tasks": 1_000_000},
+}
+PASSWORD = "benchmark-password"
+WORDS = ["design", "review", "deploy", "refactor", "migrate", "billing", "search", "invoice", "report",
+         "mobile", "onboarding", "export", "latency", "cache", "payments", "audit", "release", "schema"]
+INSERT_BATCH_SIZE = 10_000
+ZIPF_EXPONENT = 1.1
+
+@dataclass(frozen=True)
+class Dataset:
+    users: int
+    projects: int
+    tasks: int
+    seed: int = 42
+
+def zipf_weights(count: int) -> list:
+    return [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(count)]
+
+def _batches(rows, size: int = INSERT_BATCH_SIZE):
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+def seed(database_url: str, dataset: Dataset):
+    """Create the schema and insert the dataset into an empty database."""
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+    from app import counters, database, migrations, overdue
+    from app.config import settings
+    from app.hashing import bcrypt_hash
+    from app.models import Project, Task, TaskStatus, User, UserRole, project_members
+
+    rng = random.Random(dataset.seed)
+    now = datetime.utcnow()
+    engine = database.get_engine()
+    migrations.upgrade(engine)
+    password_hash = bcrypt_hash(PASSWORD, settings.BCRYPT_ROUNDS)
+
+    # Users 1-3 are the admin, manager and developer the benchmark acts as
+    roles = [UserRole.ADMIN, UserRole.MANAGER, UserRole.DEVELOPER]
+    with Session(engine) as db:
+        for batch in _batches(
+            {"id": i, "name": f"User {i}", "email": f"user{i}@bench.example.com", "password_hash": password_hash,
+             "role": roles[i - 1] if i <= 3 else UserRole.DEVELOPER, "created_at": now}
+            for i in range(1, dataset.users + 1)
+        ):
+            db.execute(insert(User), batch)
+
+        db.execute(insert(Project), [
+            {"id": i, "name": f"{rng.choice(WORDS).title()} project {i}", "description": f"Benchmark project {i}",
+             "created_at": now, "updated_at": now}
+            for i in range(1, dataset.projects + 1)
+        ])
+
+        user_ids, user_weights = list(range(1, dataset.users + 1)), zipf_weights(dataset.users)
+        teams = {}
+        for project_id in range(1, dataset.projects + 1):
+            size = min(dataset.users, 1 + int(rng.paretovariate(1.5) * 2), 50)
+            teams[project_id] = sorted(set(rng.choices(user_ids, user_weights, k=size)))
+        db.execute(insert(project_members), [
+            {"project_id": project_id, "user_id": user_id} for project_id, team in teams.items() for user_id in team
+        ])
+
+        project_ids = list(range(1, dataset.projects + 1))
+        project_weights = zipf_weights(dataset.projects)
+        statuses = list(TaskStatus)
+
+        def task(i: int) -> dict:
+            project_id = rng.choices(project_ids, project_weights)[0]
+            status = rng.choice(statuses)
+            deadline = now + timedelta(hours=rng.randint(-24 * 30, 24 * 60)) if rng.random() < 0.7 else None
+            return {
+                "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+                "description": " ".join(rng.choices(WORDS, k=6)), "status": status, "deadline": deadline,
+                "is_overdue": overdue.is_overdue(deadline, status, now), "project_id": project_id,
+                "assigned_to": rng.choice(teams[project_id]) if rng.random() < 0.8 else None,
+                "created_at": now, "updated_at": now,
+            }
+
+        for batch in _batches(task(i) for i in range(1, dataset.tasks + 1)):
+            db.execute(insert(Task), batch)
+        db.commit()
+        counters.reconcile(db)
+
+def prepare(path: str, dataset: Dataset):
+    """Reuse the database at path if it holds this dataset, otherwise seed a new one."""
+    meta_path = f"{path}.json"
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as meta:
+            if json.load(meta) == asdict(dataset):
+                return
+    for stale in (path, meta_path):
+        if os.path.exists(stale):
+            os.remove(stale)
+    started = time.perf_counter()
+    print(f"Seeding {path}: {dataset.users} users, {dataset.projects} projects, {dataset.tasks} tasks")
+    seed(f"sqlite:///{path}", dataset)
+    with open(meta_path, "w") as meta:
+        json.dump(asdict(dataset), meta)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+@dataclass
+class Context:
+    dataset: Dataset
+    headers: dict
+    rng: random.Random
+    created: dict = field(default_factory=dict)
+    counter: itertools.count = field(default_factory=itertools.count)
+
+    def pool(self, name: str) -> list:
+        return self.created.setdefault(name, [])
+
+    def project_id(self) -> int:
+        return self.rng.randint(1, self.dataset.projects)
+
+    def task_id(self) -> int:
+        return self.rng.randint(1, self.dataset.tasks)
+
+    def user_id(self) -> int:
+        return self.rng.randint(4, max(4, self.dataset.users))
+
+    def unique(self) -> str:
+        return f"{os.getpid()}-{time.time_ns()}-{next(self.counter)}"
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    role: str
+    # request(ctx) -> (method, url, httpx keyword arguments)
+    request: Callable
+    # Called with the parsed JSON body of each successful response
+    collect: Optional[Callable] = None
+
+def _json(body) -> dict:
+    return {"json": body}
+
+ENDPOINTS = [
+    Endpoint("root", "developer", lambda ctx: ("GET", "/", {})),
+    Endpoint("token", "anonymous", lambda ctx: (
+        "POST", "/token", {"data": {"username": "user3@bench.example.com", "password": PASSWORD}})),
+    Endpoint("register", "anonymous", lambda ctx: ("POST", "/register", _json(
+        {"name": "Registered", "email": f"r{ctx.unique()}@bench.example.com", "password": PASSWORD, "role": "Developer"}))),
+    Endpoint("users.create", "admin", lambda ctx: ("POST", "/users/", _json(
+        {"name": "Created", "email": f"c{ctx.unique()}@bench.example.com", "password": PASSWORD, "role": "Developer"})),
+        lambda ctx, body: ctx.pool("users").append(body["id"])),
+    Endpoint("users.list", "admin", lambda ctx: ("GET", "/users/", {"params": {"limit": 50}})),
+    Endpoint("users.get", "admin", lambda ctx: ("GET", f"/users/{ctx.user_id()}", {})),
+    Endpoint("users.delete", "admin", lambda ctx: ("DELETE", f"/users/{ctx.pool('users').pop()}", {})),
+    Endpoint("projects.create", "manager", lambda ctx: ("POST", "/projects/", _json(
+        {"name": f"Created {ctx.unique()}", "team_member_ids": [ctx.user_id()]})),
+        lambda ctx, body: ctx.pool("projects").append(body["id"])),
+    Endpoint("projects.list", "developer", lambda ctx: ("GET", "/projects/", {"params": {"limit": 50}})),
+    Endpoint("projects.get", "developer", lambda ctx: ("GET", f"/projects/{ctx.project_id()}", {})),
+    Endpoint("projects.changes", "developer", lambda ctx: ("GET", "/projects/changes", {"params": {"limit": 100}})),
+    Endpoint("projects.update", "manager", lambda ctx: (
+        "PUT", f"/projects/{ctx.rng.choice(ctx.pool('projects'))}", _json({"description": ctx.unique()}))),
+    Endpoint("projects.members.add", "manager", lambda ctx: _add_member(ctx)),
+    Endpoint("projects.members.remove", "manager", lambda ctx: _remove_member(ctx)),
+    Endpoint("projects.delete", "manager", lambda ctx: ("DELETE", f"/projects/{ctx.pool('projects').pop()}", {})),
+    Endpoint("tasks.create", "manager", lambda ctx: ("POST", "/tasks/", _json(
+        {"title": f"Created {ctx.rng.choice(WORDS)}", "project_id": ctx.project_id(),
+         "deadline": (datetime.utcnow() + timedelta(days=ctx.rng.randint(-3, 10))).isoformat()})),
+        lambda ctx, body: ctx.pool("tasks").append(body["id"])),
+    Endpoint("tasks.list", "manager", lambda ctx: ("GET", "/tasks/", {"params": {"limit": 50}})),
+    Endpoint("tasks.list.project", "manager", lambda ctx: (
+        "GET", "/tasks/", {"params": {"project_id": ctx.project_id(), "limit": 50}})),
+    Endpoint("tasks.list.developer", "developer", lambda ctx: ("GET", "/tasks/", {"params": {"limit": 50}})),
+    Endpoint("tasks.get", "manager", lambda ctx: ("GET", f"/tasks/{ctx.task_id()}", {})),
+    Endpoint("tasks.due", "manager", lambda ctx: ("GET", "/tasks/due", {"params": {"within": "7d", "limit": 50}})),
+    Endpoint("tasks.changes", "manager", lambda ctx: ("GET", "/tasks/changes", {"params": {"limit": 100}})),
+    Endpoint("tasks.update", "manager", lambda ctx: ("PUT", f"/tasks/{ctx.task_id()}", _json(
+        {"status": ctx.rng.choice(["To Do", "In Progress", "Done"])}))),
+    Endpoint("tasks.bulk.create", "manager", lambda ctx: ("POST", "/tasks/bulk", _json({"tasks": [
+        {"title": f"Bulk {ctx.rng.choice(WORDS)}", "project_id": ctx.project_id()} for _ in range(10)]})),
+        lambda ctx, body: ctx.pool("bulk").append([result["id"] for result in body["results"]])),
+    Endpoint("tasks.bulk.update", "manager", lambda ctx: ("PATCH", "/tasks/bulk", _json({"tasks": [
+        {"id": ctx.task_id(), "status": ctx.rng.choice(["To Do", "In Progress", "Done"])} for _ in range(10)]}))),
+    Endpoint("tasks.bulk.delete", "manager", lambda ctx: (
+        "DELETE", "/tasks/bulk", _json({"ids": ctx.pool("bulk").pop()}))),
+    Endpoint("tasks.delete", "manager", lambda ctx: ("DELETE", f"/tasks/{ctx.pool('tasks').pop()}", {})),
+    Endpoint("dashboard", "developer", lambda ctx: ("GET", "/dashboard/", {})),
+    Endpoint("search", "developer", lambda ctx: (
+        "GET", "/search", {"params": {"q": " ".join(ctx.rng.sample(WORDS, 2)), "limit": 20}})),
+    Endpoint("admin.db_pool", "admin", lambda ctx: ("GET", "/admin/db-pool", {})),
+    Endpoint("admin.password_pool", "admin", lambda ctx: ("GET", "/admin/password-pool", {})),
+    Endpoint("admin.principals", "admin", lambda ctx: ("GET", "/admin/cache/principals", {})),
+    Endpoint("admin.events", "admin", lambda ctx: ("GET", "/admin/events", {})),
+]
+
+def _add_member(ctx: Context) -> tuple:
+    project_id, user_id = ctx.rng.choice(ctx.pool("projects")), ctx.user_id()
+    ctx.pool("members").append((project_id, user_id))
+    return "POST", f"/projects/{project_id}/members", _json({"user_ids": [user_id]})
+
+def _remove_member(ctx: Context) -> tuple:
+    project_id, user_id = ctx.pool("members").pop()
+    return "DELETE", f"/projects/{project_id}/members", _json({"user_ids": [user_id]})
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))]
+
+async def drive(client, ctx: Context, endpoint: Endpoint, requests: int, concurrency: int) -> dict:
+    latencies, errors = [], {}
+    remaining = itertools.count()
+
+    async def worker():
+        while next(remaining) < requests:
+            try:
+                method, url, kwargs = endpoint.request(ctx)
+            except IndexError:  # the create run that feeds this endpoint had failures
+                errors["no ids"] = errors.get("no ids", 0) + 1
+                continue
+            headers = ctx.headers.get(endpoint.role, {})
+            started = time.perf_counter()
+            response = await client.request(method, url, headers=headers, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+            elif endpoint.collect is not None:
+                endpoint.collect(ctx, response.json())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {"requests": len(latencies), "errors": errors, "seconds": round(elapsed, 4),
+              "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0}
+    if latencies:
+        result.update({
+            f"{name}_ms": round(percentile(latencies, fraction) * 1000, 3)
+            for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+        })
+        result["mean_ms"] = round(sum(latencies) / len(latencies) * 1000, 3)
+    return result
+
+async def run(dataset: Dataset, endpoints: list, requests: int, concurrency: int) -> dict:
+    from httpx import ASGITransport, AsyncClient
+    from app.auth import create_access_token
+    from app.main import create_app
+
+    app = create_app()
+    ctx = Context(dataset=dataset, rng=random.Random(dataset.seed), headers={
+        role: {"Authorization": f"Bearer {create_access_token(data={'sub': f'user{user_id}@bench.example.com'})}"}
+        for role, user_id in (("admin", 1), ("manager", 2), ("developer", 3))
+    })
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for endpoint in endpoints:
+                # One untimed request warms caches and connections
+                await drive(client, ctx, endpoint, 1, 1)
+                results[endpoint.name] = await drive(client, ctx, endpoint, requests, concurrency)
+                print(_row(endpoint.name, results[endpoint.name]), flush=True)
+    return results
+
+def _row(name: str, result: dict) -> str:
+    errors = sum(result["errors"].values())
+    return (f"{name:<26}{result['requests']:>7}{errors:>7}{result['throughput']:>10.1f}"
+            f"{result.get('p50_ms', 0):>10.2f}{result.get('p95_ms', 0):>10.2f}{result.get('p99_ms', 0):>10.2f}")
+
+def compare(results: dict, baseline_path: str, threshold: float) -> list:
+    """Print p95 and throughput changes against a previous run; returns the regressed endpoints."""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)["endpoints"]
+    regressions = []
+    print(f"\n{'endpoint':<26}{'p95 before':>12}{'p95 after':>11}{'change':>9}{'req/s change':>14}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or "p95_ms" not in before or "p95_ms" not in result:
+            continue
+        p95_change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rate_change = (result["throughput"] - before["throughput"]) / before["throughput"] if before["throughput"] else 0.0
+        flag = "  REGRESSION" if p95_change > threshold else ""
+        print(f"{name:<26}{before['p95_ms']:>12.2f}{result['p95_ms']:>11.2f}{p95_change:>+9.0%}{rate_change:>+14.0%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--projects", type=int)
+    parser.add_argument("--tasks", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", default="benchmark.db", help="SQLite file to seed and reuse")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoints", help="comma-separated endpoint names (default: all)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p95 increase flagged as a regression")
+    return parser.parse_args(argv)
+
+def main(argv):
+    args = parse_args(argv)
+    sizes = {key: getattr(args, key) or value for key, value in SIZES[args.size].items()}
+    dataset = Dataset(seed=args.seed, **sizes)
+    endpoints = ENDPOINTS
+    if args.endpoints:
+        wanted = args.endpoints.split(",")
+        unknown = set(wanted) - {endpoint.name for endpoint in ENDPOINTS}
+        if unknown:
+            sys.exit(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        endpoints = [endpoint for endpoint in ENDPOINTS if endpoint.name in wanted]
+
+    # Settings are read on first use, so the app picks up the benchmark database
+    # as long as DATABASE_URL is set before anything touches them
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    os.environ.setdefault("OVERDUE_SWEEP_SECONDS", "0")
+    prepare(os.path.abspath(args.db), dataset)
+
+    print(f"\n{'endpoint':<26}{'reqs':>7}{'errors':>7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    results = asyncio.run(run(dataset, endpoints, args.requests, args.concurrency))
+
+    report = {
+        "started_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dataset": asdict(dataset),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "endpoints": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,56 @@
+"""
+Compare loading list rows as ORM entities with the column projections the
+list endpoints use, on an in-memory SQLite database.
+
+    python -m benchmarks.projection [rows ...]     # default: 10000 100000
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from app.database import Base
+from app.models import Project, Task, TaskStatus, User, UserRole
+from app.projection import projection
+from app.schemas import TaskResponse
+
+def seed(session: Session, count: int):
+    now = datetime.utcnow()
+    session.execute(insert(User), [{"id": 1, "name": "Owner", "email": "owner@example.com", "password_hash": "x",
+                                    "role": UserRole.DEVELOPER, "created_at": now}])
+    session.execute(insert(Project), [{"id": 1, "name": "Benchmark", "created_at": now, "updated_at": now}])
+    session.execute(insert(Task), [
+        {"title": f"Task {i}", "description": "Benchmark task", "status": TaskStatus.TODO, "project_id": 1,
+         "assigned_to": 1, "created_at": now, "updated_at": now}
+        for i in range(count)
+    ])
+    session.commit()
+
+def measure(engine, stmt, entities: bool) -> tuple:
+    """(seconds, bytes still allocated while the rows are held)."""
+    with Session(engine) as session:
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = session.scalars(stmt).all() if entities else session.execute(stmt).all()
+        elapsed = time.perf_counter() - started
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del rows
+    return elapsed, allocated
+
+def main(sizes):
+    print(f"{'rows':>8}{'entities':>12}{'projection':>12}{'entity mem':>13}{'proj mem':>11}")
+    for size in sizes:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            seed(session, size)
+        entity_time, entity_mem = measure(engine, select(Task).order_by(Task.id), True)
+        row_time, row_mem = measure(engine, projection(Task, TaskResponse).order_by(Task.id), False)
+        print(f"{size:>8}{entity_time:>11.3f}s{row_time:>11.3f}s"
+              f"{entity_mem / size:>10.0f} B{row_mem / size:>8.0f} B")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,64 @@
+"""
+Compare the response_model serialization FastAPI performs for list endpoints
+with the FAST_JSON_RESPONSES path, on in-memory ORM rows.
+
+    python -m benchmarks.serialization [rows ...]     # default: 10000 100000
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+from app.models import Project, Task, TaskStatus, User, UserRole
+from app.schemas import ProjectResponse, TaskResponse
+from app.serialization import dumps
+
+def make_tasks(count: int) -> list:
+    now = datetime.utcnow()
+    statuses = list(TaskStatus)
+    return [
+        Task(
+            id=i, title=f"Task {i}", description="Benchmark task", status=statuses[i % 3],
+            deadline=now + timedelta(days=i % 30) if i % 2 else None,
+            created_at=now, updated_at=now, project_id=i % 50 + 1, assigned_to=i % 20 + 1,
+        )
+        for i in range(count)
+    ]
+
+def make_projects(count: int) -> list:
+    now = datetime.utcnow()
+    members = [
+        User(id=i, name=f"User {i}", email=f"user{i}@example.com", role=UserRole.DEVELOPER, created_at=now)
+        for i in range(5)
+    ]
+    return [
+        Project(id=i, name=f"Project {i}", description=None, created_at=now, updated_at=now, team_members=members)
+        for i in range(count)
+    ]
+
+def response_model_path(rows, schema) -> bytes:
+    """What FastAPI does with response_model=List[schema]: validate from attributes, then dump JSON."""
+    adapter = TypeAdapter(List[schema])
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+def best_of(fn, *args, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main(sizes):
+    print(f"{'schema':<16}{'rows':>8}{'response_model':>16}{'fast':>10}{'speedup':>9}")
+    for schema, factory in ((TaskResponse, make_tasks), (ProjectResponse, make_projects)):
+        for size in sizes:
+            rows = factory(size)
+            assert dumps(rows, schema) == response_model_path(rows, schema), "outputs differ"
+            repeat = 3 if size < 100_000 else 1
+            baseline = best_of(response_model_path, rows, schema, repeat=repeat)
+            fast = best_of(dumps, rows, schema, repeat=repeat)
+            print(f"{schema.__name__:<16}{size:>8}{baseline:>15.3f}s{fast:>9.3f}s{baseline / fast:>8.1f}x")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,49 @@
+"""
+Cold-start latency of a worker: each run is a fresh interpreter that imports
+app.main, runs the lifespan startup and serves its first request.
+
+    python -m benchmarks.startup [runs]     # default: 5
+
+DATABASE_URL selects the database as usual. Startup is measured with and
+without DB_SETUP_ON_STARTUP, i.e. with the per-worker migration check and
+without it (migrations run once per deploy).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+WORKER = r"""
+import asyncio, json, time
+from httpx import ASGITransport, AsyncClient
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            await client.get("/")
+        return ready, time.perf_counter()
+
+ready, served = asyncio.run(boot())
+print(json.dumps({"import": imported - started, "startup": ready - imported, "first_request": served - ready}))
+"""
+
+def cold_start(setup: bool) -> dict:
+    env = {**os.environ, "DB_SETUP_ON_STARTUP": "true" if setup else "false"}
+    result = subprocess.run([sys.executable, "-c", WORKER], env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main(runs: int):
+    print(f"{'schema setup':<14}{'phase':<15}{'median ms':>10}{'max ms':>9}")
+    for setup in (True, False):
+        samples = [cold_start(setup) for _ in range(runs)]
+        for phase in ("import", "startup", "first_request"):
+            values = [sample[phase] * 1000 for sample in samples]
+            print(f"{'on' if setup else 'off':<14}{phase:<15}{statistics.median(values):>10.1f}{max(values):>9.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../services/api';
+import { applyLocalChange, syncCollection } from '../services/sync';
 
 function DeveloperDashboard() {
   const [myTasks, setMyTasks] = useState([]);
@@ -17,9 +18,8 @@ function DeveloperDashboard() {
 
   const fetchMyTasks = async (userId) => {
     try {
-      // Developers can only see their own tasks
-      const response = await api.get(`/tasks?assigned_to=${userId}`);
-      setMyTasks(response.data);
+      // Developers can only see their own tasks, which is what the feed returns for them
+      setMyTasks(await syncCollection('/tasks'));
     } catch (error) {
       console.error('Error fetching tasks:', error);
     }
@@ -27,7 +27,8 @@ function DeveloperDashboard() {
 
   const handleStatusUpdate = async (taskId, newStatus) => {
     try {
-      await api.put(`/tasks/${taskId}`, { status: newStatus });
+      const response = await api.put(`/tasks/${taskId}`, { status: newStatus });
+      applyLocalChange('/tasks', response.data);
       fetchMyTasks(user.id);
       alert('Task status updated successfully!');
     } catch (error) {
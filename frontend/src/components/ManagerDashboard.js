@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../services/api';
+import { syncCollection } from '../services/sync';
 
 function ManagerDashboard() {
   const [stats, setStats] = useState(null);
@@ -25,8 +26,7 @@ function ManagerDashboard() {
 
   const fetchProjects = async () => {
     try {
-      const response = await api.get('/projects');
-      setProjects(response.data);
+      setProjects(await syncCollection('/projects'));
     } catch (error) {
       console.error('Error fetching projects:', error);
     }
@@ -34,8 +34,7 @@ function ManagerDashboard() {
 
   const fetchTasks = async () => {
     try {
-      const response = await api.get('/tasks');
-      setTasks(response.data);
+      setTasks(await syncCollection('/tasks'));
     } catch (error) {
       console.error('Error fetching tasks:', error);
     }
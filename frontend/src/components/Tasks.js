@@ -40,7 +40,7 @@ function Tasks() {
 
   const fetchProjects = async () => {
     try {
-      const response = await projectService.getAll();
+      const response = await projectService.getAll({ fields: 'id,name' });
       setProjects(response.data);
     } catch (err) {
       console.error(err);
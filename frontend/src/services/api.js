@@ -42,7 +42,7 @@ export const userService = {
 };
 
 export const projectService = {
-  getAll: () => api.get('/projects/'),
+  getAll: (params) => api.get('/projects/', { params }),
   getById: (id) => api.get(`/projects/${id}`),
   create: (data) => api.post('/projects/', data),
   update: (id, data) => api.put(`/projects/${id}`, data),
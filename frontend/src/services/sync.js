@@ -0,0 +1,43 @@
+import api from './api';
+
+// Local copies of collections kept in step with the /changes feeds, keyed by
+// feed path and token so a different login never sees another user's copy.
+const stores = {};
+
+const storeKey = (path) => `${path}|${localStorage.getItem('token') || ''}`;
+
+// Returns the full, id-ordered collection, fetching only what changed since the last call.
+export async function syncCollection(path) {
+  const key = storeKey(path);
+  const store = stores[key] || { items: new Map(), cursor: null };
+  let hasMore = true;
+
+  try {
+    while (hasMore) {
+      const params = store.cursor ? { since: store.cursor } : {};
+      const { data } = await api.get(`${path}/changes`, { params });
+      data.changed.forEach((item) => store.items.set(item.id, item));
+      data.deleted.forEach((id) => store.items.delete(id));
+      store.cursor = data.cursor;
+      hasMore = data.has_more;
+    }
+  } catch (error) {
+    if (error.response?.status === 410 && store.cursor) {
+      // Cursor older than the server keeps deletes for: start over
+      delete stores[key];
+      return syncCollection(path);
+    }
+    throw error;
+  }
+
+  stores[key] = store;
+  return Array.from(store.items.values()).sort((a, b) => a.id - b.id);
+}
+
+// Apply a row returned by a write straight away; the feed only reports it once it settles.
+export function applyLocalChange(path, item) {
+  const store = stores[storeKey(path)];
+  if (store) {
+    store.items.set(item.id, item);
+  }
+}
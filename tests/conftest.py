@@ -0,0 +1,101 @@
+"""
+Shared test setup: the app runs against ./test.db through a get_db override,
+and tests create the users they act as with the create_user / auth_headers factories.
+The database is recreated for every test session, so no run sees an earlier run's rows.
+"""
+import uuid
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from app import database
+from app.main import app
+from app.auth import create_access_token
+from app.config import settings
+from app.database import Base, get_db
+from app.models import User, UserRole
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+Path("test.db").unlink(missing_ok=True)
+test_engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+Base.metadata.create_all(bind=test_engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+@pytest.fixture(scope="session", autouse=True)
+def test_database():
+    """
+    Point everything outside get_db at the test database too: the lifespan of
+    `with TestClient(app)`, its sweepers and background jobs would otherwise use
+    DATABASE_URL from .env. The schema comes from create_all above, so startup skips it.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "DATABASE_URL", SQLALCHEMY_DATABASE_URL)
+        monkeypatch.setattr(settings, "DB_SETUP_ON_STARTUP", False)
+        for factory in (database.get_engine, database.get_sessionmaker,
+                        database.get_async_engine, database.get_async_sessionmaker):
+            factory.cache_clear()
+        yield
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(app)
+
+@pytest.fixture(scope="session")
+def engine():
+    return test_engine
+
+@pytest.fixture(scope="session")
+def session_factory():
+    """Sessions on the test database, for checking what the API wrote."""
+    return TestingSessionLocal
+
+@pytest.fixture
+def db():
+    with TestingSessionLocal() as session:
+        yield session
+
+@pytest.fixture(scope="session")
+def create_user():
+    """create_user(role, **fields) -> a committed User with a unique email."""
+    def create(role=UserRole.MANAGER, **fields) -> User:
+        fields = {"name": "Test User", "email": f"{uuid.uuid4().hex}@example.com", "password_hash": "x", **fields}
+        with TestingSessionLocal() as session:
+            user = User(role=role, **fields)
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+            return user
+    return create
+
+@pytest.fixture(scope="session")
+def auth_headers(create_user):
+    """auth_headers(user or role) -> a bearer token header, for a new user of that role when given a role."""
+    def headers(user=UserRole.MANAGER) -> dict:
+        if not isinstance(user, User):
+            user = create_user(user)
+        return {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    return headers
+
+@pytest.fixture
+def statements():
+    """SQL statements issued on any engine while the test runs."""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(Engine, "before_cursor_execute", record)
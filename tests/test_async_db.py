@@ -0,0 +1,95 @@
+import json
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app import migrations
+from app.database import get_db, is_async_url, sync_url
+from app.models import User, UserRole
+from app.auth import create_access_token
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./test_async.db"
+engine = create_engine(sync_url(ASYNC_DATABASE_URL), connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+migrations.upgrade(engine)
+
+# TestClient may run each request on a fresh event loop, so never reuse pooled connections
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+@pytest.fixture(scope="module")
+def client():
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides[get_db] = previous
+
+def auth_headers(role=UserRole.MANAGER):
+    db = TestingSessionLocal()
+    try:
+        user = User(name="Async User", email=f"{uuid.uuid4().hex}@example.com", password_hash="x", role=role)
+        db.add(user)
+        db.commit()
+        return user.id, {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    finally:
+        db.close()
+
+def test_async_url_detection():
+    assert is_async_url("sqlite+aiosqlite:///./x.db")
+    assert is_async_url("mysql+aiomysql://u:p@h/db")
+    assert not is_async_url("mysql+pymysql://u:p@h/db")
+    assert sync_url("mysql+aiomysql://u:p@h/db") == "mysql+pymysql://u:p@h/db"
+
+def test_crud_through_async_session(client):
+    member_id, headers = auth_headers()
+
+    project = client.post(
+        "/projects/", json={"name": "Async Project", "team_member_ids": [member_id]}, headers=headers
+    )
+    assert project.status_code == 201
+    assert [m["id"] for m in project.json()["team_members"]] == [member_id]
+    project_id = project.json()["id"]
+
+    task = client.post(
+        "/tasks/", json={"title": "Async Task", "project_id": project_id, "assigned_to": member_id}, headers=headers
+    )
+    assert task.status_code == 201
+    task_id = task.json()["id"]
+
+    updated = client.put(f"/tasks/{task_id}", json={"status": "Done"}, headers=headers)
+    assert updated.json()["status"] == "Done"
+
+    listed = client.get("/projects/", headers=headers).json()
+    assert any(p["id"] == project_id and p["team_members"] for p in listed)
+    assert client.get(f"/projects/{project_id}", headers=headers).status_code == 200
+    assert client.get("/dashboard/").json()["tasks_by_status"]["Done"] >= 1
+
+    assert client.delete(f"/tasks/{task_id}", headers=headers).status_code == 204
+    assert client.get(f"/tasks/{task_id}", headers=headers).status_code == 404
+    assert client.delete(f"/projects/{project_id}", headers=headers).status_code == 204
+
+def test_pagination_and_stream_through_async_session(client):
+    _, headers = auth_headers()
+    project_id = client.post("/projects/", json={"name": "Async Stream"}, headers=headers).json()["id"]
+    for i in range(5):
+        client.post("/tasks/", json={"title": f"Stream {i}", "project_id": project_id}, headers=headers)
+
+    page = client.get("/tasks/", params={"project_id": project_id, "limit": 2}, headers=headers)
+    assert len(page.json()) == 2
+    assert page.headers["X-Next-Cursor"]
+
+    stream = client.get("/tasks/", params={"project_id": project_id, "format": "ndjson"}, headers=headers)
+    assert [json.loads(line)["title"] for line in stream.text.splitlines()] == [f"Stream {i}" for i in range(5)]
+
+    stream = client.get("/projects/", params={"format": "ndjson"}, headers=headers)
+    assert any(json.loads(line)["id"] == project_id for line in stream.text.splitlines())
@@ -0,0 +1,54 @@
+import time
+import uuid
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.hashing import PasswordPool, bcrypt_hash, hash_rounds, password_pool
+from app.models import User, UserRole
+
+@pytest.fixture
+def fast_bcrypt(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+
+def test_register_and_login(client, fast_bcrypt):
+    email = f"{uuid.uuid4().hex}@example.com"
+    response = client.post("/register", json={"name": "New Dev", "email": email, "role": "Admin", "password": "pw"})
+    assert response.status_code == 201
+    assert response.json()["role"] == "Developer"
+
+    response = client.post("/token", data={"username": email, "password": "pw"})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+    response = client.post("/token", data={"username": email, "password": "wrong"})
+    assert response.status_code == 401
+
+def test_login_rehashes_when_cost_changes(client, db, create_user, monkeypatch):
+    email = create_user(UserRole.DEVELOPER, name="Old Hash", password_hash=bcrypt_hash("pw", 4)).email
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert client.post("/token", data={"username": email, "password": "pw"}).status_code == 200
+    assert hash_rounds(db.query(User).filter(User.email == email).one().password_hash) == 5
+
+def test_saturated_pool_rejects_immediately():
+    pool = PasswordPool(workers=1, queue_depth=0)
+    try:
+        running = pool.submit(time.sleep, 0.5)
+        started = time.monotonic()
+        with pytest.raises(HTTPException) as exc_info:
+            pool.submit(time.sleep, 0)
+        assert exc_info.value.status_code == 503
+        assert time.monotonic() - started < 0.1
+        running.result()
+        assert pool.submit(time.sleep, 0).result() is None
+        assert pool.stats()["rejected"] == 1
+    finally:
+        pool.shutdown()
+
+def test_app_shutdown_stops_the_bcrypt_workers():
+    password_pool._get_executor()
+    with TestClient(app):
+        pass
+    assert password_pool._executor is None
@@ -0,0 +1,106 @@
+import pytest
+from app.models import DashboardCounter, Task, UserRole
+from app.counters import GLOBAL_SCOPE
+
+@pytest.fixture
+def create_project(client):
+    def create(headers):
+        response = client.post("/projects/", json={"name": "Bulk Project", "team_member_ids": []}, headers=headers)
+        assert response.status_code == 201
+        return response.json()["id"]
+    return create
+
+@pytest.fixture
+def global_counter(session_factory):
+    def read():
+        with session_factory() as db:
+            counter = db.get(DashboardCounter, GLOBAL_SCOPE)
+            return {"total": counter.total_tasks, "todo": counter.todo_tasks, "done": counter.done_tasks}
+    return read
+
+def test_bulk_create_reports_per_item_results(
+    client, auth_headers, create_user, create_project, global_counter, statements
+):
+    headers = auth_headers(UserRole.MANAGER)
+    dev_id = create_user(UserRole.DEVELOPER).id
+    project_id = create_project(headers)
+    before = global_counter()
+
+    items = [{"title": f"Task {i}", "project_id": project_id, "assigned_to": dev_id} for i in range(50)]
+    items.append({"title": "Bad project", "project_id": 999999})
+    items.append({"title": "Bad assignee", "project_id": project_id, "assigned_to": 999999})
+
+    statements.clear()
+    response = client.post("/tasks/bulk", json={"tasks": items}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 50
+    assert body["failed"] == 2
+    assert body["results"][50] == {"index": 50, "id": None, "status_code": 404, "detail": "Project not found", "task": None}
+    assert body["results"][51]["detail"] == "Assigned user not found"
+    assert body["results"][0]["task"]["title"] == "Task 0"
+    assert body["results"][0]["id"] == body["results"][0]["task"]["id"]
+
+    # One IN lookup each for projects and users, no per-task lookups or refreshes
+    selects = [s for s in statements if s.startswith("SELECT")]
+    assert len([s for s in selects if "FROM projects" in s]) == 1
+    assert len([s for s in selects if "FROM users" in s]) <= 2
+    assert not [s for s in selects if "FROM tasks" in s]
+
+    after = global_counter()
+    assert after["total"] - before["total"] == 50
+    assert after["todo"] - before["todo"] == 50
+
+def test_bulk_update_applies_developer_rules(client, auth_headers, create_user, create_project, global_counter):
+    manager_headers = auth_headers(UserRole.MANAGER)
+    developer = create_user(UserRole.DEVELOPER)
+    dev_id, dev_headers = developer.id, auth_headers(developer)
+    project_id = create_project(manager_headers)
+    created = client.post("/tasks/bulk", json={"tasks": [
+        {"title": "Mine", "project_id": project_id, "assigned_to": dev_id},
+        {"title": "Not mine", "project_id": project_id},
+    ]}, headers=manager_headers).json()["results"]
+    mine, other = created[0]["id"], created[1]["id"]
+    before = global_counter()
+
+    response = client.patch("/tasks/bulk", json={"tasks": [
+        {"id": mine, "status": "Done"},
+        {"id": other, "status": "Done"},
+        {"id": mine, "title": "Renamed"},
+        {"id": 999999, "status": "Done"},
+    ]}, headers=dev_headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status_code"] for r in results] == [200, 403, 400, 404]
+    assert results[0]["task"]["status"] == "Done"
+
+    after = global_counter()
+    assert after["done"] - before["done"] == 1
+    assert after["todo"] - before["todo"] == -1
+
+    response = client.patch("/tasks/bulk", json={"tasks": [{"id": other, "title": "Renamed"}]}, headers=manager_headers)
+    assert response.json()["results"][0]["task"]["title"] == "Renamed"
+
+def test_bulk_delete(client, db, auth_headers, create_project, global_counter):
+    headers = auth_headers(UserRole.MANAGER)
+    dev_headers = auth_headers(UserRole.DEVELOPER)
+    project_id = create_project(headers)
+    created = client.post("/tasks/bulk", json={"tasks": [
+        {"title": f"Doomed {i}", "project_id": project_id} for i in range(3)
+    ]}, headers=headers).json()["results"]
+    ids = [r["id"] for r in created]
+    before = global_counter()
+
+    assert client.request("DELETE", "/tasks/bulk", json={"ids": ids}, headers=dev_headers).status_code == 403
+
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": ids + [999999]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 3
+    assert response.json()["results"][3]["status_code"] == 404
+
+    assert db.query(Task).filter(Task.id.in_(ids)).count() == 0
+    assert global_counter()["total"] - before["total"] == -3
+
+def test_bulk_payload_limits(client, auth_headers):
+    headers = auth_headers(UserRole.MANAGER)
+    assert client.post("/tasks/bulk", json={"tasks": []}, headers=headers).status_code == 422
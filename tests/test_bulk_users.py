@@ -0,0 +1,62 @@
+import uuid
+import pytest
+from app.config import settings
+from app.hashing import bcrypt_verify, hash_rounds
+from app.models import User, UserRole
+
+@pytest.fixture(autouse=True)
+def fast_bcrypt(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+
+def new_email():
+    return f"{uuid.uuid4().hex}@example.com"
+
+def test_bulk_json_reports_per_row_errors(client, db, auth_headers):
+    headers = auth_headers(UserRole.ADMIN)
+    existing = new_email()
+    assert client.post("/users/bulk", json={"users": [
+        {"name": "Existing", "email": existing, "role": "Developer", "password": "pw"}
+    ]}, headers=headers).json()["succeeded"] == 1
+
+    duplicate = new_email()
+    users = [{"name": f"User {i}", "email": new_email(), "role": "Developer", "password": f"pw{i}"} for i in range(20)]
+    users += [
+        {"name": "Taken", "email": existing, "role": "Developer", "password": "pw"},
+        {"name": "Bad email", "email": "not-an-email", "role": "Developer", "password": "pw"},
+        {"name": "First", "email": duplicate, "role": "Manager", "password": "pw"},
+        {"name": "Second", "email": duplicate, "role": "Manager", "password": "pw"},
+    ]
+    response = client.post("/users/bulk", json={"users": users}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 21
+    assert body["failed"] == 3
+    results = body["results"]
+    assert [r["index"] for r in results] == list(range(len(users)))
+    assert results[20]["detail"] == "Email already registered"
+    assert results[21]["status_code"] == 422
+    assert results[22]["user"]["role"] == "Manager"
+    assert results[23]["status_code"] == 400
+
+    stored = db.query(User).filter(User.email == users[3]["email"]).one()
+    assert stored.id == results[3]["id"]
+    assert hash_rounds(stored.password_hash) == 4
+    assert bcrypt_verify("pw3", stored.password_hash)
+
+def test_bulk_csv(client, auth_headers):
+    headers = auth_headers(UserRole.ADMIN)
+    first, second = new_email(), new_email()
+    body = f"name,email,role,password\nAda,{first},Developer,pw1\nGrace,{second},Admin,pw2\nNobody,{new_email()},Intern,pw3\n"
+    response = client.post("/users/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status_code"] for r in results] == [201, 201, 422]
+    assert results[1]["user"]["email"] == second
+
+    assert client.post("/token", data={"username": first, "password": "pw1"}).status_code == 200
+
+def test_bulk_requires_admin_and_rows(client, auth_headers):
+    assert client.post("/users/bulk", json={"users": []}, headers=auth_headers(UserRole.MANAGER)).status_code == 403
+    headers = auth_headers(UserRole.ADMIN)
+    assert client.post("/users/bulk", json={"users": []}, headers=headers).status_code == 400
+    assert client.post("/users/bulk", content="{", headers={**headers, "Content-Type": "application/json"}).status_code == 400
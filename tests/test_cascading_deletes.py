@@ -0,0 +1,120 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from app.main import app
+from app.models import DashboardCounter, Project, Task, Tombstone, User, UserRole, project_members
+from app.config import settings
+from app import counters, jobs
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "DELETE_BATCH_SIZE", 2)
+
+@pytest.fixture
+def project_with_tasks(client):
+    def create(headers, count, member_id=None, assignee=None) -> tuple:
+        project_id = client.post("/projects/", json={
+            "name": "Cascade", "team_member_ids": [member_id] if member_id else [],
+        }, headers=headers).json()["id"]
+        response = client.post("/tasks/bulk", json={"tasks": [
+            {"title": f"Cascade {i}", "project_id": project_id, "assigned_to": assignee} for i in range(count)
+        ]}, headers=headers)
+        return project_id, [result["id"] for result in response.json()["results"]]
+    return create
+
+@pytest.fixture
+def counters_match_reconcile(session_factory):
+    def check() -> bool:
+        with session_factory() as db:
+            columns = counters.COUNTER_COLUMNS
+            incremental = {row.project_id: [getattr(row, c) for c in columns] for row in db.query(DashboardCounter)}
+            counters.reconcile(db)
+            return incremental == {row.project_id: [getattr(row, c) for c in columns] for row in db.query(DashboardCounter)}
+    return check
+
+def test_project_delete_is_set_based(client, db, create_user, auth_headers, project_with_tasks, counters_match_reconcile,
+                                     statements):
+    member = create_user()
+    member_id, headers = member.id, auth_headers(member)
+    project_id, task_ids = project_with_tasks(headers, 5, member_id)
+
+    statements.clear()
+    assert client.delete(f"/projects/{project_id}", headers=headers).status_code == 204
+    task_deletes = [s for s in statements if s.lstrip().upper().startswith("DELETE FROM TASKS")]
+    assert len(task_deletes) == 3  # batches of 2, 2 and 1
+
+    assert db.scalar(select(func.count()).select_from(Task).where(Task.project_id == project_id)) == 0
+    assert db.scalar(select(func.count()).select_from(project_members).where(
+        project_members.c.project_id == project_id)) == 0
+    assert db.scalar(select(func.count()).select_from(Tombstone).where(
+        Tombstone.entity == "task", Tombstone.project_id == project_id, Tombstone.entity_id.in_(task_ids))) == 5
+    assert client.get(f"/projects/{project_id}", headers=headers).status_code == 404
+    assert counters_match_reconcile()
+
+def test_large_project_is_deleted_by_background_job(monkeypatch, db, auth_headers, project_with_tasks,
+                                                    counters_match_reconcile):
+    monkeypatch.setattr(settings, "PROJECT_DELETE_SYNC_LIMIT", 3)
+    headers = auth_headers()
+    project_id, _ = project_with_tasks(headers, 5)
+    other_headers = auth_headers()
+
+    with TestClient(app) as live_client:
+        response = live_client.delete(f"/projects/{project_id}", headers=headers)
+        assert response.status_code == 202
+        job = response.json()
+        assert response.headers["location"] == f"/jobs/{job['id']}"
+        assert job["total"] == 5
+
+        deadline = time.monotonic() + 10
+        while job["status"] not in ("succeeded", "failed") and time.monotonic() < deadline:
+            time.sleep(0.05)
+            job = live_client.get(f"/jobs/{job['id']}", headers=headers).json()
+        assert live_client.get(f"/jobs/{job['id']}", headers=other_headers).status_code == 404
+
+    assert job["status"] == "succeeded"
+    assert job["processed"] == 5
+    assert db.scalar(select(func.count()).select_from(Project).where(Project.id == project_id)) == 0
+    assert counters_match_reconcile()
+
+def test_project_being_deleted_takes_no_new_tasks(monkeypatch, client, db, auth_headers, project_with_tasks):
+    headers = auth_headers()
+    project_id, _ = project_with_tasks(headers, 3)
+    started = []
+    # Hold the job, as if it were still queued behind other work
+    monkeypatch.setattr(jobs, "start", lambda *args: started.append(args))
+
+    response = client.delete(f"/projects/{project_id}", params={"background": True}, headers=headers)
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    response = client.post("/tasks/", json={"title": "Late", "project_id": project_id}, headers=headers)
+    assert response.status_code == 409
+    response = client.post("/tasks/bulk", json={"tasks": [{"title": "Late", "project_id": project_id}]}, headers=headers)
+    assert response.json()["results"][0]["status_code"] == 409
+
+    response = client.delete(f"/projects/{project_id}", headers=headers)
+    assert (response.status_code, response.json()["id"]) == (202, job_id)
+    assert len(started) == 1
+
+    session_factory, job, fn, *args = started[0]
+    jobs._run(session_factory, job.id, fn, args)
+    assert client.get(f"/jobs/{job_id}", headers=headers).json()["status"] == "succeeded"
+    assert db.scalar(select(func.count()).select_from(Task).where(Task.project_id == project_id)) == 0
+    assert db.get(Project, project_id) is None
+
+def test_user_delete_unassigns_tasks_in_batches(client, db, create_user, auth_headers, project_with_tasks, statements):
+    headers = auth_headers()
+    developer_id = create_user(UserRole.DEVELOPER).id
+    admin_headers = auth_headers(UserRole.ADMIN)
+    _, task_ids = project_with_tasks(headers, 3, developer_id, developer_id)
+
+    statements.clear()
+    assert client.delete(f"/users/{developer_id}", headers=admin_headers).status_code == 204
+    unassigns = [s for s in statements if s.lstrip().upper().startswith("UPDATE TASKS")]
+    assert len(unassigns) == 2
+
+    assert db.scalar(select(func.count()).select_from(Task).where(Task.id.in_(task_ids), Task.assigned_to.is_(None))) == 3
+    assert db.scalar(select(func.count()).select_from(project_members).where(
+        project_members.c.user_id == developer_id)) == 0
+    assert db.scalar(select(func.count()).select_from(User).where(User.id == developer_id)) == 0
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select
+from app import changes
+from app.changes import encode_changes_cursor
+from app.config import settings
+from app.models import Tombstone, UserRole
+
+@pytest.fixture(autouse=True)
+def no_settle_delay(monkeypatch):
+    monkeypatch.setattr(settings, "CHANGES_SETTLE_SECONDS", 0)
+
+@pytest.fixture
+def sync(client):
+    def drain(path, headers, since=None, limit=None, project_id=None):
+        """Drain the feed like a client would, returning (changed ids, deleted ids, cursor)."""
+        changed, deleted = [], []
+        while True:
+            params = {"since": since, "limit": limit, "project_id": project_id}
+            params = {key: value for key, value in params.items() if value}
+            body = client.get(path, params=params, headers=headers).json()
+            changed += [item["id"] for item in body["changed"]]
+            deleted += body["deleted"]
+            since = body["cursor"]
+            if not body["has_more"]:
+                return changed, deleted, since
+    return drain
+
+def test_task_changes_report_updates_and_deletes(client, auth_headers, sync):
+    headers = auth_headers(UserRole.MANAGER)
+    project_id = client.post("/projects/", json={"name": "Sync"}, headers=headers).json()["id"]
+    ids = [client.post("/tasks/", json={"title": f"T{i}", "project_id": project_id}, headers=headers).json()["id"]
+           for i in range(5)]
+
+    path = "/tasks/changes"
+    changed, deleted, cursor = sync(path, headers, limit=2, project_id=project_id)
+    assert sorted(changed) == ids
+    assert deleted == []
+
+    changed, deleted, cursor = sync(path, headers, since=cursor, project_id=project_id)
+    assert changed == [] and deleted == []
+
+    client.put(f"/tasks/{ids[1]}", json={"status": "Done"}, headers=headers)
+    client.delete(f"/tasks/{ids[2]}", headers=headers)
+    client.request("DELETE", "/tasks/bulk", json={"ids": [ids[3]]}, headers=headers)
+    changed, deleted, cursor = sync(path, headers, since=cursor, project_id=project_id)
+    assert changed == [ids[1]]
+    assert sorted(deleted) == [ids[2], ids[3]]
+
+def test_developer_only_sees_own_task_changes(client, create_user, auth_headers, sync):
+    manager_headers = auth_headers(UserRole.MANAGER)
+    developer = create_user(UserRole.DEVELOPER)
+    dev_id, dev_headers = developer.id, auth_headers(developer)
+    project_id = client.post("/projects/", json={"name": "Sync"}, headers=manager_headers).json()["id"]
+    _, _, cursor = sync("/tasks/changes", dev_headers)
+
+    mine = client.post("/tasks/", json={"title": "Mine", "project_id": project_id, "assigned_to": dev_id},
+                       headers=manager_headers).json()["id"]
+    other = client.post("/tasks/", json={"title": "Other", "project_id": project_id}, headers=manager_headers).json()["id"]
+    client.delete(f"/tasks/{other}", headers=manager_headers)
+
+    changed, deleted, _ = sync("/tasks/changes", dev_headers, since=cursor)
+    assert changed == [mine]
+    assert deleted == []
+
+def test_reassigned_tasks_leave_the_previous_assignees_feed(client, db, create_user, auth_headers, sync):
+    manager_headers = auth_headers(UserRole.MANAGER)
+    first, second, leaving = (create_user(UserRole.DEVELOPER) for _ in range(3))
+    project_id = client.post("/projects/", json={"name": "Sync"}, headers=manager_headers).json()["id"]
+    moved, bulk_moved, released = (
+        client.post("/tasks/", json={"title": title, "project_id": project_id, "assigned_to": assignee.id},
+                    headers=manager_headers).json()["id"]
+        for title, assignee in (("Moved", first), ("Bulk moved", first), ("Released", leaving))
+    )
+    cursors = {user.id: sync("/tasks/changes", auth_headers(user))[2] for user in (first, second)}
+
+    client.put(f"/tasks/{moved}", json={"assigned_to": second.id}, headers=manager_headers)
+    client.patch("/tasks/bulk", json={"tasks": [{"id": bulk_moved, "assigned_to": second.id}]}, headers=manager_headers)
+    assert client.delete(f"/users/{leaving.id}", headers=auth_headers(UserRole.ADMIN)).status_code == 204
+
+    changed, deleted, _ = sync("/tasks/changes", auth_headers(first), since=cursors[first.id])
+    assert (changed, sorted(deleted)) == ([], [moved, bulk_moved])
+    changed, deleted, _ = sync("/tasks/changes", auth_headers(second), since=cursors[second.id])
+    assert (sorted(changed), deleted) == ([moved, bulk_moved], [])
+    # Unassigning a deleted user's tasks records their exits too
+    exits = db.scalars(select(Tombstone.entity_id).where(
+        Tombstone.entity == changes.TASK_EXIT, Tombstone.assigned_to == leaving.id
+    )).all()
+    assert exits == [released]
+    # Exits are for the assignee's feed only; managers and project feeds still list the tasks
+    changed, deleted, _ = sync("/tasks/changes", manager_headers, project_id=project_id)
+    assert (sorted(changed), deleted) == ([moved, bulk_moved, released], [])
+
+    # Moving a task back replaces the exit with the task itself
+    client.put(f"/tasks/{moved}", json={"assigned_to": first.id}, headers=manager_headers)
+    changed, deleted, _ = sync("/tasks/changes", auth_headers(first), since=cursors[first.id])
+    assert (changed, deleted) == ([moved], [bulk_moved])
+
+def test_project_delete_tombstones_its_tasks(client, auth_headers, sync):
+    headers = auth_headers(UserRole.MANAGER)
+    _, project_cursor = sync("/projects/changes", headers)[1:]
+    project_id = client.post("/projects/", json={"name": "Doomed"}, headers=headers).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Doomed", "project_id": project_id}, headers=headers).json()["id"]
+    _, _, task_cursor = sync("/tasks/changes", headers)
+
+    client.delete(f"/projects/{project_id}", headers=headers)
+    changed, deleted, _ = sync("/projects/changes", headers, since=project_cursor)
+    assert project_id in deleted and project_id not in changed
+    assert task_id in sync("/tasks/changes", headers, since=task_cursor)[1]
+
+def test_bad_and_expired_cursors(client, auth_headers):
+    headers = auth_headers(UserRole.MANAGER)
+    assert client.get("/tasks/changes?since=garbage", headers=headers).status_code == 400
+    old = datetime.utcnow() - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS + 1)
+    expired = encode_changes_cursor((old, 0), (old, 0))
+    assert client.get("/tasks/changes", params={"since": expired}, headers=headers).status_code == 410
@@ -0,0 +1,88 @@
+import time
+from sqlalchemy.dialects import mysql
+from app.models import Project, Task, UserRole
+
+def test_task_etag_and_last_modified(client, auth_headers):
+    headers = auth_headers(UserRole.MANAGER)
+    project_id = client.post("/projects/", json={"name": "Etag"}, headers=headers).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Cache me", "project_id": project_id}, headers=headers).json()["id"]
+
+    response = client.get(f"/tasks/{task_id}", headers=headers)
+    etag = response.headers["etag"]
+    assert not etag.startswith("W/")
+    assert "Authorization" in response.headers["vary"]
+    last_modified = response.headers["last-modified"]
+
+    response = client.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert client.get(f"/tasks/{task_id}", headers={**headers, "If-Modified-Since": last_modified}).status_code == 304
+
+    client.put(f"/tasks/{task_id}", json={"title": "Changed"}, headers=headers)
+    response = client.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_writes_within_one_second_change_the_etag(client, auth_headers):
+    headers = auth_headers(UserRole.MANAGER)
+    project_id = client.post("/projects/", json={"name": "Etag"}, headers=headers).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Busy", "project_id": project_id}, headers=headers).json()["id"]
+
+    started = time.monotonic()
+    etags = []
+    for title in ("First", "Second"):
+        client.put(f"/tasks/{task_id}", json={"title": title}, headers=headers)
+        etags.append(client.get(f"/tasks/{task_id}", headers=headers).headers["etag"])
+    assert time.monotonic() - started < 1
+    assert etags[0] != etags[1]
+    assert client.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": etags[0]}).status_code == 200
+
+    # MySQL keeps the microseconds too, instead of DATETIME's whole seconds
+    for model in (Task, Project):
+        assert model.__table__.c.updated_at.type.compile(dialect=mysql.dialect()) == "DATETIME(6)"
+
+def test_developer_cannot_probe_foreign_task_with_etag(client, auth_headers):
+    manager_headers = auth_headers(UserRole.MANAGER)
+    dev_headers = auth_headers(UserRole.DEVELOPER)
+    project_id = client.post("/projects/", json={"name": "Etag"}, headers=manager_headers).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Private", "project_id": project_id}, headers=manager_headers).json()["id"]
+    response = client.get(f"/tasks/{task_id}", headers={**dev_headers, "If-None-Match": "*"})
+    assert response.status_code == 403
+
+def test_project_etag_changes_with_team(client, create_user, auth_headers):
+    headers = auth_headers(UserRole.MANAGER)
+    member_id = create_user(UserRole.DEVELOPER).id
+    project_id = client.post("/projects/", json={"name": "Team"}, headers=headers).json()["id"]
+
+    etag = client.get(f"/projects/{project_id}", headers=headers).headers["etag"]
+    assert etag.startswith("W/")
+    assert client.get(f"/projects/{project_id}", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.put(f"/projects/{project_id}", json={"team_member_ids": [member_id]}, headers=headers)
+    assert client.get(f"/projects/{project_id}", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+def test_collection_304_skips_loading_rows(client, auth_headers, statements):
+    headers = auth_headers(UserRole.MANAGER)
+    project_id = client.post("/projects/", json={"name": "List"}, headers=headers).json()["id"]
+    for i in range(3):
+        client.post("/tasks/", json={"title": f"Row {i}", "project_id": project_id}, headers=headers)
+
+    url = f"/tasks/?project_id={project_id}"
+    etag = client.get(url, headers=headers).headers["etag"]
+
+    statements.clear()
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+    assert not [s for s in statements if "tasks.title" in s]
+
+    task_id = client.get(url, headers=headers).json()[0]["id"]
+    client.delete(f"/tasks/{task_id}", headers=headers)
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    # Pages are validated separately and fields= lists carry the ETag too
+    page = client.get(f"{url}&limit=1", headers=headers)
+    assert page.headers["etag"] != response.headers["etag"]
+    assert client.get(f"{url}&limit=1", headers={**headers, "If-None-Match": page.headers["etag"]}).status_code == 304
+    projects = client.get("/projects/?fields=id,name", headers=headers)
+    assert client.get("/projects/?fields=id,name", headers={**headers, "If-None-Match": projects.headers["etag"]}).status_code == 304
@@ -0,0 +1,66 @@
+import pytest
+from app.models import DashboardCounter
+from app import counters
+
+@pytest.fixture
+def snapshot(session_factory):
+    def read():
+        with session_factory() as db:
+            return {
+                row.project_id: {column: getattr(row, column) for column in counters.COUNTER_COLUMNS}
+                for row in db.query(DashboardCounter)
+            }
+    return read
+
+@pytest.fixture
+def reconciled_snapshot(session_factory, snapshot):
+    def read():
+        with session_factory() as db:
+            counters.reconcile(db)
+        return snapshot()
+    return read
+
+def test_counters_follow_task_and_project_writes(client, auth_headers, snapshot):
+    headers = auth_headers()
+    before = client.get("/dashboard/").json()
+
+    project_id = client.post(
+        "/projects/", json={"name": "Counter Project", "team_member_ids": []}, headers=headers
+    ).json()["id"]
+    task_ids = [
+        client.post(
+            "/tasks/", json={"title": f"Counter {i}", "status": "To Do", "project_id": project_id}, headers=headers
+        ).json()["id"]
+        for i in range(3)
+    ]
+    client.put(f"/tasks/{task_ids[0]}", json={"status": "Done"}, headers=headers)
+    client.delete(f"/tasks/{task_ids[1]}", headers=headers)
+
+    after = client.get("/dashboard/").json()
+    assert after["total_projects"] == before["total_projects"] + 1
+    assert after["total_tasks"] == before["total_tasks"] + 2
+    assert after["tasks_by_status"]["To Do"] == before["tasks_by_status"]["To Do"] + 1
+    assert after["tasks_by_status"]["Done"] == before["tasks_by_status"]["Done"] + 1
+
+    project_counts = snapshot()[project_id]
+    assert project_counts["total_tasks"] == 2
+    assert project_counts["done_tasks"] == 1
+
+def test_project_delete_removes_its_tasks_from_totals(client, auth_headers, snapshot):
+    headers = auth_headers()
+    project_id = client.post(
+        "/projects/", json={"name": "Doomed Project", "team_member_ids": []}, headers=headers
+    ).json()["id"]
+    client.post("/tasks/", json={"title": "Doomed", "status": "In Progress", "project_id": project_id}, headers=headers)
+    before = client.get("/dashboard/").json()
+
+    client.delete(f"/projects/{project_id}", headers=headers)
+
+    after = client.get("/dashboard/").json()
+    assert after["total_projects"] == before["total_projects"] - 1
+    assert after["total_tasks"] == before["total_tasks"] - 1
+    assert after["tasks_by_status"]["In Progress"] == before["tasks_by_status"]["In Progress"] - 1
+    assert project_id not in snapshot()
+
+def test_incremental_counters_match_reconcile(snapshot, reconciled_snapshot):
+    assert snapshot() == reconciled_snapshot()
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.config import settings
+from app.database import engine_options
+from app.models import UserRole
+from app.pool_metrics import pool_status
+
+def test_pool_settings_applied(monkeypatch, db):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.05)
+    pooled = create_engine("sqlite:///./test.db", **engine_options("sqlite:///./test.db"))
+
+    held = pooled.connect()
+    status = pool_status(pooled.pool)
+    assert status["size"] == 1
+    assert status["checked_out"] == 1
+    assert status["checkouts"] == 1
+
+    with pytest.raises(PoolTimeoutError):
+        pooled.connect()
+    held.close()
+
+    status = pool_status(pooled.pool)
+    assert status["checked_out"] == 0
+    assert status["idle"] == 1
+    assert status["timeouts"] == 1
+    assert status["wait_seconds_max"] >= 0.05
+
+def test_in_memory_sqlite_keeps_default_pool():
+    options = engine_options("sqlite://")
+    assert "pool_size" not in options
+    create_engine("sqlite://", **options).connect().close()
+
+def test_admin_pool_endpoint(client, auth_headers, db):
+    response = client.get("/admin/db-pool", headers=auth_headers(UserRole.ADMIN))
+    assert response.status_code == 200
+    assert {"checked_out", "idle", "overflow", "wait_seconds_avg"} <= set(response.json()["primary"])
@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.events import RESYNC, Broker, EventHub, InProcessBroker, RedisBroker, project_event, task_event
+from app.models import UserRole
+from app.principal_cache import Principal
+from app.auth import create_access_token
+
+def principal(user_id, role):
+    return Principal(id=user_id, name="P", email=f"{user_id}@example.com", role=role)
+
+def test_developer_filter_and_slow_consumer():
+    async def scenario():
+        hub = EventHub(InProcessBroker(), queue_size=2)
+        developer = await hub.subscribe(principal(7, UserRole.DEVELOPER))
+        project_watcher = await hub.subscribe(principal(8, UserRole.DEVELOPER), project_id=3)
+        manager = await hub.subscribe(principal(9, UserRole.MANAGER))
+
+        await hub.publish(task_event("updated", 1, 3, [None, 7]))   # unassigned from developer 7
+        await hub.publish(task_event("created", 2, 4, [5]))
+        assert (await developer.next(0.1)).id == 1
+        assert await developer.next(0.01) is None
+        assert (await project_watcher.next(0.1)).id == 1
+        assert await project_watcher.next(0.01) is None
+
+        # The manager never reads: the third event overflows its queue of two
+        await hub.publish(project_event("created", 10))
+        assert manager.overflowed
+        assert await manager.next(0.1) is RESYNC
+        assert hub.stats()["disconnected_slow"] == 1
+        assert hub.stats()["subscribers"] == 2
+
+    asyncio.run(scenario())
+
+def test_websocket_receives_visible_task_events(monkeypatch, create_user, auth_headers):
+    monkeypatch.setattr(settings, "EVENT_HEARTBEAT_SECONDS", 0.2)
+    manager_headers = auth_headers(UserRole.MANAGER)
+    developer = create_user(UserRole.DEVELOPER)
+    dev_id, dev_token = developer.id, create_access_token(data={"sub": developer.email})
+
+    with TestClient(app) as client:
+        project_id = client.post("/projects/", json={"name": "Live"}, headers=manager_headers).json()["id"]
+        with client.websocket_connect(f"/events/ws?token={dev_token}") as ws:
+            client.post("/tasks/", json={"title": "Not yours", "project_id": project_id}, headers=manager_headers)
+            task = client.post("/tasks/", json={"title": "Yours", "project_id": project_id, "assigned_to": dev_id},
+                               headers=manager_headers).json()
+
+            messages = []
+            while len(messages) < 1:
+                message = ws.receive_json()
+                if message["type"] != "ping":
+                    messages.append(message)
+            assert messages[0]["type"] == "task.created"
+            assert messages[0]["id"] == task["id"]
+            assert messages[0]["data"]["title"] == "Yours"
+
+def test_deleting_a_user_publishes_their_released_tasks(monkeypatch, create_user, auth_headers):
+    monkeypatch.setattr(settings, "EVENT_HEARTBEAT_SECONDS", 0.2)
+    manager = create_user(UserRole.MANAGER)
+    manager_headers, manager_token = auth_headers(manager), create_access_token(data={"sub": manager.email})
+    developer = create_user(UserRole.DEVELOPER)
+
+    with TestClient(app) as client:
+        project_id = client.post("/projects/", json={"name": "Released"}, headers=manager_headers).json()["id"]
+        task = client.post("/tasks/", json={"title": "Orphaned", "project_id": project_id,
+                                            "assigned_to": developer.id}, headers=manager_headers).json()
+        with client.websocket_connect(f"/events/ws?token={manager_token}") as ws:
+            response = client.delete(f"/users/{developer.id}", headers=auth_headers(UserRole.ADMIN))
+            assert response.status_code == 204
+
+            # Heartbeats arrive every 0.2s; give up after a few seconds of nothing else
+            messages = (ws.receive_json() for _ in range(25))
+            message = next((message for message in messages if message["type"] != "ping"), None)
+            assert message is not None
+            assert (message["type"], message["id"]) == ("task.updated", task["id"])
+            assert message["data"]["assigned_to"] is None
+
+def test_stream_rejects_bad_token():
+    with TestClient(app) as client:
+        assert client.get("/events/stream?token=nope").status_code == 401
+
+def test_brokers_must_implement_start_and_publish():
+    class Incomplete(Broker):
+        async def start(self, deliver):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_redis_broker_resubscribes_after_losing_the_connection(monkeypatch):
+    redis_errors = pytest.importorskip("redis.exceptions")
+    monkeypatch.setattr(RedisBroker, "RECONNECT_MIN_SECONDS", 0)
+    pubsubs = []
+
+    class PubSub:
+        def __init__(self):
+            pubsubs.append(self)
+
+        async def subscribe(self, channel):
+            pass
+
+        async def listen(self):
+            if len(pubsubs) == 1:
+                raise redis_errors.ConnectionError("connection reset")
+            yield {"type": "subscribe", "data": 1}
+            yield {"type": "message", "data": task_event("created", 1, 2, []).to_json()}
+            await asyncio.Event().wait()
+
+        async def close(self):
+            pass
+
+    async def close_client():
+        pass
+
+    async def scenario():
+        broker = RedisBroker("redis://127.0.0.1:1")
+        broker._redis = SimpleNamespace(pubsub=PubSub, close=close_client)
+        delivered = []
+        await broker.start(delivered.append)
+        while len(delivered) < 2:
+            await asyncio.sleep(0.01)
+        await broker.close()
+        return delivered
+
+    delivered = asyncio.run(asyncio.wait_for(scenario(), 5))
+    # Events published while disconnected are lost, so connections are told to resync
+    assert delivered[0] is RESYNC
+    assert delivered[1].id == 1
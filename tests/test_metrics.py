@@ -0,0 +1,67 @@
+import asyncio
+import re
+import uuid
+import pytest
+from app.config import settings
+from app import metrics
+
+@pytest.fixture
+def scrape(client):
+    def samples() -> dict:
+        """Sample name with labels -> value."""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        samples = {}
+        for line in response.text.splitlines():
+            if line and not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return samples
+    return samples
+
+def test_requests_are_recorded_by_route_template_and_phase(client, auth_headers, scrape):
+    headers = auth_headers()
+    project_id = client.post("/projects/", json={"name": "Measured"}, headers=headers).json()["id"]
+    route = 'route="/projects/{project_id}"'
+    before = scrape().get(f'projecthub_http_request_duration_seconds_count{{method="GET",{route},status="200"}}', 0)
+
+    assert client.get(f"/projects/{project_id}", headers=headers).status_code == 200
+    assert client.get(f"/no/such/path/{uuid.uuid4().hex}").status_code == 404
+    samples = scrape()
+
+    assert samples[f'projecthub_http_request_duration_seconds_count{{method="GET",{route},status="200"}}'] == before + 1
+    for phase in ("auth", "db", "serialization"):
+        assert samples[f'projecthub_http_request_phase_seconds_count{{{route},phase="{phase}"}}'] >= 1
+    # Unmatched paths share one label value instead of one series per path
+    assert any('route="unmatched",status="404"' in name for name in samples)
+    assert not any("/no/such/path" in name for name in samples)
+
+def test_histogram_buckets_are_cumulative(client):
+    client.get("/")
+    text = client.get("/metrics").text
+    buckets = [float(value) for value in re.findall(
+        r'^projecthub_http_request_duration_seconds_bucket\{method="GET",route="/metrics",status="200",le="[^"]+"\} (\S+)$',
+        text, flags=re.M,
+    )]
+    assert len(buckets) == len(metrics.LATENCY_BUCKETS) + 1
+    assert buckets == sorted(buckets)
+
+def test_metrics_token(monkeypatch, client):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+def test_unhandled_exceptions_are_counted():
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    middleware = metrics.MetricsMiddleware(failing_app)
+    scope = {"type": "http", "method": "PATCH", "path": "/boom"}
+    labels = ("PATCH", metrics.UNMATCHED_ROUTE, "RuntimeError")
+    before = dict(metrics.request_exceptions._values).get(labels, 0)
+    with pytest.raises(RuntimeError):
+        asyncio.run(middleware(scope, None, None))
+    assert metrics.request_exceptions._values[labels] == before + 1
+    assert metrics.requests_in_flight._values[("PATCH",)] == 0
@@ -0,0 +1,126 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app.models import DashboardCounter, Task, UserRole
+from app import counters, overdue
+
+def iso(delta: timedelta) -> str:
+    return (datetime.utcnow() + delta).isoformat()
+
+@pytest.fixture
+def create_task(client):
+    def create(headers, project_id, deadline=None, **fields):
+        payload = {"title": "Deadline task", "project_id": project_id, "deadline": deadline, **fields}
+        response = client.post("/tasks/", json=payload, headers=headers)
+        assert response.status_code == 201
+        return response.json()["id"]
+    return create
+
+@pytest.fixture
+def overdue_total(client):
+    def total(headers) -> int:
+        return client.get("/dashboard/", headers=headers).json()["overdue_tasks"]
+    return total
+
+@pytest.fixture
+def project_counter(session_factory):
+    def read(project_id) -> int:
+        with session_factory() as db:
+            return db.get(DashboardCounter, project_id).overdue_tasks
+    return read
+
+@pytest.fixture
+def counters_match_reconcile(session_factory):
+    def check():
+        with session_factory() as db:
+            incremental = {row.project_id: row.overdue_tasks for row in db.query(DashboardCounter)}
+            counters.reconcile(db)
+            return incremental == {row.project_id: row.overdue_tasks for row in db.query(DashboardCounter)}
+    return check
+
+@pytest.fixture
+def new_project(client):
+    def create(headers) -> int:
+        return client.post("/projects/", json={"name": "Deadlines"}, headers=headers).json()["id"]
+    return create
+
+def test_write_paths_keep_overdue_counter(
+    client, auth_headers, create_task, overdue_total, project_counter, counters_match_reconcile, new_project
+):
+    headers = auth_headers()
+    project_id = new_project(headers)
+    before = overdue_total(headers)
+
+    late = create_task(headers, project_id, iso(timedelta(days=-1)))
+    create_task(headers, project_id, iso(timedelta(days=1)))
+    assert overdue_total(headers) == before + 1
+    assert project_counter(project_id) == 1
+
+    client.put(f"/tasks/{late}", json={"status": "Done"}, headers=headers)
+    assert project_counter(project_id) == 0
+    client.put(f"/tasks/{late}", json={"status": "In Progress"}, headers=headers)
+    assert project_counter(project_id) == 1
+    client.put(f"/tasks/{late}", json={"deadline": iso(timedelta(days=2))}, headers=headers)
+    assert project_counter(project_id) == 0
+
+    bulk = client.post("/tasks/bulk", json={"tasks": [
+        {"title": "Bulk late", "project_id": project_id, "deadline": iso(timedelta(hours=-1))},
+        {"title": "Bulk late done", "project_id": project_id, "deadline": iso(timedelta(hours=-1)), "status": "Done"},
+    ]}, headers=headers).json()
+    assert project_counter(project_id) == 1
+    bulk_ids = [result["id"] for result in bulk["results"]]
+    client.request("DELETE", "/tasks/bulk", json={"ids": bulk_ids}, headers=headers)
+    assert project_counter(project_id) == 0
+    assert overdue_total(headers) == before
+    assert counters_match_reconcile()
+
+def test_sweep_flags_tasks_as_deadlines_pass(
+    session_factory, auth_headers, create_task, overdue_total, project_counter, counters_match_reconcile, new_project
+):
+    headers = auth_headers()
+    project_id = new_project(headers)
+    task_id = create_task(headers, project_id, iso(timedelta(hours=1)))
+    before = overdue_total(headers)
+
+    # Let the deadline pass without touching the flag, as the clock would
+    with session_factory() as db:
+        db.execute(update(Task).where(Task.id == task_id).values(deadline=datetime.utcnow() - timedelta(minutes=1)))
+        db.commit()
+        assert overdue_total(headers) == before + 1  # counted as lagging before the sweep
+        assert overdue.sweep(db) >= 1
+        assert db.get(Task, task_id).is_overdue
+        assert overdue.sweep(db) == 0
+
+    assert overdue_total(headers) == before + 1
+    assert project_counter(project_id) == 1
+    assert counters_match_reconcile()
+
+def test_next_deadline_is_the_earliest_pending(session_factory, auth_headers, create_task, new_project):
+    headers = auth_headers()
+    project_id = new_project(headers)
+    soon = datetime.utcnow() + timedelta(seconds=30)
+    create_task(headers, project_id, soon.isoformat())
+    with session_factory() as db:
+        assert overdue.next_deadline(db) <= soon
+
+def test_due_tasks_window_and_visibility(client, create_user, auth_headers, create_task, new_project):
+    manager, developer = create_user(), create_user(UserRole.DEVELOPER)
+    manager_id, headers = manager.id, auth_headers(manager)
+    developer_id, developer_headers = developer.id, auth_headers(developer)
+    project_id = new_project(headers)
+    in_hour = create_task(headers, project_id, iso(timedelta(hours=1)), assigned_to=developer_id)
+    tomorrow = create_task(headers, project_id, iso(timedelta(hours=30)), assigned_to=developer_id)
+    late = create_task(headers, project_id, iso(timedelta(hours=-2)), assigned_to=developer_id)
+    create_task(headers, project_id, iso(timedelta(hours=2)), assigned_to=developer_id, status="Done")
+    create_task(headers, project_id, iso(timedelta(hours=2)), assigned_to=manager_id)
+
+    def due(params, as_headers=headers):
+        response = client.get("/tasks/due", params=params, headers=as_headers)
+        assert response.status_code == 200
+        return [task["id"] for task in response.json()]
+
+    assert due({"assigned_to": developer_id}) == [in_hour]
+    assert due({"assigned_to": developer_id, "within": "2d"}) == [in_hour, tomorrow]
+    assert due({"assigned_to": developer_id, "within": "90m", "include_overdue": True}) == [late, in_hour]
+    assert due({"within": "3h"}, developer_headers) == [in_hour]
+    assert client.get("/tasks/due", params={"within": "soon"}, headers=headers).status_code == 422
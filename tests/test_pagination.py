@@ -0,0 +1,78 @@
+import json
+import pytest
+
+@pytest.fixture(scope="module")
+def project_with_tasks(client, auth_headers):
+    headers = auth_headers()
+    project_id = client.post(
+        "/projects/",
+        json={"name": "Pagination Project", "description": "Many tasks", "team_member_ids": []},
+        headers=headers
+    ).json()["id"]
+    for i in range(7):
+        client.post(
+            "/tasks/",
+            json={"title": f"Task {i}", "status": "To Do", "project_id": project_id},
+            headers=headers
+        )
+    return project_id, headers
+
+@pytest.mark.parametrize("sort", ["id", "updated_at"])
+def test_keyset_pagination_walks_every_row_once(client, project_with_tasks, sort):
+    project_id, headers = project_with_tasks
+    seen = []
+    cursor = None
+    while True:
+        params = {"project_id": project_id, "limit": 3, "sort": sort}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/tasks/", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 3
+        seen.extend(task["id"] for task in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+def test_unpaginated_list_has_no_cursor(client, project_with_tasks):
+    project_id, headers = project_with_tasks
+    response = client.get("/tasks/", params={"project_id": project_id}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 7
+    assert "X-Next-Cursor" not in response.headers
+
+def test_invalid_cursor_rejected(client, project_with_tasks):
+    _, headers = project_with_tasks
+    response = client.get("/tasks/", params={"limit": 2, "cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+def test_cursor_bound_to_sort_key(client, project_with_tasks):
+    project_id, headers = project_with_tasks
+    response = client.get("/tasks/", params={"project_id": project_id, "limit": 2}, headers=headers)
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/tasks/",
+        params={"project_id": project_id, "limit": 2, "sort": "updated_at", "cursor": cursor},
+        headers=headers
+    )
+    assert response.status_code == 400
+
+def test_ndjson_stream(client, project_with_tasks):
+    project_id, headers = project_with_tasks
+    response = client.get("/tasks/", params={"project_id": project_id, "format": "ndjson"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 7
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+def test_users_and_projects_paginate(client, project_with_tasks):
+    _, headers = project_with_tasks
+    for path in ("/users/", "/projects/"):
+        response = client.get(path, params={"limit": 1}, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()) == 1
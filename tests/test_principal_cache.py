@@ -0,0 +1,56 @@
+import time
+from app.models import User, UserRole
+from app.principal_cache import Principal, PrincipalCache, principal_cache
+
+def principal(email="a@example.com"):
+    return Principal(id=1, name="A", email=email, role=UserRole.DEVELOPER)
+
+def test_ttl_expiry():
+    cache = PrincipalCache(max_size=10, ttl_seconds=0.05)
+    cache.set("a", principal())
+    assert cache.get("a") is not None
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_lru_bound():
+    cache = PrincipalCache(max_size=2, ttl_seconds=60)
+    cache.set("a", principal("a"))
+    cache.set("b", principal("b"))
+    cache.get("a")
+    cache.set("c", principal("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_repeat_requests_hit_cache(client, auth_headers):
+    headers = auth_headers(UserRole.MANAGER)
+    before = principal_cache.stats()
+    client.get("/tasks/", params={"limit": 1}, headers=headers)
+    client.get("/tasks/", params={"limit": 1}, headers=headers)
+    after = principal_cache.stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+def test_deleted_user_token_rejected_immediately(client, create_user, auth_headers):
+    admin_headers = auth_headers(UserRole.ADMIN)
+    victim = create_user(UserRole.DEVELOPER)
+    victim_id, victim_headers = victim.id, auth_headers(victim)
+    assert client.get("/tasks/", headers=victim_headers).status_code == 200
+
+    assert client.delete(f"/users/{victim_id}", headers=admin_headers).status_code == 204
+    assert client.get("/tasks/", headers=victim_headers).status_code == 401
+
+def test_role_change_invalidates_entry(client, session_factory, create_user, auth_headers):
+    user = create_user(UserRole.DEVELOPER)
+    user_id, headers = user.id, auth_headers(user)
+    assert client.get("/admin/cache/principals", headers=headers).status_code == 403
+
+    with session_factory() as db:
+        db.get(User, user_id).role = UserRole.ADMIN
+        db.commit()
+
+    response = client.get("/admin/cache/principals", headers=headers)
+    assert response.status_code == 200
+    assert {"hits", "misses", "size"} <= set(response.json())
@@ -0,0 +1,43 @@
+import pytest
+
+@pytest.fixture
+def count_project_list_queries(client, statements):
+    def count(headers, **params):
+        statements.clear()
+        response = client.get("/projects/", params=params, headers=headers)
+        assert response.status_code == 200
+        return len([s for s in statements if s.lstrip().upper().startswith("SELECT")]), response.json()
+    return count
+
+def test_team_members_loaded_without_n_plus_one(client, create_user, auth_headers, count_project_list_queries):
+    user = create_user()
+    member_id, headers = user.id, auth_headers(user)
+    created = [client.post("/projects/", json={"name": "Loaded", "team_member_ids": [member_id]}, headers=headers)]
+    few, _ = count_project_list_queries(headers)
+
+    for i in range(5):
+        created.append(client.post("/projects/", json={"name": f"Loaded {i}", "team_member_ids": [member_id]},
+                                   headers=headers))
+    many, projects = count_project_list_queries(headers)
+
+    assert many == few
+    created_ids = {response.json()["id"] for response in created}
+    loaded = [p for p in projects if p["id"] in created_ids]
+    assert len(loaded) == len(created_ids)
+    assert all(p["team_members"][0]["id"] == member_id for p in loaded)
+
+def test_fields_skip_member_expansion(client, create_user, auth_headers, count_project_list_queries):
+    user = create_user()
+    member_id, headers = user.id, auth_headers(user)
+    client.post("/projects/", json={"name": "Named Only", "team_member_ids": [member_id]}, headers=headers)
+
+    with_members, _ = count_project_list_queries(headers)
+    names_only, projects = count_project_list_queries(headers, fields="id,name")
+
+    assert names_only == with_members - 1
+    assert all(set(p) == {"id", "name"} for p in projects)
+
+def test_unknown_field_rejected(client, auth_headers):
+    headers = auth_headers()
+    response = client.get("/projects/", params={"fields": "id,password_hash"}, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.models import UserRole
+
+@pytest.fixture
+def statements():
+    """Overrides the shared fixture to keep parameters: membership writes are checked by the ids they bind."""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append((statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(Engine, "before_cursor_execute", record)
+
+def member_ids(project) -> list:
+    return sorted(member["id"] for member in project["team_members"])
+
+@pytest.fixture
+def membership_writes(statements):
+    def writes() -> list:
+        return [
+            (statement.split()[0].upper(), parameters) for statement, parameters in statements
+            if "project_members" in statement and not statement.lstrip().upper().startswith("SELECT")
+        ]
+    return writes
+
+def test_update_writes_only_changed_memberships(client, create_user, auth_headers, statements, membership_writes):
+    headers = auth_headers()
+    keep, drop, join = (create_user(UserRole.DEVELOPER).id for _ in range(3))
+    project = client.post("/projects/", json={"name": "Team", "team_member_ids": [keep, drop]}, headers=headers).json()
+    assert member_ids(project) == sorted([keep, drop])
+
+    statements.clear()
+    response = client.put(f"/projects/{project['id']}", json={"team_member_ids": [keep, join]}, headers=headers)
+    assert response.status_code == 200
+    assert member_ids(response.json()) == sorted([keep, join])
+    writes = membership_writes()
+    assert [kind for kind, _ in writes] == ["DELETE", "INSERT"]
+    assert drop in writes[0][1] and join in writes[1][1] and keep not in writes[1][1]
+    # Validation only reads ids
+    assert not any(s.lstrip().upper().startswith("SELECT USERS.NAME") for s, _ in statements)
+
+def test_unchanged_membership_keeps_validators(client, create_user, auth_headers, statements, membership_writes):
+    headers = auth_headers()
+    member = create_user(UserRole.DEVELOPER).id
+    project = client.post("/projects/", json={"name": "Steady", "team_member_ids": [member]}, headers=headers).json()
+
+    statements.clear()
+    updated = client.put(f"/projects/{project['id']}", json={"team_member_ids": [member]}, headers=headers).json()
+    assert membership_writes() == []
+    assert updated["updated_at"] == project["updated_at"]
+
+def test_add_and_remove_members(client, create_user, auth_headers, statements, membership_writes):
+    headers = auth_headers()
+    first, second = (create_user(UserRole.DEVELOPER).id for _ in range(2))
+    project_id = client.post("/projects/", json={"name": "Growing"}, headers=headers).json()["id"]
+    url = f"/projects/{project_id}/members"
+
+    added = client.post(url, json={"user_ids": [first, second]}, headers=headers)
+    assert added.status_code == 200
+    assert member_ids(added.json()) == sorted([first, second])
+
+    statements.clear()
+    again = client.post(url, json={"user_ids": [first]}, headers=headers).json()
+    assert membership_writes() == []
+    assert again["updated_at"] == added.json()["updated_at"]
+
+    removed = client.request("DELETE", url, json={"user_ids": [first]}, headers=headers)
+    assert removed.status_code == 200
+    assert member_ids(removed.json()) == [second]
+
+def test_membership_validation_and_permissions(client, create_user, auth_headers):
+    headers = auth_headers()
+    user = create_user(UserRole.DEVELOPER)
+    developer_id, developer_headers = user.id, auth_headers(user)
+    project_id = client.post("/projects/", json={"name": "Guarded"}, headers=headers).json()["id"]
+    url = f"/projects/{project_id}/members"
+
+    missing = client.post(url, json={"user_ids": [developer_id, 10 ** 9]}, headers=headers)
+    assert missing.status_code == 404
+    assert client.get(f"/projects/{project_id}", headers=headers).json()["team_members"] == []
+    assert client.post("/projects/", json={"name": "Bad", "team_member_ids": [10 ** 9]}, headers=headers).status_code == 404
+    assert client.post("/projects/999999999/members", json={"user_ids": [developer_id]}, headers=headers).status_code == 404
+    assert client.post(url, json={"user_ids": []}, headers=headers).status_code == 422
+    assert client.post(url, json={"user_ids": [developer_id]}, headers=developer_headers).status_code == 403
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import select
+from app.models import Project, Task, User
+from app.schemas import ProjectResponse, TaskResponse, UserResponse
+
+@pytest.fixture
+def orm_serialized(session_factory):
+    def serialize(model, schema) -> list:
+        """What the list endpoints returned when they loaded entities."""
+        with session_factory() as db:
+            rows = db.scalars(select(model).order_by(model.id)).all()
+            return [schema.model_validate(row).model_dump(mode="json") for row in rows]
+    return serialize
+
+def by_id(items) -> dict:
+    items = {item["id"]: item for item in items}
+    for item in items.values():
+        if "team_members" in item:
+            item["team_members"] = sorted(item["team_members"], key=lambda member: member["id"])
+    return items
+
+def test_list_endpoints_match_entity_serialization(client, create_user, auth_headers, orm_serialized):
+    user = create_user()
+    member_id, headers = user.id, auth_headers(user)
+    project = client.post("/projects/", json={"name": "Projected", "team_member_ids": [member_id]}, headers=headers).json()
+    client.post("/projects/", json={"name": "Projected, no members"}, headers=headers)
+    client.post("/tasks/", json={"title": "Projected", "project_id": project["id"], "assigned_to": member_id}, headers=headers)
+
+    for path, model, schema in (
+        ("/tasks/", Task, TaskResponse),
+        ("/projects/", Project, ProjectResponse),
+        ("/users/", User, UserResponse),
+    ):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200
+        assert by_id(response.json()) == by_id(orm_serialized(model, schema))
+
+def test_user_list_does_not_select_password_hash(client, auth_headers, statements):
+    headers = auth_headers()
+    statements.clear()
+    assert client.get("/users/", headers=headers).status_code == 200
+    assert client.get("/users/", params={"format": "ndjson"}, headers=headers).status_code == 200
+    # The token's user is still loaded as an entity, by email
+    listings = [s for s in statements if "FROM users" in s and "ORDER BY users.id" in s]
+    assert len(listings) == 2
+    assert not [s for s in listings if "password_hash" in s]
+
+def test_projects_fields_without_team_members_skip_member_query(client, create_user, auth_headers, statements):
+    user = create_user()
+    member_id, headers = user.id, auth_headers(user)
+    client.post("/projects/", json={"name": "Fields", "team_member_ids": [member_id]}, headers=headers)
+    statements.clear()
+    response = client.get("/projects/", params={"fields": "id,name"}, headers=headers)
+    assert response.status_code == 200
+    assert all(set(project) == {"id", "name"} for project in response.json())
+    assert not [s for s in statements if "project_members" in s]
@@ -0,0 +1,71 @@
+import logging
+import pytest
+from app.models import UserRole
+from app.config import settings
+from app.query_stats import QUERY_COUNT_HEADER, query_budget
+
+@pytest.fixture
+def add_projects(client):
+    def add(headers, count: int, member_ids: list) -> list:
+        project_ids = []
+        for i in range(count):
+            project_id = client.post("/projects/", json={"name": f"Budget {i}", "team_member_ids": member_ids},
+                                     headers=headers).json()["id"]
+            client.post("/tasks/bulk", json={"tasks": [
+                {"title": f"Budget task {j}", "project_id": project_id, "assigned_to": member_ids[0]} for j in range(3)
+            ]}, headers=headers)
+            project_ids.append(project_id)
+        return project_ids
+    return add
+
+# The list endpoints run a collection-validator query, then the page, then
+# (for projects) one query for every listed project's team members.
+BUDGETS = {
+    "/projects/": 3,
+    "/tasks/": 2,
+    "/users/": 1,
+    "/dashboard/": 2,
+}
+
+def test_query_budgets_do_not_grow_with_rows(client, create_user, auth_headers, add_projects):
+    headers = auth_headers()
+    member_ids = [create_user(UserRole.DEVELOPER).id for _ in range(2)]
+    project_id = add_projects(headers, 1, member_ids)[0]
+    client.get("/dashboard/", headers=headers)  # caches the principal
+
+    for rows in (1, 15):
+        if rows > 1:
+            add_projects(headers, rows - 1, member_ids)
+        for url, budget in BUDGETS.items():
+            with query_budget(budget):
+                assert client.get(url, params={"limit": 50} if url != "/dashboard/" else None,
+                                  headers=headers).status_code == 200
+        with query_budget(2):
+            assert client.get(f"/projects/{project_id}", headers=headers).status_code == 200
+
+def test_exceeded_budget_lists_the_statements(client, auth_headers):
+    headers = auth_headers()
+    client.get("/dashboard/", headers=headers)
+    with pytest.raises(AssertionError) as failure:
+        with query_budget(0):
+            client.get("/tasks/", headers=headers)
+    assert "budget is 0" in str(failure.value)
+    assert "FROM tasks" in str(failure.value)
+
+def test_debug_headers(client, auth_headers, monkeypatch):
+    headers = auth_headers()
+    assert QUERY_COUNT_HEADER not in client.get("/tasks/", headers=headers).headers
+
+    monkeypatch.setattr(settings, "SQL_DEBUG_HEADER", True)
+    with query_budget(10) as stats:
+        response = client.get("/tasks/", headers=headers)
+    assert int(response.headers[QUERY_COUNT_HEADER]) == stats.count
+    assert response.headers["server-timing"].startswith("db;dur=")
+
+def test_slow_queries_are_logged(client, auth_headers, monkeypatch, caplog):
+    headers = auth_headers()
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 1e-9)
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+        client.get("/users/", headers=headers)
+    messages = [record.getMessage() for record in caplog.records if record.name == "app.query_stats"]
+    assert any("in /users/" in message and "FROM users" in message for message in messages)
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, inspect, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import auth, cascades, migrations, overdue
+from app.models import Project, Task, UserRole
+from app.pagination import encode_cursor, page_statement
+from app.principal_cache import Principal
+from app.projection import projection
+from app.routers import auth as auth_router, projects, tasks, users
+from app.schemas import ProjectResponse, TaskResponse
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+migrations.upgrade(engine)
+Session = sessionmaker(bind=engine)
+
+def query_plan(query) -> str:
+    statement = query.statement if hasattr(query, "statement") else query
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+def executed_plans(helper, *args) -> list:
+    """Query plans of every statement helper(db, *args) sends to the (empty) database."""
+    executed = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session() as db:
+            try:
+                helper(db, *args)
+            except HTTPException:
+                pass  # Nothing is found in an empty database; the lookup ran all the same
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert executed, f"{helper.__name__} ran no statements"
+    with engine.connect() as connection:
+        return [
+            "\n".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters))
+            for sql, parameters in executed
+        ]
+
+def assert_indexed(plan: str, table: str, index: str = None):
+    for line in plan.splitlines():
+        if f" {table} " not in f" {line} ":
+            continue
+        assert line.startswith("SEARCH"), f"{table} is scanned:\n{plan}"
+        if index:
+            assert index in line, f"{table} does not use {index}:\n{plan}"
+
+developer = Principal(id=1, name="Dev", email="dev@example.com", role=UserRole.DEVELOPER)
+manager = Principal(id=2, name="Manager", email="manager@example.com", role=UserRole.MANAGER)
+id_cursor = encode_cursor("id", SimpleNamespace(id=100))
+updated_at_cursor = encode_cursor("updated_at", SimpleNamespace(id=100, updated_at=datetime(2024, 1, 1)))
+
+def task_page(current_user, project_id=None, assigned_to=None, cursor=None, sort="id") -> list:
+    """The page select GET /tasks/ runs on each database."""
+    stmt = tasks._visible_tasks(projection(Task, TaskResponse), current_user, project_id, assigned_to)
+    return [query_plan(page_statement(stmt, Task, 50, cursor, sort))]
+
+def due_tasks(current_user, include_overdue: bool) -> list:
+    stmt = tasks._visible_tasks(projection(Task, TaskResponse), current_user, None, None)
+    return executed_plans(tasks._due_tasks, stmt, timedelta(hours=24), include_overdue, 50)
+
+# name: (plans of the statements the router helper runs, table, expected index)
+QUERY_SHAPES = {
+    "list_tasks developer": (
+        # Either assigned_to index serves it: (assigned_to, status) or (assigned_to, deadline)
+        lambda: task_page(developer), "tasks", "ix_tasks_assigned_to_"),
+    "list_tasks by project": (lambda: task_page(developer, project_id=1), "tasks", "ix_tasks_project_id_status"),
+    "list_tasks by assignee": (lambda: task_page(manager, assigned_to=1), "tasks", "ix_tasks_assigned_to_"),
+    "list_tasks page": (lambda: task_page(manager, cursor=id_cursor), "tasks", None),
+    "list_tasks page by updated_at": (
+        lambda: task_page(manager, cursor=updated_at_cursor, sort="updated_at"), "tasks", "ix_tasks_updated_at"),
+    "get_task": (lambda: executed_plans(tasks._get_task, 1), "tasks", None),
+    "get_project": (lambda: executed_plans(projects._get_project, 1), "projects", None),
+    "list_projects page": (
+        lambda: [query_plan(page_statement(projection(Project, ProjectResponse), Project, 50, id_cursor))],
+        "projects", None),
+    "project team members": (lambda: executed_plans(projects._team_members, [1, 2]), "project_members", None),
+    "get_user": (lambda: executed_plans(users._get_user, 1), "users", None),
+    "login by email": (lambda: executed_plans(auth_router._find_user, "a@example.com"), "users", "ix_users_email"),
+    "principal by email": (lambda: executed_plans(auth._load_principal, "a@example.com"), "users", "ix_users_email"),
+    "overdue count": (lambda: executed_plans(overdue.overdue_count, 0), "tasks", "ix_tasks_is_overdue_status_deadline"),
+    "overdue sweep": (lambda: executed_plans(overdue.sweep), "tasks", "ix_tasks_is_overdue_status_deadline"),
+    "next deadline": (lambda: executed_plans(overdue.next_deadline), "tasks", "ix_tasks_is_overdue_status_deadline"),
+    "due tasks for user": (lambda: due_tasks(developer, False), "tasks", "ix_tasks_assigned_to_deadline"),
+    "due and overdue tasks": (lambda: due_tasks(manager, True), "tasks", "ix_tasks_status_deadline"),
+    "released user tasks": (lambda: executed_plans(cascades.release_user, 1), "tasks", "ix_tasks_assigned_to_"),
+    "member projects": (
+        lambda: executed_plans(cascades.release_user, 1), "project_members", "ix_project_members_user_id"),
+}
+
+@pytest.mark.parametrize("name", sorted(QUERY_SHAPES))
+def test_router_queries_use_indexes(name):
+    plans, table, index = QUERY_SHAPES[name]
+    plans = plans()
+    assert any(f" {table} " in f" {plan} " for plan in plans), f"No statement reads {table}:\n{plans}"
+    for plan in plans:
+        assert_indexed(plan, table, index)
+
+def test_overdue_queries_skip_done_tasks():
+    # Both equality columns bound, so the deadline range only covers open tasks
+    plan = query_plan(select(Task.id).where(*overdue._past_due_unflagged(datetime(2024, 1, 1))))
+    assert "(is_overdue=? AND status=? AND deadline<?)" in plan
+
+def test_upgrade_adds_indexes_and_primary_key_to_legacy_schema():
+    legacy = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with legacy.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+                                "email VARCHAR(100) NOT NULL, password_hash VARCHAR(255) NOT NULL, "
+                                "role VARCHAR(9) NOT NULL, created_at DATETIME)"))
+        connection.execute(text("CREATE TABLE projects (id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, "
+                                "description VARCHAR(500), created_at DATETIME, updated_at DATETIME)"))
+        connection.execute(text("CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+                                "description VARCHAR(500), status VARCHAR(11), deadline DATETIME, "
+                                "created_at DATETIME, updated_at DATETIME, project_id INTEGER NOT NULL, "
+                                "assigned_to INTEGER)"))
+        connection.execute(text("CREATE TABLE project_members (project_id INTEGER, user_id INTEGER)"))
+        connection.execute(text("INSERT INTO project_members VALUES (1, 1), (1, 1), (1, 2), (NULL, 3)"))
+
+    migrations.upgrade(legacy)
+    migrations.upgrade(legacy)
+
+    inspector = inspect(legacy)
+    assert inspector.get_pk_constraint("project_members")["constrained_columns"] == ["project_id", "user_id"]
+    task_indexes = {index["name"] for index in inspector.get_indexes("tasks")}
+    assert {"ix_tasks_project_id_status", "ix_tasks_assigned_to_status", "ix_tasks_status_deadline"} <= task_indexes
+    assert "ix_tasks_is_overdue_status_deadline" in task_indexes
+
+    # Databases that got the first overdue index from migration 5 have it replaced
+    with legacy.begin() as connection:
+        connection.execute(text("DROP INDEX ix_tasks_is_overdue_status_deadline"))
+        connection.execute(text("CREATE INDEX ix_tasks_is_overdue_deadline ON tasks (is_overdue, deadline)"))
+        connection.execute(text("DELETE FROM schema_migrations WHERE version = 9"))
+    migrations.upgrade(legacy)
+    task_indexes = {index["name"] for index in inspect(legacy).get_indexes("tasks")}
+    assert "ix_tasks_is_overdue_status_deadline" in task_indexes
+    assert "ix_tasks_is_overdue_deadline" not in task_indexes
+    with legacy.connect() as connection:
+        rows = connection.execute(text("SELECT project_id, user_id FROM project_members ORDER BY user_id")).fetchall()
+        versions = connection.execute(text("SELECT version FROM schema_migrations")).scalars().all()
+    assert [tuple(row) for row in rows] == [(1, 1), (1, 2)]
+    assert sorted(versions) == [version for version, _, _ in migrations.MIGRATIONS]
@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base
+from app.models import Project
+from app.config import settings
+from app import replicas
+
+def make_replica(path, marker: str) -> str:
+    url = f"sqlite:///{path}"
+    replica_engine = create_engine(url)
+    Base.metadata.create_all(bind=replica_engine)
+    with sessionmaker(bind=replica_engine)() as db:
+        db.add(Project(name=marker))
+        db.commit()
+    replica_engine.dispose()
+    return url
+
+@pytest.fixture
+def replica_urls(tmp_path, monkeypatch):
+    urls = [make_replica(tmp_path / "replica1.db", "on-replica-1"), make_replica(tmp_path / "replica2.db", "on-replica-2")]
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URLS", ",".join(urls))
+    replicas.recent_writers.clear()
+    yield urls
+    asyncio.run(replicas.get_replica_set().dispose())
+    replicas._replica_set.cache_clear()
+    replicas.recent_writers.clear()
+
+def source(client, headers) -> str:
+    """Which database served GET /projects/: the replica marker, or "primary"."""
+    names = {project["name"] for project in client.get("/projects/", headers=headers).json()}
+    markers = names & {"on-replica-1", "on-replica-2"}
+    return markers.pop() if markers else "primary"
+
+def test_reads_rotate_across_replicas(auth_headers, replica_urls):
+    client, headers = TestClient(app), auth_headers()
+    seen = [source(client, headers) for _ in range(4)]
+    assert sorted(seen) == ["on-replica-1", "on-replica-1", "on-replica-2", "on-replica-2"]
+    assert seen[0] != seen[1]
+
+def test_writers_read_from_primary_until_the_window_passes(auth_headers, replica_urls, monkeypatch):
+    client, headers = TestClient(app), auth_headers()
+    response = client.post("/projects/", json={"name": "Just written"}, headers=headers)
+    assert response.status_code == 201
+    assert replicas.STICKY_COOKIE in response.headers["set-cookie"]
+    assert source(client, headers) == "primary"
+
+    # Another worker only has the cookie to go by
+    replicas.recent_writers.clear()
+    assert source(client, headers) == "primary"
+
+    # And this worker recognises the token without the cookie
+    client.cookies.clear()
+    client.post("/projects/", json={"name": "Written again"}, headers=headers)
+    client.cookies.clear()
+    assert source(client, headers) == "primary"
+
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 0)
+    replicas.recent_writers.clear()
+    client.post("/projects/", json={"name": "No window"}, headers=headers)
+    client.cookies.clear()
+    assert source(client, headers) != "primary"
+
+def test_failed_writes_do_not_pin_reads(auth_headers, replica_urls):
+    client, headers = TestClient(app), auth_headers()
+    response = client.post("/projects/", json={}, headers=headers)
+    assert response.status_code == 422
+    assert "set-cookie" not in response.headers
+    assert source(client, headers) != "primary"
+
+def test_unhealthy_replicas_leave_the_rotation(auth_headers, replica_urls, tmp_path):
+    client, headers = TestClient(app), auth_headers()
+    replica_set = replicas.get_replica_set()
+    first, second = replica_set.replicas
+    second.engine.dispose()
+    (tmp_path / "replica2.db").unlink()
+    (tmp_path / "replica2.db").mkdir()
+
+    asyncio.run(replica_set.check())
+    assert [replica.healthy for replica in replica_set.replicas] == [True, False]
+    assert {source(client, headers) for _ in range(3)} == {"on-replica-1"}
+
+    first.mark_down(RuntimeError("lost"))
+    assert source(client, headers) == "primary"
+
+    (tmp_path / "replica2.db").rmdir()
+    make_replica(tmp_path / "replica2.db", "on-replica-2")
+    asyncio.run(replica_set.check())
+    assert first.healthy and second.healthy
+    assert {source(client, headers) for _ in range(2)} == {"on-replica-1", "on-replica-2"}
+
+def test_replica_sessions_reject_writes(replica_urls):
+    db = replicas.get_replica_set().replicas[0].sessionmaker()
+    try:
+        db.add(Project(name="Nope"))
+        with pytest.raises(RuntimeError, match="read-only"):
+            db.flush()
+    finally:
+        db.close()
+
+def test_without_replicas_reads_use_the_primary(auth_headers):
+    replicas.recent_writers.clear()
+    client, headers = TestClient(app), auth_headers()
+    assert replicas.get_replica_set() is None
+    response = client.post("/projects/", json={"name": "Primary only"}, headers=headers)
+    assert "set-cookie" not in response.headers
+    assert source(client, headers) == "primary"
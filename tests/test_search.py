@@ -0,0 +1,87 @@
+import uuid
+import pytest
+from app.models import User, UserRole
+from app import search
+
+@pytest.fixture(scope="module", autouse=True)
+def fts_index(engine):
+    with engine.begin() as connection:
+        search.install(connection)
+
+@pytest.fixture
+def corpus(client, create_user, auth_headers):
+    """A unique word per test run, so hits from other tests never interfere."""
+    word = "zq" + uuid.uuid4().hex[:8]
+    developer = create_user(UserRole.DEVELOPER)
+    headers, developer_headers = auth_headers(), auth_headers(developer)
+    project = client.post(
+        "/projects/", json={"name": f"{word} rollout", "description": "Launch plan"}, headers=headers
+    ).json()
+    tasks = {}
+    for title, description, assignee in (
+        (f"Fix {word} login", "Users cannot sign in", developer.id),
+        ("Write docs", f"Explain the {word} flow", developer.id),
+        (f"{word} dashboard", "Charts", None),
+    ):
+        response = client.post("/tasks/", json={
+            "title": title, "description": description, "project_id": project["id"], "assigned_to": assignee,
+        }, headers=headers)
+        tasks[title] = response.json()
+    return {"word": word, "project": project, "tasks": tasks, "headers": headers,
+            "developer_headers": developer_headers}
+
+def hits(response):
+    assert response.status_code == 200
+    return [(hit["type"], hit["title"]) for hit in response.json()["results"]]
+
+def test_backend_is_fts5_once_installed(db):
+    assert search.backend(db) == search.FTS5
+
+def test_search_ranks_title_matches_first(client, corpus):
+    word = corpus["word"]
+    results = hits(client.get("/search", params={"q": word}, headers=corpus["headers"]))
+    assert len(results) == 4
+    assert results[-1] == ("task", "Write docs")
+    assert ("project", f"{word} rollout") in results
+
+def test_search_matches_word_prefixes_and_all_terms(client, corpus):
+    word = corpus["word"]
+    assert hits(client.get("/search", params={"q": f"{word[:-2]} logi"}, headers=corpus["headers"])) == [
+        ("task", f"Fix {word} login")
+    ]
+    assert hits(client.get("/search", params={"q": f"{word} nothingmatches"}, headers=corpus["headers"])) == []
+
+def test_search_type_filter_and_pagination(client, corpus):
+    params = {"q": corpus["word"], "type": "task", "limit": 2}
+    first = client.get("/search", params=params, headers=corpus["headers"]).json()
+    second = client.get("/search", params={**params, "offset": 2}, headers=corpus["headers"]).json()
+    assert first["has_more"] and not second["has_more"]
+    assert {hit["type"] for hit in first["results"] + second["results"]} == {"task"}
+    assert len({hit["id"] for hit in first["results"] + second["results"]}) == 3
+
+def test_developers_only_find_their_tasks(client, corpus):
+    word = corpus["word"]
+    results = hits(client.get("/search", params={"q": word}, headers=corpus["developer_headers"]))
+    assert ("task", f"{word} dashboard") not in results
+    assert ("task", f"Fix {word} login") in results
+    assert ("project", f"{word} rollout") in results
+
+def test_index_follows_updates_and_deletes(client, corpus):
+    word, headers = corpus["word"], corpus["headers"]
+    task = corpus["tasks"][f"{word} dashboard"]
+    client.put(f"/tasks/{task['id']}", json={"title": "Renamed"}, headers=headers)
+    assert ("task", f"{word} dashboard") not in hits(client.get("/search", params={"q": word}, headers=headers))
+
+    client.delete(f"/projects/{corpus['project']['id']}", headers=headers)
+    assert hits(client.get("/search", params={"q": word}, headers=headers)) == []
+
+def test_like_fallback_matches_fts5(db, corpus):
+    manager = db.query(User).filter(User.role == UserRole.MANAGER).first()
+    fts = search.search(db, manager, corpus["word"], using=search.FTS5)
+    like = search.search(db, manager, corpus["word"], using=search.LIKE)
+    assert [hit["id"] for hit in like["results"]][-1] == corpus["tasks"]["Write docs"]["id"]
+    assert {(hit["type"], hit["id"]) for hit in like["results"]} == {(hit["type"], hit["id"]) for hit in fts["results"]}
+
+def test_query_without_terms_is_rejected(client, auth_headers):
+    headers = auth_headers()
+    assert client.get("/search", params={"q": "**"}, headers=headers).status_code == 400
@@ -0,0 +1,35 @@
+import pytest
+from app.config import settings
+
+@pytest.fixture(scope="module")
+def headers(client, create_user, auth_headers):
+    user = create_user(name="Zoë Ünicode")
+    headers, user_id = auth_headers(user), user.id
+
+    project_id = client.post("/projects/", json={"name": "Café ☕", "team_member_ids": [user_id]}, headers=headers).json()["id"]
+    client.post("/tasks/", json={"title": "Überprüfen", "project_id": project_id, "assigned_to": user_id,
+                                 "deadline": "2030-01-02T03:04:05"}, headers=headers)
+    client.post("/tasks/", json={"title": "Plain", "description": 'quote " and \\\\ slash', "project_id": project_id},
+                headers=headers)
+    return headers
+
+@pytest.mark.parametrize("path", [
+    "/tasks/",
+    "/tasks/?limit=1",
+    "/projects/",
+    "/projects/?fields=id,name,team_members",
+    "/users/",
+    "/tasks/?format=ndjson",
+    "/projects/?format=ndjson&fields=id,name",
+])
+def test_fast_path_is_byte_compatible(client, path, headers, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    expected = client.get(path, headers=headers)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    fast = client.get(path, headers=headers)
+
+    assert fast.status_code == expected.status_code == 200
+    assert fast.content == expected.content
+    assert fast.headers["content-type"] == expected.headers["content-type"]
+    assert fast.headers.get("x-next-cursor") == expected.headers.get("x-next-cursor")
+    assert fast.headers.get("etag") == expected.headers.get("etag")
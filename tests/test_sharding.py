@@ -0,0 +1,309 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import delete, func, select, update
+from app.models import DashboardCounter, Project, ProjectShard, Task, Tombstone, User, UserRole
+from app.config import settings
+from app import counters, sharding
+
+@pytest.fixture
+def shard_set(tmp_path, monkeypatch, session_factory):
+    def clear_directory():
+        with session_factory() as db:
+            db.execute(delete(ProjectShard))
+            db.commit()
+
+    monkeypatch.setattr(settings, "DATABASE_SHARD_URLS", ",".join(f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(3)))
+    clear_directory()
+    shard_set = sharding.get_shard_set()
+    sharding.setup_shards(session_factory, shard_set)
+    yield shard_set
+    asyncio.run(shard_set.dispose())
+    sharding._shard_set.cache_clear()
+    clear_directory()
+
+def shard_rows(shard, model, *where) -> list:
+    with shard.sync_sessionmaker() as db:
+        return db.scalars(select(model).where(*where)).all()
+
+@pytest.fixture
+def create_project(client):
+    def create(headers, name, **fields) -> dict:
+        response = client.post("/projects/", json={"name": name, **fields}, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return create
+
+@pytest.fixture
+def create_task(client):
+    def create(headers, project_id, title, **fields) -> dict:
+        response = client.post("/tasks/", json={"title": title, "project_id": project_id, **fields}, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return create
+
+def test_projects_are_placed_on_the_least_loaded_shard(client, create_user, auth_headers, create_project, shard_set):
+    headers, member = auth_headers(), create_user(UserRole.DEVELOPER)
+    projects = [create_project(headers, f"Spread {i}", team_member_ids=[member.id]) for i in range(3)]
+
+    placed = [[project.name for project in shard_rows(shard, Project)] for shard in shard_set.shards]
+    assert sorted(placed) == [["Spread 0"], ["Spread 1"], ["Spread 2"]]
+    for project in projects:
+        response = client.get(f"/projects/{project['id']}", headers=headers)
+        assert response.status_code == 200
+        # Members live on the shard, their users on the primary
+        assert [user["email"] for user in response.json()["team_members"]] == [member.email]
+    assert client.get("/projects/999999", headers=headers).status_code == 404
+
+def test_reads_are_merged_across_shards(client, auth_headers, create_project, create_task, shard_set):
+    headers = auth_headers()
+    projects = [create_project(headers, f"Merged {i}") for i in range(3)]
+    tasks = [create_task(headers, project["id"], f"Task {i}-{j}") for j in range(2) for i, project in enumerate(projects)]
+    assert len({task["id"] for task in tasks}) == len(tasks)
+
+    listed, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/tasks/", params=params, headers=headers)
+        assert response.status_code == 200
+        listed += [task["id"] for task in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert listed == sorted(task["id"] for task in tasks)
+
+    response = client.get("/tasks/", params={"project_id": projects[1]["id"]}, headers=headers)
+    assert {task["title"] for task in response.json()} == {"Task 1-0", "Task 1-1"}
+    streamed = client.get("/tasks/", params={"format": "ndjson"}, headers=headers).text.splitlines()
+    assert len(streamed) == len(tasks)
+    assert [project["name"] for project in client.get("/projects/", headers=headers).json()] == [
+        "Merged 0", "Merged 1", "Merged 2"
+    ]
+
+    dashboard = client.get("/dashboard/").json()
+    assert dashboard["total_projects"] == 3
+    assert dashboard["total_tasks"] == 6
+    assert dashboard["tasks_by_status"]["To Do"] == 6
+
+    results = client.get("/search", params={"q": "Merged"}, headers=headers).json()["results"]
+    assert {hit["id"] for hit in results} == {project["id"] for project in projects}
+
+def test_changes_feeds_are_merged_across_shards(
+    client, create_user, auth_headers, create_project, create_task, shard_set, monkeypatch
+):
+    monkeypatch.setattr(settings, "CHANGES_SETTLE_SECONDS", 0)
+    headers, member = auth_headers(), create_user(UserRole.DEVELOPER)
+    projects = [create_project(headers, f"Fed {i}", team_member_ids=[member.id]) for i in range(3)]
+    tasks = [create_task(headers, project["id"], f"Fed task {i}") for i, project in enumerate(projects)]
+
+    response = client.get("/projects/changes", params={"limit": 2}, headers=headers)
+    assert response.status_code == 200
+    feed = response.json()
+    assert [project["name"] for project in feed["changed"]] == ["Fed 0", "Fed 1"]
+    assert [user["email"] for user in feed["changed"][0]["team_members"]] == [member.email]
+    assert feed["has_more"]
+    feed = client.get("/projects/changes", params={"limit": 2, "since": feed["cursor"]}, headers=headers).json()
+    assert [project["name"] for project in feed["changed"]] == ["Fed 2"]
+
+    feed = client.get("/tasks/changes", headers=headers).json()
+    assert [task["id"] for task in feed["changed"]] == [task["id"] for task in tasks]
+    cursor = feed["cursor"]
+    assert client.delete(f"/tasks/{tasks[1]['id']}", headers=headers).status_code == 204
+    assert client.delete(f"/projects/{projects[2]['id']}", headers=headers).status_code == 204
+    assert client.get("/tasks/changes", params={"since": cursor}, headers=headers).json()["deleted"] == [
+        tasks[1]["id"], tasks[2]["id"]
+    ]
+
+def test_task_writes_go_to_the_task_shard(
+    client, session_factory, auth_headers, create_project, create_task, shard_set
+):
+    headers = auth_headers()
+    project = create_project(headers, "Writes")
+    other = create_project(headers, "Other")
+    task = create_task(headers, project["id"], "Routed")
+
+    response = client.put(f"/tasks/{task['id']}", json={"status": "Done"}, headers=headers)
+    assert response.status_code == 200
+    assert client.get(f"/tasks/{task['id']}", headers=headers).json()["status"] == "Done"
+
+    response = client.post("/tasks/bulk", json={"tasks": [
+        {"title": "Bulk A", "project_id": project["id"]},
+        {"title": "Bulk B", "project_id": other["id"]},
+        {"title": "Bulk C", "project_id": 999999},
+    ]}, headers=headers)
+    assert [result["status_code"] for result in response.json()["results"]] == [201, 201, 404]
+    bulk_ids = [result["id"] for result in response.json()["results"][:2]]
+
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": bulk_ids + [999999]}, headers=headers)
+    assert [result["status_code"] for result in response.json()["results"]] == [204, 204, 404]
+    assert client.delete(f"/tasks/{task['id']}", headers=headers).status_code == 204
+    assert client.get(f"/tasks/{task['id']}", headers=headers).status_code == 404
+    assert client.get("/dashboard/").json()["total_tasks"] == 0
+
+    assert client.delete(f"/projects/{project['id']}", headers=headers).status_code == 204
+    assert client.get(f"/projects/{project['id']}", headers=headers).status_code == 404
+    with session_factory() as db:
+        assert db.get(ProjectShard, project["id"]) is None
+
+def test_directory_writes_leave_the_request_session_alone(session_factory, shard_set):
+    async def allocate(shards):
+        project_id, view = await shards.place()
+        return project_id, await shards.task_ids([project_id, project_id])
+
+    with session_factory() as db:
+        db.add(User(name="Pending", email="pending-directory@example.com", password_hash="x", role=UserRole.DEVELOPER))
+        project_id, task_ids = asyncio.run(allocate(sharding.Shards(db, shard_set)))
+        db.rollback()
+
+    with session_factory() as db:
+        assert db.scalar(select(User).where(User.email == "pending-directory@example.com")) is None
+        assert db.get(ProjectShard, project_id) is not None
+    assert len(set(task_ids)) == 2
+
+def test_single_task_requests_go_through_the_directory(
+    client, session_factory, auth_headers, create_project, create_task, shard_set, monkeypatch
+):
+    headers = auth_headers()
+    project = create_project(headers, "Routed by id")
+    task = create_task(headers, project["id"], "Routed")
+    with session_factory() as db:
+        shard = shard_set.shards[db.get(ProjectShard, project["id"]).shard]
+    # A task from before sharding has no id block and is looked for on every shard
+    with shard.sync_sessionmaker() as db:
+        db.add(Task(id=900000, title="Unsharded", project_id=project["id"]))
+        db.commit()
+    assert client.get("/tasks/900000", headers=headers).status_code == 200
+
+    def scattered(*args):
+        raise AssertionError("the task was looked for on every shard")
+
+    monkeypatch.setattr(sharding, "_task_projects", scattered)
+    assert client.get(f"/tasks/{task['id']}", headers=headers).json()["title"] == "Routed"
+    assert client.put(f"/tasks/{task['id']}", json={"status": "Done"}, headers=headers).status_code == 200
+    assert client.delete(f"/tasks/{task['id']}", headers=headers).status_code == 204
+    assert client.get(f"/tasks/{task['id']}", headers=headers).status_code == 404
+def test_move_project_between_shards(client, session_factory, auth_headers, create_project, create_task, shard_set):
+    headers = auth_headers()
+    project = create_project(headers, "Moving")
+    create_project(headers, "Staying")
+    tasks = [create_task(headers, project["id"], f"Moved {i}", status="In Progress") for i in range(3)]
+    with session_factory() as db:
+        source = db.get(ProjectShard, project["id"]).shard
+    target = next(index for index in range(3) if index != source)
+
+    assert sharding.move_project(session_factory, shard_set, project["id"], target) == 3
+
+    assert shard_rows(shard_set.shards[source], Project, Project.id == project["id"]) == []
+    assert shard_rows(shard_set.shards[source], Task, Task.project_id == project["id"]) == []
+    assert [task.id for task in shard_rows(shard_set.shards[target], Task)] == [task["id"] for task in tasks]
+    counter = shard_rows(shard_set.shards[target], DashboardCounter, DashboardCounter.project_id == project["id"])
+    assert counter[0].in_progress_tasks == 3
+
+    assert client.get(f"/projects/{project['id']}", headers=headers).json()["name"] == "Moving"
+    response = client.put(f"/tasks/{tasks[0]['id']}", json={"status": "Done"}, headers=headers)
+    assert response.status_code == 200
+    dashboard = client.get("/dashboard/").json()
+    assert (dashboard["total_projects"], dashboard["total_tasks"]) == (2, 3)
+    assert dashboard["tasks_by_status"]["Done"] == 1
+
+    # The per-shard totals still agree with a recount
+    for shard in shard_set.shards:
+        with shard.sync_sessionmaker() as db:
+            stored = counters.get_global_counters(db).total_tasks
+            assert stored == db.scalar(select(func.count()).select_from(Task))
+
+def test_move_copies_again_when_a_write_lands_during_the_copy(
+    client, session_factory, auth_headers, create_project, create_task, shard_set, monkeypatch
+):
+    headers = auth_headers()
+    project = create_project(headers, "Straggler")
+    task = create_task(headers, project["id"], "Late write")
+    with session_factory() as db:
+        source = db.get(ProjectShard, project["id"]).shard
+    target = (source + 1) % 3
+    copies, copy = [], sharding._copy_project
+
+    def copy_project(*args):
+        copied = copy(*args)
+        if not copies:
+            # A request that got past the write check before the move began commits now
+            with shard_set.shards[source].sync_sessionmaker() as db:
+                db.get(Task, task["id"]).status = "Done"
+                db.commit()
+        copies.append(copied)
+        return copied
+
+    monkeypatch.setattr(sharding, "_copy_project", copy_project)
+    sharding.move_project(session_factory, shard_set, project["id"], target)
+
+    assert len(copies) == 2
+    assert client.get(f"/tasks/{task['id']}", headers=headers).json()["status"] == "Done"
+
+def test_writes_wait_while_a_project_moves(
+    client, session_factory, auth_headers, create_project, create_task, shard_set
+):
+    headers = auth_headers()
+    project = create_project(headers, "Copying")
+    task = create_task(headers, project["id"], "Blocked")
+    with session_factory() as db:
+        entry = db.get(ProjectShard, project["id"])
+        source, target = entry.shard, (entry.shard + 1) % 3
+        # Past due since the last sweep, so the dashboard looks it up
+        with shard_set.shards[source].sync_sessionmaker() as shard_db:
+            shard_db.execute(update(Task).values(deadline=datetime.utcnow() - timedelta(days=1)))
+            shard_db.commit()
+        sharding._copy_project(shard_set.shards[source], shard_set.shards[target], project["id"])
+        entry.move_shard = target
+        db.commit()
+
+    response = client.put(f"/tasks/{task['id']}", json={"status": "Done"}, headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert client.post("/tasks/", json={"title": "Later", "project_id": project["id"]}, headers=headers).status_code == 503
+
+    # Reads keep working, and the copy on the target is not listed twice
+    assert client.get(f"/tasks/{task['id']}", headers=headers).status_code == 200
+    assert [row["id"] for row in client.get("/tasks/", headers=headers).json()] == [task["id"]]
+    assert [row["id"] for row in client.get("/projects/", headers=headers).json()] == [project["id"]]
+    dashboard = client.get("/dashboard/").json()
+    assert (dashboard["total_projects"], dashboard["total_tasks"], dashboard["overdue_tasks"]) == (1, 1, 1)
+
+    # Running the move again finishes it
+    sharding.move_project(session_factory, shard_set, project["id"], target)
+    assert client.put(f"/tasks/{task['id']}", json={"status": "Done"}, headers=headers).status_code == 200
+    assert shard_rows(shard_set.shards[source], Task) == []
+
+def test_maintenance_commands_cover_every_shard(auth_headers, create_project, create_task, shard_set):
+    headers = auth_headers()
+    tomorrow, long_ago = datetime.utcnow() + timedelta(days=1), datetime.utcnow() - timedelta(days=365)
+    for i in range(3):
+        create_task(headers, create_project(headers, f"Maintained {i}")["id"], "Late", deadline=tomorrow.isoformat())
+    for shard in shard_set.shards:
+        with shard.sync_sessionmaker() as db:
+            # Deadlines that passed since the last sweep, and tombstones past retention
+            db.execute(update(Task).values(deadline=long_ago))
+            db.add(Tombstone(entity="task", entity_id=1, deleted_at=long_ago))
+            db.commit()
+
+    env = {**os.environ, "DATABASE_URL": settings.DATABASE_URL, "DATABASE_SHARD_URLS": settings.DATABASE_SHARD_URLS}
+    for module, command, reported in [("app.overdue", "sweep", "Flagged 1 overdue tasks"),
+                                      ("app.changes", "prune", "Pruned 1 tombstones")]:
+        result = subprocess.run([sys.executable, "-m", module, command], capture_output=True, text=True, env=env,
+                                timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.splitlines() == [f"{reported} on shard {index}" for index in range(3)]
+
+    for shard in shard_set.shards:
+        assert [task.is_overdue for task in shard_rows(shard, Task)] == [True]
+        assert shard_rows(shard, Tombstone) == []
+
+def test_without_shards_everything_stays_on_the_primary(session_factory, auth_headers, create_project):
+    assert sharding.get_shard_set() is None
+    headers = auth_headers()
+    project = create_project(headers, "Unsharded")
+    with session_factory() as db:
+        assert db.get(Project, project["id"]).name == "Unsharded"
+        assert db.get(ProjectShard, project["id"]) is None
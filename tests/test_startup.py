@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+from sqlalchemy import create_engine, inspect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run(code: str, database_url: str, **env):
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60,
+        env={**os.environ, "DATABASE_URL": database_url, **env},
+    )
+
+def test_import_does_not_touch_the_database():
+    # An unreachable server whose driver is not even imported until first use
+    result = run(
+        "import sys\n"
+        "import app.main\n"
+        "from app import config, database\n"
+        "assert database.get_engine.cache_info().currsize == 0\n"
+        "assert not [name for name in sys.modules if name.startswith('app.routers')]\n"
+        # Neither the app nor its routers read settings (.env) or build pools and brokers on import
+        "import importlib, app.auth\n"
+        "for name in app.main.ROUTERS: importlib.import_module(f'app.routers.{name}')\n"
+        "assert config.get_settings.cache_info().currsize == 0\n"
+        "assert app.main.app.routes\n"
+        "assert app.main.app is app.main.app\n",
+        "mysql+pymysql://nobody:x@127.0.0.1:1/missing",
+    )
+    assert result.returncode == 0, result.stderr
+
+def test_lifespan_sets_up_schema(tmp_path):
+    url = f"sqlite:///{tmp_path / 'startup.db'}"
+    code = (
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import create_app\n"
+        "with TestClient(create_app()) as client:\n"
+        "    assert client.get('/').status_code == 200\n"
+    )
+    assert run(code, url, DB_SETUP_ON_STARTUP="false").returncode == 0
+    assert "schema_migrations" not in inspect(create_engine(url)).get_table_names()
+
+    result = run(code, url)
+    assert result.returncode == 0, result.stderr
+    tables = inspect(create_engine(url)).get_table_names()
+    assert {"schema_migrations", "users", "projects", "tasks"} <= set(tables)